@@ -2,12 +2,20 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, render_template
+from flask import Flask, g, render_template, request
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room, rooms, emit
 from backend.config.config import Config
 from backend.models.models import db
-from backend.routes.api import api
+from backend.routes.api import api, invalidate_caches
+from backend.utils.change_log import enable_change_capture
+from backend.utils.votes import VoteBuffer
+from backend.utils.jobs import RefreshJobs
+from backend.utils.rate_limit import RateLimiter
+from backend.utils.broadcaster import Broadcaster, ROOM_PREFIX, room_for
+from backend.utils.metrics import RequestMetrics, enable_query_tracking
+from backend.utils.profiling import HEADER as PROFILE_HEADER, RequestProfiler
+from backend.utils import tracing
 
 def create_app():
     app = Flask(__name__,
@@ -19,8 +27,95 @@ def create_app():
 
     # Initialize extensions
     db.init_app(app)
+    # Log every change to the tracked tables in the same transaction
+    enable_change_capture()
     CORS(app, origins=Config.CORS_ORIGINS)
-    socketio = SocketIO(app, cors_allowed_origins=Config.CORS_ORIGINS)
+    # With a message queue, events emitted by any worker reach clients on every worker
+    socketio = SocketIO(app,
+                        cors_allowed_origins=Config.CORS_ORIGINS,
+                        message_queue=Config.SOCKETIO_MESSAGE_QUEUE,
+                        async_mode=Config.SOCKETIO_ASYNC_MODE)
+
+    # Per-client token buckets and load shedding for the API blueprint
+    if Config.RATE_LIMIT_ENABLED:
+        app.extensions['rate_limiter'] = RateLimiter.from_config(Config)
+
+    # Per-route latency, status and SQL statement metrics, served at /api/metrics
+    if Config.METRICS_ENABLED:
+        enable_query_tracking()
+        metrics = app.extensions['metrics'] = RequestMetrics(Config.METRICS_QUERY_LOG_THRESHOLD)
+
+        @app.before_request
+        def start_request_metrics():
+            g.request_metrics = metrics.start()
+
+        @app.after_request
+        def record_request_metrics(response):
+            timer = g.pop('request_metrics', None)
+            if timer is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                metrics.finish(timer, request.method, route, request.path, response.status_code)
+            return response
+
+    # Spans for each request, continuing the caller's trace when it sends a traceparent header
+    if tracing.configure(Config) is not None:
+        @app.before_request
+        def start_request_span():
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            g.request_span = tracing.start_span(
+                f'{request.method} {route}', tracing.KIND_SERVER,
+                parent=tracing.parse_traceparent(request.headers.get(tracing.TRACEPARENT)),
+                **{'http.method': request.method, 'http.route': route, 'http.target': request.path})
+
+        @app.after_request
+        def tag_request_span(response):
+            request_span = g.get('request_span')
+            if request_span is not None:
+                request_span.set_attribute('http.status_code', response.status_code)
+                if response.status_code >= 500:
+                    request_span.status = tracing.STATUS_ERROR
+            return response
+
+        @app.teardown_request
+        def end_request_span(exc=None):
+            request_span = g.pop('request_span', None)
+            if request_span is not None:
+                if exc is not None:
+                    request_span.record_exception(exc)
+                request_span.end()
+
+    # Opt-in profiling; when disabled no hooks are installed at all
+    if Config.PROFILING_ENABLED:
+        profiler = app.extensions['profiler'] = RequestProfiler.from_config(Config)
+
+        @app.before_request
+        def start_profiling():
+            if profiler.wants(request.endpoint, request.headers.get(PROFILE_HEADER)):
+                g.profile_session = profiler.start()
+
+        @app.after_request
+        def save_profile(response):
+            session = g.pop('profile_session', None)
+            if session is not None:
+                try:
+                    response.headers['X-Profile-Id'] = profiler.finish(session, {
+                        'endpoint': request.endpoint,
+                        'route': request.url_rule.rule if request.url_rule else None,
+                        'method': request.method,
+                        'path': request.path,
+                        'args': request.args.to_dict(flat=False),
+                        'status': response.status_code
+                    })
+                except Exception as e:
+                    print(f"Error saving profile: {e}")
+            return response
+
+        @app.teardown_request
+        def stop_profiling(exc=None):
+            # Only left over when the response was never finalized
+            session = g.pop('profile_session', None)
+            if session is not None:
+                session.stop()
 
     # Register blueprints
     app.register_blueprint(api, url_prefix='/api')
@@ -29,14 +124,47 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    # Buffer votes and upsert them in batches instead of one transaction per request
+    if Config.VOTE_WRITE_BEHIND:
+        app.extensions['vote_buffer'] = VoteBuffer(
+            app,
+            interval=Config.VOTE_FLUSH_INTERVAL_MS / 1000,
+            max_batch=Config.VOTE_FLUSH_MAX_BATCH,
+            max_attempts=Config.VOTE_FLUSH_MAX_ATTEMPTS
+        ).start()
+
     @app.route('/')
     def index():
         """Serve the main dashboard"""
         return render_template('index.html')
 
+    # Pushes per-symbol deltas to subscribed clients; scripts use it to publish their commits.
+    # A message queue reaches every worker's clients, so then only one process emits at a time
+    broadcaster = Broadcaster(socketio, Config.STOCKS, max_posts=Config.BROADCAST_MAX_POSTS,
+                              exclusive=bool(Config.SOCKETIO_MESSAGE_QUEUE),
+                              lease_ttl=max(3 * Config.BROADCAST_POLL_INTERVAL, 60),
+                              gap_timeout=Config.CHANGE_FEED_GAP_TIMEOUT)
+    app.extensions['broadcaster'] = broadcaster
+    # Drop cached results for symbols whose data changed
+    broadcaster.add_listener(invalidate_caches)
+
+    # Data refreshes requested through the API run in the background; with a Socket.IO message
+    # queue, the job publishes what it changed like the pipeline script does
+    app.extensions['refresh_jobs'] = RefreshJobs.from_config(
+        app, Config, broadcaster if Config.SOCKETIO_MESSAGE_QUEUE else None)
+
+    @app.before_request
+    def start_broadcaster():
+        # Started lazily so each worker process runs its own poller; every poller invalidates
+        # its worker's caches, but with a message queue only the lease holder emits
+        if Config.BROADCAST_POLL_INTERVAL > 0:
+            broadcaster.start_polling(app, Config.BROADCAST_POLL_INTERVAL)
+
     @socketio.on('connect')
     def handle_connect():
         print('Client connected')
+        if Config.BROADCAST_POLL_INTERVAL > 0:
+            broadcaster.start_polling(app, Config.BROADCAST_POLL_INTERVAL)
 
     @socketio.on('disconnect')
     def handle_disconnect():
@@ -44,11 +172,21 @@ def create_app():
 
     @socketio.on('subscribe_updates')
     def handle_subscribe(data):
-        """Handle client subscription to real-time updates"""
-        print(f"Client subscribed to updates: {data}")
+        """Join the rooms of the requested stocks, leaving those no longer requested"""
+        requested = {str(s).upper() for s in (data or {}).get('stocks', [])} & set(Config.STOCKS)
+        wanted = {room_for(symbol) for symbol in requested}
+        current = {room for room in rooms() if room.startswith(ROOM_PREFIX)}
+
+        for room in current - wanted:
+            leave_room(room)
+        for room in wanted - current:
+            join_room(room)
+
+        emit('subscribed', {'stocks': sorted(requested)})
 
     return app, socketio
 
 if __name__ == '__main__':
+    # Development server only; see backend/wsgi.py and gunicorn.conf.py for production
     app, socketio = create_app()
     socketio.run(app, debug=True, host='0.0.0.0', port=8000, allow_unsafe_werkzeug=True)
\ No newline at end of file
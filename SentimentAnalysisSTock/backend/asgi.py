@@ -0,0 +1,135 @@
+"""
+Async (ASGI) entry point: the API on Quart and SQLAlchemy asyncio
+Run with hypercorn from the project root:
+
+    hypercorn --bind 0.0.0.0:8000 --workers 1 backend.asgi:app
+
+Serves the same /api routes and dashboard as backend/wsgi.py, but one process holds
+many concurrent requests while they wait on the database instead of one per thread.
+Socket.IO is not served here; the dashboard falls back to polling, or run the WSGI
+server alongside it for push updates.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from quart import Quart, g, render_template, request
+from backend.app import create_app
+from backend.config.config import Config
+from backend.models.models import db, StockPrice, SentimentSummary
+from backend.routes.async_api import api, invalidate_caches, settled_offset
+from backend.utils import tracing
+from backend.utils.async_db import AsyncDatabase
+from backend.utils.change_log import latest_offset_query, tail_query
+
+CACHE_TABLES = (StockPrice.__tablename__, SentimentSummary.__tablename__)
+
+def create_async_app():
+    # The sync app resolves the database, creates tables and owns the rate limiter and
+    # vote buffer; sharing them keeps both modes behaving the same
+    sync_app, _ = create_app()
+    with sync_app.app_context():
+        url = db.engine.url
+
+    app = Quart(__name__,
+                template_folder='../templates',
+                static_folder='../static')
+    app.config.from_object(Config)
+
+    app.extensions['sync_app'] = sync_app
+    app.extensions['async_db'] = AsyncDatabase(url, **Config.SQLALCHEMY_ENGINE_OPTIONS)
+    for name in ('rate_limiter', 'vote_buffer', 'metrics', 'refresh_jobs'):
+        if name in sync_app.extensions:
+            app.extensions[name] = sync_app.extensions[name]
+
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        # Async hooks, so the SQL counter is set in the request's own task
+        @app.before_request
+        async def start_request_metrics():
+            g.request_metrics = metrics.start()
+
+        @app.after_request
+        async def record_request_metrics(response):
+            timer = g.pop('request_metrics', None)
+            if timer is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                metrics.finish(timer, request.method, route, request.path, response.status_code)
+            return response
+
+    # create_app() already configured tracing from the same settings
+    if tracing.configure(Config) is not None:
+        @app.before_request
+        async def start_request_span():
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            g.request_span = tracing.start_span(
+                f'{request.method} {route}', tracing.KIND_SERVER,
+                parent=tracing.parse_traceparent(request.headers.get(tracing.TRACEPARENT)),
+                **{'http.method': request.method, 'http.route': route, 'http.target': request.path})
+
+        @app.after_request
+        async def tag_request_span(response):
+            request_span = g.get('request_span')
+            if request_span is not None:
+                request_span.set_attribute('http.status_code', response.status_code)
+                if response.status_code >= 500:
+                    request_span.status = tracing.STATUS_ERROR
+            return response
+
+        @app.teardown_request
+        async def end_request_span(exc=None):
+            request_span = g.pop('request_span', None)
+            if request_span is not None:
+                if exc is not None:
+                    request_span.record_exception(exc)
+                request_span.end()
+
+    app.register_blueprint(api, url_prefix='/api')
+
+    @app.route('/')
+    async def index():
+        """Serve the main dashboard"""
+        return await render_template('index.html')
+
+    @app.after_request
+    async def add_cors_headers(response):
+        origin = request.headers.get('Origin')
+        if origin in Config.CORS_ORIGINS:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+            response.headers['Vary'] = 'Origin'
+        return response
+
+    async def watch_changes(interval):
+        """Drop cached results for symbols whose data changed (the broadcaster does this in WSGI mode)"""
+        async_db = app.extensions['async_db']
+        offset = await async_db.scalar(latest_offset_query()) or 0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                end = await settled_offset(async_db, offset)
+                changes = await async_db.all(tail_query(offset, CACHE_TABLES, 10000, until=end))
+                offset = changes[-1].id if len(changes) == 10000 else end
+                if changes:
+                    invalidate_caches(changes)
+            except Exception as e:
+                print(f"Error reading change log: {e}")
+
+    @app.before_serving
+    async def start_change_watcher():
+        if Config.BROADCAST_POLL_INTERVAL > 0:
+            app.extensions['change_watcher'] = asyncio.create_task(
+                watch_changes(Config.BROADCAST_POLL_INTERVAL))
+
+    @app.after_serving
+    async def shutdown():
+        watcher = app.extensions.pop('change_watcher', None)
+        if watcher is not None:
+            watcher.cancel()
+        await app.extensions['async_db'].dispose()
+
+    return app
+
+app = create_async_app()
@@ -10,6 +10,12 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///sentiment_analysis.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool size only applies to server databases; SQLite keeps its default pool
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+        'pool_pre_ping': True,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20))
+    }
 
     # Reddit API settings
     REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
@@ -24,7 +30,143 @@ class Config:
 
     # Application settings
     STOCKS = os.getenv('STOCKS', 'AAPL,GOOGL,AMZN,META,NFLX,TSLA,MSFT,NVDA,IBM,CRM,ORCL,ADBE,INTC,AMD,UBER,PYPL,SPOT,SQ').split(',')
-    UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', 300))  # 5 minutes
+    UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', 300))  # 5 minutes; the scheduler's pipeline interval
+
+    # API pagination settings
+    POSTS_DEFAULT_PAGE_SIZE = int(os.getenv('POSTS_DEFAULT_PAGE_SIZE', 50))
+    POSTS_MAX_PAGE_SIZE = int(os.getenv('POSTS_MAX_PAGE_SIZE', 200))
+
+    # Downsampled history cache settings
+    HISTORY_CACHE_TTL = int(os.getenv('HISTORY_CACHE_TTL', 300))
+    HISTORY_CACHE_SIZE = int(os.getenv('HISTORY_CACHE_SIZE', 512))
+
+    # Stock comparison settings
+    COMPARE_MAX_SYMBOLS = int(os.getenv('COMPARE_MAX_SYMBOLS', 50))
+    COMPARE_CACHE_SIZE = int(os.getenv('COMPARE_CACHE_SIZE', 128))
+
+    # Correlation analytics settings
+    ANALYTICS_DEFAULT_WINDOW = int(os.getenv('ANALYTICS_DEFAULT_WINDOW', 20))
+    ANALYTICS_MAX_LAG = int(os.getenv('ANALYTICS_MAX_LAG', 5))
+    ANALYTICS_ASOF_TOLERANCE_DAYS = int(os.getenv('ANALYTICS_ASOF_TOLERANCE_DAYS', 3))
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', 256))
+
+    # Cross-asset correlation matrix settings
+    CORRELATION_MATRIX_MIN_OBSERVATIONS = int(os.getenv('CORRELATION_MATRIX_MIN_OBSERVATIONS', 5))
+    CORRELATION_MATRIX_REFRESH_SECONDS = int(os.getenv('CORRELATION_MATRIX_REFRESH_SECONDS', 30))
+    CORRELATION_MATRIX_MAX_DAYS = int(os.getenv('CORRELATION_MATRIX_MAX_DAYS', 365))
+    # Lookbacks kept in memory per worker; others are rebuilt when asked for again
+    CORRELATION_MATRIX_CACHE_SIZE = int(os.getenv('CORRELATION_MATRIX_CACHE_SIZE', 4))
+
+    # Vote ingestion settings: with write-behind, votes are buffered and upserted in batches
+    VOTE_WRITE_BEHIND = os.getenv('VOTE_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+    VOTE_FLUSH_INTERVAL_MS = int(os.getenv('VOTE_FLUSH_INTERVAL_MS', 250))
+    VOTE_FLUSH_MAX_BATCH = int(os.getenv('VOTE_FLUSH_MAX_BATCH', 500))
+    VOTE_FLUSH_MAX_ATTEMPTS = int(os.getenv('VOTE_FLUSH_MAX_ATTEMPTS', 5))
+
+    # Rate limiting: 'rate:burst' token buckets per client IP and cost class
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'memory' or 'redis'
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')  # defaults to REDIS_URL
+    RATE_LIMITS = {
+        'default': os.getenv('RATE_LIMIT_DEFAULT', '10:60'),
+        'heavy': os.getenv('RATE_LIMIT_HEAVY', '1:10'),
+        'write': os.getenv('RATE_LIMIT_WRITE', '2:20')
+    }
+
+    # Reverse proxies (addresses or CIDR ranges) whose X-Real-IP header names the client
+    TRUSTED_PROXIES = [p.strip() for p in os.getenv('TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if p.strip()]
+
+    # Load shedding: requests over these in-flight caps are rejected instead of queued
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 64))
+    MAX_CONCURRENT_REQUESTS_PER_CLIENT = int(os.getenv('MAX_CONCURRENT_REQUESTS_PER_CLIENT', 8))
+    MAX_CONCURRENT_BY_CLASS = {
+        'heavy': int(os.getenv('MAX_CONCURRENT_HEAVY_REQUESTS', 8))
+    }
+
+    # Socket.IO settings: a message queue (e.g. REDIS_URL) fans events out across workers
+    # and lets scripts outside the web process emit; unset keeps everything in-process
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE')  # threading, gevent or eventlet; auto if unset
+
+    # Real-time push: the web server polls for changes every BROADCAST_POLL_INTERVAL seconds
+    # (0 disables it, e.g. when the pipeline publishes through SOCKETIO_MESSAGE_QUEUE)
+    BROADCAST_POLL_INTERVAL = int(os.getenv('BROADCAST_POLL_INTERVAL', 30))
+    BROADCAST_MAX_POSTS = int(os.getenv('BROADCAST_MAX_POSTS', 50))
+
+    # Change log: rows older than this are pruned by the data pipeline
+    CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 7))
+    CHANGE_LOG_MAX_PAGE_SIZE = int(os.getenv('CHANGE_LOG_MAX_PAGE_SIZE', 1000))
+    # Seconds a missing change id (a transaction still in flight, or rolled back) holds readers back
+    CHANGE_FEED_GAP_TIMEOUT = int(os.getenv('CHANGE_FEED_GAP_TIMEOUT', 120))
+
+    # Request metrics at /api/metrics; requests running more SQL statements than the threshold are logged
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_QUERY_LOG_THRESHOLD = int(os.getenv('METRICS_QUERY_LOG_THRESHOLD', 10))
+
+    # Per-request profiling, off unless enabled: requests sending X-Profile: <PROFILING_TOKEN>,
+    # or to PROFILE_ENDPOINTS (e.g. api.compare_stocks), are profiled into PROFILE_DIR
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+    PROFILE_ENDPOINTS = [e for e in os.getenv('PROFILE_ENDPOINTS', '').split(',') if e]
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 1.0))
+    PROFILER = os.getenv('PROFILER', 'cprofile')  # 'cprofile' or 'pyinstrument'
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+    # Tracing spans around pipeline stages, collector calls, sentiment batches, DB flushes and
+    # API requests, exported as OTLP/JSON to TRACE_FILE ('file') or TRACE_OTLP_ENDPOINT ('otlp')
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'file')
+    TRACE_FILE = os.getenv('TRACE_FILE', 'traces/spans.jsonl')
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'stock-sentiment')
+    TRACE_EXPORT_INTERVAL = float(os.getenv('TRACE_EXPORT_INTERVAL', 2.0))
+
+    # Data pipeline: independent stages run on PIPELINE_WORKERS threads; a failed stage is
+    # retried alone, after PIPELINE_RETRY_DELAY seconds doubling per attempt
+    PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', 4))
+    PIPELINE_STAGE_RETRIES = int(os.getenv('PIPELINE_STAGE_RETRIES', 2))
+    PIPELINE_RETRY_DELAY = float(os.getenv('PIPELINE_RETRY_DELAY', 5.0))
+    PIPELINE_TIMINGS_FILE = os.getenv('PIPELINE_TIMINGS_FILE', 'logs/pipeline_runs.jsonl')
+
+    # Run journal: data jobs commit every PIPELINE_CHUNK_SYMBOLS symbols and record what is done,
+    # so with --resume an unfinished run started today within JOURNAL_RESUME_WINDOW seconds is
+    # resumed, not redone
+    PIPELINE_CHUNK_SYMBOLS = int(os.getenv('PIPELINE_CHUNK_SYMBOLS', 20))
+    JOURNAL_RESUME_WINDOW = int(os.getenv('JOURNAL_RESUME_WINDOW', 6 * 3600))
+    JOURNAL_RETENTION_DAYS = int(os.getenv('JOURNAL_RETENTION_DAYS', 7))
+
+    # Resident scheduler (scheduler.py): the pipeline runs every UPDATE_INTERVAL seconds and the
+    # price updater every PRICE_UPDATE_INTERVAL, each +/- SCHEDULER_JITTER of its interval
+    PRICE_UPDATE_INTERVAL = int(os.getenv('PRICE_UPDATE_INTERVAL', 900))
+    SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', 0.1))
+    SCHEDULER_STATUS_FILE = os.getenv('SCHEDULER_STATUS_FILE', 'logs/scheduler_status.json')
+
+    # Activity-adaptive refresh (scheduler.py --jobs adaptive): each symbol is refreshed every
+    # UPDATE_INTERVAL / heat seconds (heat: post velocity and volatility against the median symbol),
+    # within MIN..MAX, OFF_HOURS_FACTOR times less often outside market hours, and within a
+    # budget of REFRESH_API_CALLS_PER_HOUR collector calls (0: unlimited)
+    ADAPTIVE_REFRESH_TICK = int(os.getenv('ADAPTIVE_REFRESH_TICK', 30))
+    ADAPTIVE_REFRESH_MIN_INTERVAL = int(os.getenv('ADAPTIVE_REFRESH_MIN_INTERVAL', 60))
+    ADAPTIVE_REFRESH_MAX_INTERVAL = int(os.getenv('ADAPTIVE_REFRESH_MAX_INTERVAL', 3600))
+    ADAPTIVE_REFRESH_OFF_HOURS_FACTOR = float(os.getenv('ADAPTIVE_REFRESH_OFF_HOURS_FACTOR', 4.0))
+    ADAPTIVE_REFRESH_REPLAN_INTERVAL = int(os.getenv('ADAPTIVE_REFRESH_REPLAN_INTERVAL', 600))
+    REFRESH_API_CALLS_PER_HOUR = int(os.getenv('REFRESH_API_CALLS_PER_HOUR', 1000))
+    MARKET_TIMEZONE = os.getenv('MARKET_TIMEZONE', 'America/New_York')
+    MARKET_OPEN = os.getenv('MARKET_OPEN', '09:30')
+    MARKET_CLOSE = os.getenv('MARKET_CLOSE', '16:00')
+
+    # Sharded runs (--shard i/N, run_shards.py): how STOCKS are split ('hash' or 'range'), and
+    # where each shard worker writes its status for the coordinator to merge
+    SHARD_STRATEGY = os.getenv('SHARD_STRATEGY', 'hash')
+    SHARD_STATUS_DIR = os.getenv('SHARD_STATUS_DIR', 'logs/shards')
+
+    # Background refresh jobs (POST /api/data/refresh): run on JOB_WORKERS threads of the web
+    # process ('memory') or by Celery workers ('celery', brokered by CELERY_BROKER_URL or REDIS_URL)
+    JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'memory')
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+    CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
+    JOB_PENDING_TIMEOUT = int(os.getenv('JOB_PENDING_TIMEOUT', 3600))  # queued longer than this: expired
+    JOB_LEASE_WAIT = int(os.getenv('JOB_LEASE_WAIT', 600))  # how long a job waits for a running pipeline
 
     # CORS settings
     CORS_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000', 'http://localhost:3000', 'http://127.0.0.1:3000']
\ No newline at end of file
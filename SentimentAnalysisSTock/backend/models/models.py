@@ -17,6 +17,12 @@ class Post(db.Model):
     posted_at = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Keyset pagination walks (posted_at, id) newest first
+    __table_args__ = (
+        db.Index('ix_posts_posted_at_id', 'posted_at', 'id'),
+        db.Index('ix_posts_symbol_posted_at_id', 'symbol', 'posted_at', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -131,4 +137,126 @@ class PredictionVote(db.Model):
             'user_ip': self.user_ip,
             'vote_type': self.vote_type,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+class ChangeLog(db.Model):
+    """Append-only record of row changes; the id is the offset consumers tail from"""
+    __tablename__ = 'change_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # 'insert', 'update', 'upsert', 'delete'
+    symbol = db.Column(db.String(10))
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # AUTOINCREMENT, so SQLite never hands out an id again once the log is pruned empty
+    __table_args__ = (
+        db.Index('ix_change_log_table_name_id', 'table_name', 'id'),
+        {'sqlite_autoincrement': True}
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'row_id': self.row_id,
+            'operation': self.operation,
+            'symbol': self.symbol,
+            'changed_at': self.changed_at.isoformat()
+        }
+
+class ConsumerOffset(db.Model):
+    """Last change_log id each named consumer has processed"""
+    __tablename__ = 'consumer_offsets'
+
+    consumer = db.Column(db.String(100), primary_key=True)
+    offset = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'consumer': self.consumer,
+            'offset': self.offset,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class JobLease(db.Model):
+    """Who is running a scheduled job, until when; keeps runs of one job from overlapping"""
+    __tablename__ = 'job_leases'
+
+    name = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'owner': self.owner,
+            'acquired_at': self.acquired_at.isoformat(),
+            'expires_at': self.expires_at.isoformat()
+        }
+
+class RefreshJob(db.Model):
+    """A data refresh requested through the API, queued and run in the background"""
+    __tablename__ = 'refresh_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(10))  # None: every tracked stock
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, skipped
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    message = db.Column(db.String(500))
+    # Set only while the job is queued; unique, so identical requests share one queued job
+    pending_key = db.Column(db.String(20), unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'symbol': self.symbol,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JournalRun(db.Model):
+    """One run of a data job, kept open until it completes so a failed run can be resumed"""
+    __tablename__ = 'journal_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(100), nullable=False)
+    scope = db.Column(db.String(64), nullable=False)  # which day and symbols the run covers
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, completed, failed
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_journal_runs_job_scope', 'job', 'scope', 'started_at'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job': self.job,
+            'scope': self.scope,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JournalEntry(db.Model):
+    """A stage of a journaled run finished for one symbol, or as a whole (symbol '*')"""
+    __tablename__ = 'journal_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('journal_runs.id', ondelete='CASCADE'), nullable=False)
+    stage = db.Column(db.String(100), nullable=False)
+    symbol = db.Column(db.String(10), nullable=False)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('run_id', 'stage', 'symbol', name='_journal_run_stage_symbol_uc'),)
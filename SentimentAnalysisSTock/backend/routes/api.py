@@ -1,17 +1,133 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, g, jsonify, request
 from datetime import date, datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import select, func, or_, and_
 from backend.models.models import db, Post, StockPrice, SentimentSummary, Prediction, PredictionVote
 from backend.utils.data_collectors import RedditCollector, NewsCollector, StockDataCollector
 from backend.config.config import Config
+from backend.utils.pagination import encode_cursor, decode_cursor, clamp_page_size, parse_fields
+from backend.utils.serializers import json_response, rows_to_records
+from backend.utils.response_formats import (UnsupportedFormat, negotiate_format, table_response,
+                                            arrow_response, encode, rows_to_columns)
+from backend.utils.timeseries import sentiment_history_rows, price_history_rows
+from backend.utils.downsampling import METHODS, downsample
+from backend.utils.cache import TTLCache
+from backend.utils.comparison import compare_symbols
+from backend.utils.analytics import correlation_report, data_fingerprint
+from backend.utils.rate_limit import (COST_CLASSES, EXEMPT_ENDPOINTS, Rejected, client_ip,
+                                       retry_after_header)
+from backend.utils.change_log import CHANGE_COLUMNS, TRACKED_TABLES, settled_offset, tail
+from backend.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from backend.utils.votes import (VOTE_TYPES, upsert_votes, vote_message, vote_counts, apply_pending,
+                                 vote_stats)
+from backend.utils.correlation_matrix import KINDS as MATRIX_KINDS, get_correlation_matrix, matrix_to_lists
 
 api = Blueprint('api', __name__)
 
+@api.before_request
+def limit_requests():
+    """Rate limit and shed load before any work is done for the request"""
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+
+    try:
+        g.rate_limit_slots, g.rate_limit_remaining = limiter.admit(
+            client_ip(), COST_CLASSES.get(request.endpoint, 'default'))
+    except Rejected as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = e.status
+        response.headers['Retry-After'] = retry_after_header(e.retry_after)
+        return response
+
+@api.after_request
+def add_rate_limit_headers(response):
+    if 'rate_limit_remaining' in g:
+        response.headers['X-RateLimit-Remaining'] = str(int(g.rate_limit_remaining))
+    return response
+
+@api.teardown_request
+def release_request_slots(exc=None):
+    slots = g.pop('rate_limit_slots', None)
+    if slots:
+        current_app.extensions['rate_limiter'].release(slots)
+
+# Comparison results keyed by (symbols, days, today)
+comparison_cache = TTLCache(maxsize=Config.COMPARE_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+
+# Correlation analytics keyed by (symbol, window, days, max_lag, today, data fingerprint)
+analytics_cache = TTLCache(maxsize=Config.ANALYTICS_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+
+# Downsampled histories keyed by (kind, symbol, start, end, max_points, method)
+history_cache = TTLCache(maxsize=Config.HISTORY_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+
+def invalidate_caches(changes):
+    """Drop cached histories and comparisons of symbols that appear in a batch of changes"""
+    symbols = {c.symbol for c in changes
+               if c.symbol and c.table_name in (StockPrice.__tablename__, SentimentSummary.__tablename__)}
+    if not symbols:
+        return
+    # history_cache keys start with (kind, symbol); comparison_cache keys with the symbol tuple
+    history_cache.invalidate(lambda key: key[1] in symbols)
+    comparison_cache.invalidate(lambda key: not symbols.isdisjoint(key[0]))
+
+# Per-endpoint downsampling: default method, LTTB y column and bucket aggregations
+DOWNSAMPLING = {
+    'sentiment': ('lttb', 'avg_sentiment', {
+        'date': 'first', 'avg_sentiment': 'mean', 'post_count': 'sum',
+        'positive_count': 'sum', 'negative_count': 'sum', 'neutral_count': 'sum'
+    }),
+    'prices': ('lttb', 'close_price', {
+        'date': 'first', 'open_price': 'first', 'high_price': 'max',
+        'low_price': 'min', 'close_price': 'last', 'volume': 'sum'
+    }),
+    'correlation': ('bucket', 'close_price', {
+        'date': 'first', 'sentiment_score': 'mean', 'close_price': 'last', 'post_count': 'sum'
+    })
+}
+
+def downsampling_options(kind, max_points, method=None):
+    """Validate max_points= and method=; returns (method, y column, aggregations)"""
+    default_method, y_column, aggregations = DOWNSAMPLING[kind]
+    method = method or default_method
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of: {', '.join(METHODS)}")
+    if max_points < 3:
+        raise ValueError('max_points must be at least 3')
+    return method, y_column, aggregations
+
+def _history_table(kind, symbol, start_date, fetch):
+    """
+    Fetch (columns, rows) for a history endpoint, downsampled when max_points= is given
+    Returns (columns, rows, downsampling info or None)
+    """
+    max_points = request.args.get('max_points', type=int)
+    if not max_points:
+        columns, rows = fetch()
+        return columns, rows, None
+
+    method, y_column, aggregations = downsampling_options(kind, max_points, request.args.get('method'))
+
+    def compute():
+        columns, rows = fetch()
+        sampled = downsample(columns, rows, max_points, method, y_column, aggregations)
+        return columns, sampled, {'method': method, 'max_points': max_points, 'source_points': len(rows)}
+
+    key = (kind, symbol, start_date, date.today(), max_points, method)
+    return history_cache.get_or_compute(key, compute)
+
 @api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
 
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request latency, status and SQL statement metrics in the Prometheus text format"""
+    metrics = current_app.extensions.get('metrics')
+    if metrics is None:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @api.route('/stocks', methods=['GET'])
 def get_stocks():
     """Get list of tracked stocks"""
@@ -50,20 +166,23 @@ def get_current_sentiment():
 def get_sentiment_history(symbol):
     """Get sentiment history for a specific stock"""
     try:
+        fmt = negotiate_format()
         days = request.args.get('days', 30, type=int)
         start_date = date.today() - timedelta(days=days)
 
-        sentiment_history = db.session.query(SentimentSummary)\
-            .filter(SentimentSummary.symbol == symbol.upper())\
-            .filter(SentimentSummary.date >= start_date)\
-            .order_by(SentimentSummary.date)\
-            .all()
+        columns, rows, downsampled = _history_table(
+            'sentiment', symbol.upper(), start_date, lambda: sentiment_history_rows(symbol.upper(), start_date))
 
-        return jsonify({
-            'symbol': symbol.upper(),
-            'history': [s.to_dict() for s in sentiment_history]
-        })
+        envelope = {'symbol': symbol.upper()}
+        if downsampled:
+            envelope['downsampled'] = downsampled
 
+        return table_response(envelope, 'history', columns, rows, fmt)
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -97,81 +216,238 @@ def get_current_prices():
 def get_price_history(symbol):
     """Get price history for a specific stock"""
     try:
+        fmt = negotiate_format()
         days = request.args.get('days', 30, type=int)
         start_date = date.today() - timedelta(days=days)
 
-        price_history = db.session.query(StockPrice)\
-            .filter(StockPrice.symbol == symbol.upper())\
-            .filter(StockPrice.date >= start_date)\
-            .order_by(StockPrice.date)\
-            .all()
+        columns, rows, downsampled = _history_table(
+            'prices', symbol.upper(), start_date, lambda: price_history_rows(symbol.upper(), start_date))
 
-        return jsonify({
-            'symbol': symbol.upper(),
-            'history': [p.to_dict() for p in price_history]
-        })
+        envelope = {'symbol': symbol.upper()}
+        if downsampled:
+            envelope['downsampled'] = downsampled
 
+        return table_response(envelope, 'history', columns, rows, fmt)
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+CORRELATION_COLUMNS = ('date', 'sentiment_score', 'close_price', 'post_count')
+
+CORRELATION_SENTIMENT_COLUMNS = ('date', 'avg_sentiment', 'post_count')
+CORRELATION_PRICE_COLUMNS = ('date', 'close_price')
+
+def _correlation_rows(symbol, start_date):
+    """Join daily sentiment and close price rows on date"""
+    _, sentiment_data = sentiment_history_rows(symbol, start_date, columns=CORRELATION_SENTIMENT_COLUMNS)
+    _, price_data = price_history_rows(symbol, start_date, columns=CORRELATION_PRICE_COLUMNS)
+    return join_correlation_rows(sentiment_data, price_data)
+
+def join_correlation_rows(sentiment_data, price_data):
+    """Inner-join (date, sentiment, post_count) and (date, close_price) rows on date"""
+    sentiment_dict = {s_date: (s_sentiment, s_post_count)
+                      for s_date, s_sentiment, s_post_count in sentiment_data}
+    price_dict = dict(price_data)
+
+    return [
+        (date_key, sentiment_dict[date_key][0], price_dict[date_key], sentiment_dict[date_key][1])
+        for date_key in sorted(sentiment_dict.keys() & price_dict.keys())
+    ]
+
 @api.route('/correlation/<symbol>', methods=['GET'])
 def get_correlation_data(symbol):
     """Get correlation data between sentiment and price for a stock"""
     try:
+        fmt = negotiate_format()
         days = request.args.get('days', 30, type=int)
         start_date = date.today() - timedelta(days=days)
 
-        # Get sentiment data
-        sentiment_data = db.session.query(SentimentSummary)\
-            .filter(SentimentSummary.symbol == symbol.upper())\
-            .filter(SentimentSummary.date >= start_date)\
-            .order_by(SentimentSummary.date)\
-            .all()
-
-        # Get price data
-        price_data = db.session.query(StockPrice)\
-            .filter(StockPrice.symbol == symbol.upper())\
-            .filter(StockPrice.date >= start_date)\
-            .order_by(StockPrice.date)\
-            .all()
-
-        # Combine data by date
-        correlation_data = []
-        sentiment_dict = {s.date: s for s in sentiment_data}
-        price_dict = {p.date: p for p in price_data}
-
-        for date_key in sorted(set(sentiment_dict.keys()) & set(price_dict.keys())):
-            correlation_data.append({
-                'date': date_key.isoformat(),
-                'sentiment_score': sentiment_dict[date_key].avg_sentiment,
-                'close_price': price_dict[date_key].close_price,
-                'post_count': sentiment_dict[date_key].post_count
-            })
+        columns, correlation_rows, downsampled = _history_table(
+            'correlation', symbol.upper(), start_date,
+            lambda: (CORRELATION_COLUMNS, _correlation_rows(symbol.upper(), start_date)))
 
-        return jsonify({
-            'symbol': symbol.upper(),
-            'correlation_data': correlation_data
-        })
+        envelope = {'symbol': symbol.upper()}
+        if downsampled:
+            envelope['downsampled'] = downsampled
+
+        return table_response(envelope, 'correlation_data', columns, correlation_rows, fmt)
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+@api.route('/analytics/correlation/<symbol>', methods=['GET'])
+def get_correlation_analytics(symbol):
+    """
+    Get sentiment vs return statistics for a stock: Pearson/Spearman correlation,
+    rolling-window correlation and lagged cross-correlation (sentiment leading price)
+    """
+    try:
+        symbol = symbol.upper()
+        days = request.args.get('days', 90, type=int)
+        window = request.args.get('window', Config.ANALYTICS_DEFAULT_WINDOW, type=int)
+        max_lag = request.args.get('max_lag', Config.ANALYTICS_MAX_LAG, type=int)
+
+        if window < 3:
+            return jsonify({'error': 'window must be at least 3'}), 400
+        if not 0 <= max_lag <= Config.ANALYTICS_MAX_LAG:
+            return jsonify({'error': f'max_lag must be between 0 and {Config.ANALYTICS_MAX_LAG}'}), 400
+
+        today = date.today()
+        start_date = today - timedelta(days=days)
+
+        # The fingerprint changes whenever rows for this symbol are added or updated
+        key = (symbol, window, days, max_lag, today, data_fingerprint(symbol, start_date))
+        report = analytics_cache.get_or_compute(key, lambda: correlation_report(
+            symbol, start_date, window, max_lag, Config.ANALYTICS_ASOF_TOLERANCE_DAYS))
+
+        return json_response(dict(report, period=f"{start_date.isoformat()} to {today.isoformat()}"))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/correlation/matrix', methods=['GET'])
+def get_correlation_matrix_view():
+    """
+    Get an N x N correlation matrix across the tracked stocks
+    kind: sentiment (sentiment vs sentiment), returns (return vs return) or
+    sentiment_next_return (row symbol's sentiment vs column symbol's next-session return)
+    """
+    try:
+        fmt = negotiate_format()
+        kind = request.args.get('kind', 'sentiment')
+        days = request.args.get('days', 90, type=int)
+        subset = request.args.get('symbols')
+        include_observations = request.args.get('observations', 'false').lower() in ('1', 'true', 'yes')
+
+        if kind not in MATRIX_KINDS:
+            return jsonify({'error': f"Unknown kind '{kind}', expected one of: {', '.join(MATRIX_KINDS)}"}), 400
+        if not 2 <= days <= Config.CORRELATION_MATRIX_MAX_DAYS:
+            return jsonify({'error': f'days must be between 2 and {Config.CORRELATION_MATRIX_MAX_DAYS}'}), 400
+
+        matrix = get_correlation_matrix(Config.STOCKS, days,
+                                        Config.CORRELATION_MATRIX_MIN_OBSERVATIONS,
+                                        Config.CORRELATION_MATRIX_REFRESH_SECONDS,
+                                        Config.CORRELATION_MATRIX_CACHE_SIZE)
+        with matrix.lock:
+            requested = [s.strip().upper() for s in subset.split(',') if s.strip()] if subset else None
+            symbols, corr, observations = matrix.select(kind, requested)
+
+        envelope = {'kind': kind, 'days': days}
+
+        if fmt == 'arrow':
+            columns = ('symbol', *symbols)
+            rows = [(symbol, *row) for symbol, row in zip(symbols, matrix_to_lists(corr, 4))]
+            return arrow_response(columns, rows, metadata=envelope)
+
+        payload = dict(envelope, symbols=symbols, matrix=matrix_to_lists(corr, 4))
+        if include_observations:
+            payload['observations'] = matrix_to_lists(observations)
+        return encode(payload, fmt)
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Fields a client may request from /posts/recent; id and posted_at are always
+# returned because cursors and since_id are built from them. preview is the start
+# of content, for feeds that don't need whole posts, and only sent when asked for
+POST_FIELDS = ['id', 'symbol', 'title', 'content', 'preview', 'sentiment_score', 'source',
+               'source_url', 'posted_at', 'created_at']
+DEFAULT_POST_FIELDS = [f for f in POST_FIELDS if f != 'preview']
+POST_PREVIEW_LENGTH = 200
+
+def post_columns(fields):
+    """The Post columns to select for fields"""
+    return [func.substr(Post.content, 1, POST_PREVIEW_LENGTH).label('preview') if f == 'preview'
+            else getattr(Post, f) for f in fields]
+
 @api.route('/posts/recent', methods=['GET'])
 def get_recent_posts():
-    """Get recent posts with sentiment scores"""
+    """
+    Get recent posts with sentiment scores, newest first
+    Supports keyset pagination (cursor=), field projection (fields=)
+    and incremental fetch of posts newer than since_id=, oldest id first
+    """
     try:
-        limit = request.args.get('limit', 50, type=int)
+        limit = clamp_page_size(
+            request.args.get('limit', type=int),
+            Config.POSTS_DEFAULT_PAGE_SIZE,
+            Config.POSTS_MAX_PAGE_SIZE
+        )
         symbol = request.args.get('symbol')
+        cursor = request.args.get('cursor')
+        since_id = request.args.get('since_id', type=int)
+
+        if cursor and since_id is not None:
+            # A since_id poll and a page walk track different positions; mixed, rows get skipped
+            return jsonify({'error': 'cursor and since_id cannot be combined'}), 400
 
-        query = db.session.query(Post).order_by(Post.posted_at.desc())
+        try:
+            fields = parse_fields(request.args.get('fields'), POST_FIELDS,
+                                  always=('id', 'posted_at'), default=DEFAULT_POST_FIELDS)
+            cursor_position = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        query = db.session.query(*post_columns(fields))
 
         if symbol:
             query = query.filter(Post.symbol == symbol.upper())
 
-        posts = query.limit(limit).all()
+        if since_id is not None:
+            query = query.filter(Post.id > since_id)
+
+        if cursor_position:
+            cursor_posted_at, cursor_id = cursor_position
+            query = query.filter(or_(
+                Post.posted_at < cursor_posted_at,
+                and_(Post.posted_at == cursor_posted_at, Post.id < cursor_id)
+            ))
+
+        # A since_id poll goes up in id order, so a burst larger than limit is delivered over
+        # several polls instead of losing its oldest posts; pages go newest first
+        if since_id is not None:
+            query = query.order_by(Post.id.asc())
+        else:
+            query = query.order_by(Post.posted_at.desc(), Post.id.desc())
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        posts = []
+        for row in rows:
+            post = row._asdict()
+            for key in ('posted_at', 'created_at'):
+                if post.get(key) is not None:
+                    post[key] = post[key].isoformat()
+            posts.append(post)
+
+        next_cursor = None
+        if has_more and since_id is None:
+            next_cursor = encode_cursor(rows[-1].posted_at, rows[-1].id)
+
+        # The highest id delivered; with has_more, poll again from it for the rest
+        latest_id = max((row.id for row in rows), default=since_id)
 
         return jsonify({
-            'posts': [p.to_dict() for p in posts]
+            'posts': posts,
+            'next_cursor': next_cursor,
+            'latest_id': latest_id,
+            'has_more': has_more
         })
 
     except Exception as e:
@@ -200,14 +476,35 @@ def get_current_predictions():
 
 @api.route('/data/refresh', methods=['POST'])
 def refresh_data():
-    """Manually trigger data refresh"""
+    """Queue a data refresh of every stock, or of one with {"symbol": ...}; poll /api/jobs/<id> for progress"""
     try:
-        # This would trigger background tasks in a production environment
-        # For now, we'll return a success message
+        data = request.get_json(silent=True) or {}
+        symbol = data.get('symbol')
+        if symbol is not None:
+            symbol = str(symbol).upper()
+            if symbol not in Config.STOCKS:
+                return jsonify({'error': f'Unknown symbol {symbol}'}), 400
+
+        job, created = current_app.extensions['refresh_jobs'].enqueue(symbol)
         return jsonify({
-            'message': 'Data refresh initiated',
+            'message': 'Data refresh queued' if created else 'Data refresh already queued',
+            'deduplicated': not created,
+            'job': job.to_dict(),
             'timestamp': datetime.utcnow().isoformat()
-        })
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of a refresh job"""
+    try:
+        job = current_app.extensions['refresh_jobs'].get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job.to_dict())
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -247,6 +544,34 @@ def get_analytics_summary():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api.route('/changes', methods=['GET'])
+def get_changes():
+    """
+    Tail the change log: changes with an id greater than `after`, oldest first
+    Pass the returned next_offset as `after` to continue
+    """
+    try:
+        after = request.args.get('after', 0, type=int)
+        limit = clamp_page_size(request.args.get('limit', type=int),
+                                Config.CHANGE_LOG_MAX_PAGE_SIZE, Config.CHANGE_LOG_MAX_PAGE_SIZE)
+        tables = [t.strip() for t in request.args.get('tables', '').split(',') if t.strip()]
+
+        unknown = sorted(set(tables) - set(TRACKED_TABLES))
+        if unknown:
+            return jsonify({'error': f"Unknown tables: {', '.join(unknown)}; expected {', '.join(TRACKED_TABLES)}"}), 400
+
+        # Only up to where no change still in flight could show up later with a lower id
+        end = settled_offset(after, Config.CHANGE_FEED_GAP_TIMEOUT)
+        changes = tail(after, tables or None, limit, until=end)
+
+        return json_response({
+            'changes': rows_to_records(CHANGE_COLUMNS, changes),
+            'next_offset': changes[-1].id if len(changes) == limit else end
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Prediction Voting Endpoints
 @api.route('/predictions/<int:prediction_id>/vote', methods=['POST'])
 def vote_on_prediction(prediction_id):
@@ -255,44 +580,34 @@ def vote_on_prediction(prediction_id):
         data = request.get_json()
         vote_type = data.get('vote_type')  # 'agree' or 'disagree'
 
-        if vote_type not in ['agree', 'disagree']:
+        if vote_type not in VOTE_TYPES:
             return jsonify({'error': 'Vote type must be "agree" or "disagree"'}), 400
 
         # Get user IP for anonymous voting
-        user_ip = request.environ.get('HTTP_X_REAL_IP', request.remote_addr)
+        user_ip = client_ip()
 
         # Check if prediction exists
-        prediction = db.session.query(Prediction).filter_by(id=prediction_id).first()
-        if not prediction:
+        exists = db.session.execute(
+            select(Prediction.id).where(Prediction.id == prediction_id)
+        ).scalar()
+        if not exists:
             return jsonify({'error': 'Prediction not found'}), 404
 
-        # Check if user already voted
-        existing_vote = db.session.query(PredictionVote)\
-            .filter_by(prediction_id=prediction_id, user_ip=user_ip)\
-            .first()
-
-        if existing_vote:
-            # Update existing vote
-            existing_vote.vote_type = vote_type
-            message = 'Vote updated successfully'
+        buffer = current_app.extensions.get('vote_buffer')
+        updated = False
+        if buffer is not None:
+            # Write-behind: the vote is flushed with the next batch, tallies include it already
+            buffer.submit(prediction_id, user_ip, vote_type)
         else:
-            # Create new vote
-            new_vote = PredictionVote(
-                prediction_id=prediction_id,
-                user_ip=user_ip,
-                vote_type=vote_type
-            )
-            db.session.add(new_vote)
-            message = 'Vote recorded successfully'
-
-        db.session.commit()
-
-        # Get updated vote counts
-        vote_stats = get_prediction_vote_stats(prediction_id)
+            # Single-statement upsert on (prediction_id, user_ip), no check-then-insert race
+            updated = bool(upsert_votes([{'prediction_id': prediction_id, 'user_ip': user_ip,
+                                          'vote_type': vote_type}]))
+            db.session.commit()
 
         return jsonify({
-            'message': message,
-            'vote_stats': vote_stats
+            'message': vote_message(updated),
+            'queued': buffer is not None,
+            'vote_stats': get_prediction_vote_stats(prediction_id)
         })
 
     except Exception as e:
@@ -313,18 +628,29 @@ def get_prediction_votes(prediction_id):
 def get_predictions_with_votes():
     """Get current predictions with vote statistics"""
     try:
-        predictions = []
         today = date.today()
 
-        for stock in Config.STOCKS:
-            prediction = db.session.query(Prediction)\
-                .filter_by(symbol=stock)\
+        # First prediction per stock, as .first() did
+        current = {}
+        for prediction in db.session.query(Prediction)\
+                .filter(Prediction.symbol.in_(Config.STOCKS))\
                 .filter_by(prediction_date=today)\
-                .first()
+                .order_by(Prediction.id):
+            current.setdefault(prediction.symbol, prediction)
+
+        counts = vote_counts([prediction.id for prediction in current.values()])
+        buffer = current_app.extensions.get('vote_buffer')
 
+        predictions = []
+        for stock in Config.STOCKS:
+            prediction = current.get(stock)
             if prediction:
+                prediction_counts = counts[prediction.id]
+                if buffer is not None:
+                    prediction_counts = apply_pending(prediction.id, prediction_counts,
+                                                      buffer.pending_for(prediction.id))
                 pred_dict = prediction.to_dict()
-                pred_dict['vote_stats'] = get_prediction_vote_stats(prediction.id)
+                pred_dict['vote_stats'] = vote_stats(prediction_counts)
                 predictions.append(pred_dict)
 
         return jsonify({'predictions': predictions})
@@ -333,122 +659,92 @@ def get_predictions_with_votes():
         return jsonify({'error': str(e)}), 500
 
 def get_prediction_vote_stats(prediction_id):
-    """Helper function to get vote statistics for a prediction"""
-    votes = db.session.query(PredictionVote)\
-        .filter_by(prediction_id=prediction_id)\
-        .all()
+    """
+    Helper function to get vote statistics for a prediction
+    Counts come from one aggregate query; with write-behind, queued votes are folded in
+    """
+    counts = vote_counts([prediction_id])[prediction_id]
 
-    agree_count = sum(1 for vote in votes if vote.vote_type == 'agree')
-    disagree_count = sum(1 for vote in votes if vote.vote_type == 'disagree')
-    total_votes = len(votes)
+    buffer = current_app.extensions.get('vote_buffer')
+    if buffer is not None:
+        counts = apply_pending(prediction_id, counts, buffer.pending_for(prediction_id))
 
-    agreement_percentage = (agree_count / total_votes * 100) if total_votes > 0 else 0
-
-    return {
-        'agree_count': agree_count,
-        'disagree_count': disagree_count,
-        'total_votes': total_votes,
-        'agreement_percentage': round(agreement_percentage, 1)
-    }
+    return vote_stats(counts)
 
 # Stock Comparison Endpoints
+COMPARISON_SENTIMENT_COLUMNS = ('date', 'sentiment', 'post_count')
+COMPARISON_PRICE_COLUMNS = ('date', 'close_price', 'volume')
+COMPARISON_ARROW_COLUMNS = ('symbol', 'date', 'sentiment', 'post_count', 'close_price', 'volume')
+
 @api.route('/compare/stocks', methods=['POST'])
 def compare_stocks():
     """Compare sentiment and price data for multiple stocks"""
     try:
+        fmt = negotiate_format()
         data = request.get_json()
-        symbols = data.get('symbols', [])
+        symbols = data.get('symbols') or []
         days = data.get('days', 30)
 
-        if not symbols or len(symbols) < 2:
+        # Upper-case and de-duplicate while keeping the requested order, before
+        # counting, so AAPL,aapl is one stock and not a comparison
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+        if len(symbols) < 2:
             return jsonify({'error': 'At least 2 stocks required for comparison'}), 400
 
-        if len(symbols) > 4:
-            return jsonify({'error': 'Maximum 4 stocks can be compared at once'}), 400
+        if len(symbols) > Config.COMPARE_MAX_SYMBOLS:
+            return jsonify({'error': f'Maximum {Config.COMPARE_MAX_SYMBOLS} stocks can be compared at once'}), 400
 
-        start_date = date.today() - timedelta(days=days)
-        comparison_data = []
-
-        for symbol in symbols:
-            symbol = symbol.upper()
-
-            # Get sentiment data
-            sentiment_data = db.session.query(SentimentSummary)\
-                .filter(SentimentSummary.symbol == symbol)\
-                .filter(SentimentSummary.date >= start_date)\
-                .order_by(SentimentSummary.date)\
-                .all()
-
-            # Get price data
-            price_data = db.session.query(StockPrice)\
-                .filter(StockPrice.symbol == symbol)\
-                .filter(StockPrice.date >= start_date)\
-                .order_by(StockPrice.date)\
-                .all()
-
-            # Get current prediction
-            current_prediction = db.session.query(Prediction)\
-                .filter_by(symbol=symbol)\
-                .filter_by(prediction_date=date.today())\
-                .first()
+        today = date.today()
+        start_date = today - timedelta(days=days)
 
-            # Calculate metrics
-            latest_sentiment = sentiment_data[-1] if sentiment_data else None
-            latest_price = price_data[-1] if price_data else None
-
-            # Calculate price change
-            price_change = 0
-            price_change_percent = 0
-            if len(price_data) >= 2:
-                first_price = price_data[0].close_price
-                last_price = price_data[-1].close_price
-                price_change = last_price - first_price
-                price_change_percent = (price_change / first_price) * 100
-
-            # Calculate average sentiment
-            avg_sentiment = 0
-            if sentiment_data:
-                avg_sentiment = sum(s.avg_sentiment for s in sentiment_data) / len(sentiment_data)
-
-            stock_comparison = {
-                'symbol': symbol,
-                'current_sentiment': latest_sentiment.avg_sentiment if latest_sentiment else 0,
-                'average_sentiment': round(avg_sentiment, 3),
-                'current_price': latest_price.close_price if latest_price else 0,
-                'price_change': round(price_change, 2),
-                'price_change_percent': round(price_change_percent, 2),
-                'total_posts': sum(s.post_count for s in sentiment_data),
-                'prediction': {
-                    'direction': current_prediction.predicted_direction if current_prediction else None,
-                    'confidence': current_prediction.confidence if current_prediction else None
-                },
-                'sentiment_history': [
-                    {
-                        'date': s.date.isoformat(),
-                        'sentiment': s.avg_sentiment,
-                        'post_count': s.post_count
-                    } for s in sentiment_data
-                ],
-                'price_history': [
-                    {
-                        'date': p.date.isoformat(),
-                        'close_price': p.close_price,
-                        'volume': p.volume
-                    } for p in price_data
-                ]
-            }
-
-            comparison_data.append(stock_comparison)
+        cached = comparison_cache.get_or_compute(
+            (tuple(symbols), days, today),
+            lambda: compare_symbols(symbols, start_date, today)
+        )
+        # Shallow copies so formatting below never mutates the cached entries
+        comparison_data = [dict(entry) for entry in cached]
 
-        return jsonify({
-            'comparison_data': comparison_data,
-            'period': f"{start_date.isoformat()} to {date.today().isoformat()}",
+        envelope = {
+            'period': f"{start_date.isoformat()} to {today.isoformat()}",
             'days': days
-        })
+        }
+
+        if fmt == 'arrow':
+            # One long table of (symbol, date) rows; per-symbol metrics ride in the metadata
+            history_rows = []
+            for entry in comparison_data:
+                history_rows.extend(merge_comparison_history(
+                    entry['symbol'], entry.pop('sentiment_history'), entry.pop('price_history')))
+            envelope['comparison_data'] = comparison_data
+            return arrow_response(COMPARISON_ARROW_COLUMNS, history_rows, metadata=envelope)
 
+        to_layout = rows_to_records if fmt == 'json' else rows_to_columns
+        for entry in comparison_data:
+            entry['sentiment_history'] = to_layout(COMPARISON_SENTIMENT_COLUMNS, entry['sentiment_history'])
+            entry['price_history'] = to_layout(COMPARISON_PRICE_COLUMNS, entry['price_history'])
+
+        envelope['comparison_data'] = comparison_data
+        if fmt != 'json':
+            envelope['format'] = 'columnar'
+
+        return encode(envelope, fmt)
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def merge_comparison_history(symbol, sentiment_data, price_data):
+    """Outer-join one symbol's sentiment and price rows on date"""
+    sentiment_dict = {row[0]: row[1:] for row in sentiment_data}
+    price_dict = {row[0]: row[1:] for row in price_data}
+
+    return [
+        (symbol, date_key) + sentiment_dict.get(date_key, (None, None)) + price_dict.get(date_key, (None, None))
+        for date_key in sorted(sentiment_dict.keys() | price_dict.keys())
+    ]
+
 @api.route('/compare/metrics/<symbols>', methods=['GET'])
 def get_comparison_metrics(symbols):
     """Get quick comparison metrics for stocks"""
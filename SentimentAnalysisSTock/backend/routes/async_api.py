@@ -0,0 +1,747 @@
+"""
+Async variant of the API blueprint, served by Quart over ASGI (see backend/asgi.py)
+Routes, parameters and response bodies match backend/routes/api.py. Reads go through
+the SQLAlchemy asyncio engine, and queries that don't depend on each other are issued
+concurrently; pandas-heavy shaping runs in a worker thread so the event loop keeps serving.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from quart import Blueprint, Response, current_app, g, jsonify, request
+from sqlalchemy import select, func, insert, or_, and_
+from backend.models.models import db, Post, StockPrice, SentimentSummary, Prediction, PredictionVote, ChangeLog
+from backend.config.config import Config
+from backend.utils.pagination import encode_cursor, decode_cursor, clamp_page_size, parse_fields
+from backend.utils.serializers import dumps, rows_to_records
+from backend.utils.response_formats import (UnsupportedFormat, select_format, table_body, arrow_body,
+                                            encode_body, rows_to_columns)
+from backend.utils.timeseries import SENTIMENT_COLUMNS, PRICE_COLUMNS, history_query, latest_query
+from backend.utils.downsampling import downsample
+from backend.utils.cache import TTLCache
+from backend.utils.comparison import comparison_queries, first_predictions, build_entries
+from backend.utils.analytics import series_queries, series_frames, fingerprint_queries, analyze_series
+from backend.utils.rate_limit import COST_CLASSES, EXEMPT_ENDPOINTS, Rejected, client_ip, retry_after_header
+from backend.utils.change_log import (CHANGE_COLUMNS, TRACKED_TABLES, tail_query, change_rows, settled_queries,
+                                      settled_from_rows)
+from backend.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from backend.utils.votes import (VOTE_TYPES, upsert_statement, upsert_votes, stamped, updated_keys, vote_message,
+                                 vote_counts_query, counts_from_rows, stored_votes_query, overlay_pending,
+                                 vote_stats)
+from backend.utils.correlation_matrix import KINDS as MATRIX_KINDS, get_correlation_matrix, matrix_to_lists
+from backend.routes.api import (CORRELATION_COLUMNS, CORRELATION_SENTIMENT_COLUMNS, CORRELATION_PRICE_COLUMNS,
+                                POST_FIELDS, DEFAULT_POST_FIELDS, post_columns,
+                                COMPARISON_SENTIMENT_COLUMNS, COMPARISON_PRICE_COLUMNS, COMPARISON_ARROW_COLUMNS,
+                                downsampling_options, join_correlation_rows, merge_comparison_history)
+
+# Named like the sync blueprint so endpoint names (and their rate limit classes) match
+api = Blueprint('api', __name__)
+
+PREDICTION_COLUMNS = ('id', 'symbol', 'prediction_date', 'predicted_direction', 'confidence',
+                      'sentiment_score', 'actual_direction', 'created_at')
+
+def _db():
+    return current_app.extensions['async_db']
+
+def _body(encoded):
+    """Response from a (body, mimetype) pair of the response_formats encoders"""
+    body, mimetype = encoded
+    return Response(body, mimetype=mimetype)
+
+def _json(payload, status=200):
+    """JSON response using the fast encoder, like serializers.json_response"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+def _record(columns, row):
+    """Dict of a Core row with dates as ISO strings, shaped like the models' to_dict"""
+    return {c: v.isoformat() if isinstance(v, (date, datetime)) else v for c, v in zip(columns, row)}
+
+@api.before_request
+async def limit_requests():
+    """Rate limit and shed load before any work is done for the request"""
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+
+    try:
+        g.rate_limit_slots, g.rate_limit_remaining = limiter.admit(
+            client_ip(request), COST_CLASSES.get(request.endpoint, 'default'))
+    except Rejected as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = e.status
+        response.headers['Retry-After'] = retry_after_header(e.retry_after)
+        return response
+
+@api.after_request
+async def add_rate_limit_headers(response):
+    if 'rate_limit_remaining' in g:
+        response.headers['X-RateLimit-Remaining'] = str(int(g.rate_limit_remaining))
+    return response
+
+@api.teardown_request
+async def release_request_slots(exc=None):
+    slots = g.pop('rate_limit_slots', None)
+    if slots:
+        current_app.extensions['rate_limiter'].release(slots)
+
+# Same keys as the sync caches; each server process keeps its own
+comparison_cache = TTLCache(maxsize=Config.COMPARE_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+analytics_cache = TTLCache(maxsize=Config.ANALYTICS_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+history_cache = TTLCache(maxsize=Config.HISTORY_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL)
+
+def invalidate_caches(changes):
+    """Drop cached histories and comparisons of symbols that appear in a batch of changes"""
+    symbols = {c.symbol for c in changes
+               if c.symbol and c.table_name in (StockPrice.__tablename__, SentimentSummary.__tablename__)}
+    if not symbols:
+        return
+    history_cache.invalidate(lambda key: key[1] in symbols)
+    comparison_cache.invalidate(lambda key: not symbols.isdisjoint(key[0]))
+
+async def _cached(cache, key, compute):
+    """TTLCache.get_or_compute for a coroutine function"""
+    sentinel = object()
+    value = cache.get(key, sentinel)
+    if value is sentinel:
+        value = await compute()
+        cache.set(key, value)
+    return value
+
+async def _history_table(kind, symbol, start_date, fetch):
+    """
+    Fetch (columns, rows) for a history endpoint, downsampled when max_points= is given
+    Returns (columns, rows, downsampling info or None)
+    """
+    max_points = request.args.get('max_points', type=int)
+    if not max_points:
+        columns, rows = await fetch()
+        return columns, rows, None
+
+    method, y_column, aggregations = downsampling_options(kind, max_points, request.args.get('method'))
+
+    async def compute():
+        columns, rows = await fetch()
+        sampled = downsample(columns, rows, max_points, method, y_column, aggregations)
+        return columns, sampled, {'method': method, 'max_points': max_points, 'source_points': len(rows)}
+
+    key = (kind, symbol, start_date, date.today(), max_points, method)
+    return await _cached(history_cache, key, compute)
+
+@api.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+
+@api.route('/metrics', methods=['GET'])
+async def get_metrics():
+    """Request latency, status and SQL statement metrics in the Prometheus text format"""
+    metrics = current_app.extensions.get('metrics')
+    if metrics is None:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@api.route('/stocks', methods=['GET'])
+async def get_stocks():
+    """Get list of tracked stocks"""
+    return jsonify({'stocks': Config.STOCKS})
+
+@api.route('/sentiment/current', methods=['GET'])
+async def get_current_sentiment():
+    """Get current sentiment scores for all stocks"""
+    try:
+        rows = await _db().all(latest_query(SentimentSummary, SENTIMENT_COLUMNS, Config.STOCKS))
+        latest = {row.symbol: _record(SENTIMENT_COLUMNS, row) for row in rows}
+
+        latest_sentiments = [
+            latest.get(stock) or {
+                'symbol': stock,
+                'avg_sentiment': 0.0,
+                'post_count': 0,
+                'date': date.today().isoformat()
+            }
+            for stock in Config.STOCKS
+        ]
+        return jsonify({'sentiment_data': latest_sentiments})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+async def _history_response(kind, model, columns, symbol):
+    """Shared body of the sentiment and price history endpoints"""
+    try:
+        fmt = select_format(request.args.get('format'), request.accept_mimetypes)
+        days = request.args.get('days', 30, type=int)
+        start_date = date.today() - timedelta(days=days)
+        symbol = symbol.upper()
+
+        async def fetch():
+            return columns, await _db().all(history_query(model, columns, symbol, start_date))
+
+        columns, rows, downsampled = await _history_table(kind, symbol, start_date, fetch)
+
+        envelope = {'symbol': symbol}
+        if downsampled:
+            envelope['downsampled'] = downsampled
+
+        return _body(table_body(envelope, 'history', columns, rows, fmt))
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/sentiment/history/<symbol>', methods=['GET'])
+async def get_sentiment_history(symbol):
+    """Get sentiment history for a specific stock"""
+    return await _history_response('sentiment', SentimentSummary, SENTIMENT_COLUMNS, symbol)
+
+@api.route('/prices/current', methods=['GET'])
+async def get_current_prices():
+    """Get current stock prices from database (most recent)"""
+    try:
+        rows = await _db().all(latest_query(StockPrice, ('symbol', 'date', 'close_price'), Config.STOCKS))
+        latest = {row.symbol: row for row in rows}
+
+        current_prices = [
+            {
+                'symbol': stock,
+                'current_price': latest[stock].close_price,
+                'timestamp': datetime.utcnow().isoformat(),
+                'date': latest[stock].date.isoformat()
+            }
+            for stock in Config.STOCKS if stock in latest
+        ]
+        return jsonify({'prices': current_prices})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/prices/history/<symbol>', methods=['GET'])
+async def get_price_history(symbol):
+    """Get price history for a specific stock"""
+    return await _history_response('prices', StockPrice, PRICE_COLUMNS, symbol)
+
+@api.route('/correlation/<symbol>', methods=['GET'])
+async def get_correlation_data(symbol):
+    """Get correlation data between sentiment and price for a stock"""
+    try:
+        fmt = select_format(request.args.get('format'), request.accept_mimetypes)
+        days = request.args.get('days', 30, type=int)
+        start_date = date.today() - timedelta(days=days)
+        symbol = symbol.upper()
+
+        async def fetch():
+            sentiment_data, price_data = await _db().gather(
+                history_query(SentimentSummary, CORRELATION_SENTIMENT_COLUMNS, symbol, start_date),
+                history_query(StockPrice, CORRELATION_PRICE_COLUMNS, symbol, start_date))
+            return CORRELATION_COLUMNS, join_correlation_rows(sentiment_data, price_data)
+
+        columns, correlation_rows, downsampled = await _history_table('correlation', symbol, start_date, fetch)
+
+        envelope = {'symbol': symbol}
+        if downsampled:
+            envelope['downsampled'] = downsampled
+
+        return _body(table_body(envelope, 'correlation_data', columns, correlation_rows, fmt))
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/analytics/correlation/<symbol>', methods=['GET'])
+async def get_correlation_analytics(symbol):
+    """
+    Get sentiment vs return statistics for a stock: Pearson/Spearman correlation,
+    rolling-window correlation and lagged cross-correlation (sentiment leading price)
+    """
+    try:
+        symbol = symbol.upper()
+        days = request.args.get('days', 90, type=int)
+        window = request.args.get('window', Config.ANALYTICS_DEFAULT_WINDOW, type=int)
+        max_lag = request.args.get('max_lag', Config.ANALYTICS_MAX_LAG, type=int)
+
+        if window < 3:
+            return jsonify({'error': 'window must be at least 3'}), 400
+        if not 0 <= max_lag <= Config.ANALYTICS_MAX_LAG:
+            return jsonify({'error': f'max_lag must be between 0 and {Config.ANALYTICS_MAX_LAG}'}), 400
+
+        today = date.today()
+        start_date = today - timedelta(days=days)
+
+        sentiment_fingerprint, price_fingerprint = await _db().gather(*fingerprint_queries(symbol, start_date))
+        fingerprint = tuple(sentiment_fingerprint[0]) + tuple(price_fingerprint[0])
+
+        async def compute():
+            sentiment, prices = series_frames(*await _db().gather(*series_queries(symbol, start_date)))
+            return await asyncio.to_thread(analyze_series, symbol, sentiment, prices, window, max_lag,
+                                           Config.ANALYTICS_ASOF_TOLERANCE_DAYS)
+
+        report = await _cached(analytics_cache, (symbol, window, days, max_lag, today, fingerprint), compute)
+
+        return _json(dict(report, period=f"{start_date.isoformat()} to {today.isoformat()}"))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _select_matrix(sync_app, kind, days, symbols):
+    """Refresh and slice the shared correlation matrix; runs in a worker thread"""
+    # The incremental matrix reads through the sync session, so it keeps using it here
+    with sync_app.app_context():
+        matrix = get_correlation_matrix(Config.STOCKS, days,
+                                        Config.CORRELATION_MATRIX_MIN_OBSERVATIONS,
+                                        Config.CORRELATION_MATRIX_REFRESH_SECONDS,
+                                        Config.CORRELATION_MATRIX_CACHE_SIZE)
+        with matrix.lock:
+            return matrix.select(kind, symbols)
+
+@api.route('/correlation/matrix', methods=['GET'])
+async def get_correlation_matrix_view():
+    """
+    Get an N x N correlation matrix across the tracked stocks
+    kind: sentiment (sentiment vs sentiment), returns (return vs return) or
+    sentiment_next_return (row symbol's sentiment vs column symbol's next-session return)
+    """
+    try:
+        fmt = select_format(request.args.get('format'), request.accept_mimetypes)
+        kind = request.args.get('kind', 'sentiment')
+        days = request.args.get('days', 90, type=int)
+        subset = request.args.get('symbols')
+        include_observations = request.args.get('observations', 'false').lower() in ('1', 'true', 'yes')
+
+        if kind not in MATRIX_KINDS:
+            return jsonify({'error': f"Unknown kind '{kind}', expected one of: {', '.join(MATRIX_KINDS)}"}), 400
+        if not 2 <= days <= Config.CORRELATION_MATRIX_MAX_DAYS:
+            return jsonify({'error': f'days must be between 2 and {Config.CORRELATION_MATRIX_MAX_DAYS}'}), 400
+
+        requested = [s.strip().upper() for s in subset.split(',') if s.strip()] if subset else None
+        symbols, corr, observations = await asyncio.to_thread(
+            _select_matrix, current_app.extensions['sync_app'], kind, days, requested)
+
+        envelope = {'kind': kind, 'days': days}
+
+        if fmt == 'arrow':
+            columns = ('symbol', *symbols)
+            rows = [(symbol, *row) for symbol, row in zip(symbols, matrix_to_lists(corr, 4))]
+            return _body(arrow_body(columns, rows, metadata=envelope))
+
+        payload = dict(envelope, symbols=symbols, matrix=matrix_to_lists(corr, 4))
+        if include_observations:
+            payload['observations'] = matrix_to_lists(observations)
+        return _body(encode_body(payload, fmt))
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/posts/recent', methods=['GET'])
+async def get_recent_posts():
+    """
+    Get recent posts with sentiment scores, newest first
+    Supports keyset pagination (cursor=), field projection (fields=)
+    and incremental fetch of posts newer than since_id=, oldest id first
+    """
+    try:
+        limit = clamp_page_size(
+            request.args.get('limit', type=int),
+            Config.POSTS_DEFAULT_PAGE_SIZE,
+            Config.POSTS_MAX_PAGE_SIZE
+        )
+        symbol = request.args.get('symbol')
+        cursor = request.args.get('cursor')
+        since_id = request.args.get('since_id', type=int)
+
+        if cursor and since_id is not None:
+            # A since_id poll and a page walk track different positions; mixed, rows get skipped
+            return jsonify({'error': 'cursor and since_id cannot be combined'}), 400
+
+        try:
+            fields = parse_fields(request.args.get('fields'), POST_FIELDS,
+                                  always=('id', 'posted_at'), default=DEFAULT_POST_FIELDS)
+            cursor_position = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        stmt = select(*post_columns(fields))
+
+        if symbol:
+            stmt = stmt.where(Post.symbol == symbol.upper())
+
+        if since_id is not None:
+            stmt = stmt.where(Post.id > since_id)
+
+        if cursor_position:
+            cursor_posted_at, cursor_id = cursor_position
+            stmt = stmt.where(or_(
+                Post.posted_at < cursor_posted_at,
+                and_(Post.posted_at == cursor_posted_at, Post.id < cursor_id)
+            ))
+
+        # A since_id poll goes up in id order, so a burst larger than limit is delivered over
+        # several polls instead of losing its oldest posts; pages go newest first
+        if since_id is not None:
+            stmt = stmt.order_by(Post.id.asc())
+        else:
+            stmt = stmt.order_by(Post.posted_at.desc(), Post.id.desc())
+
+        # Fetch one extra row to know whether another page exists
+        rows = await _db().all(stmt.limit(limit + 1))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        posts = []
+        for row in rows:
+            post = row._asdict()
+            for key in ('posted_at', 'created_at'):
+                if post.get(key) is not None:
+                    post[key] = post[key].isoformat()
+            posts.append(post)
+
+        next_cursor = None
+        if has_more and since_id is None:
+            next_cursor = encode_cursor(rows[-1].posted_at, rows[-1].id)
+
+        # The highest id delivered; with has_more, poll again from it for the rest
+        latest_id = max((row.id for row in rows), default=since_id)
+
+        return jsonify({
+            'posts': posts,
+            'next_cursor': next_cursor,
+            'latest_id': latest_id,
+            'has_more': has_more
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+async def _current_predictions():
+    """{symbol: prediction row} of today's first prediction per tracked stock"""
+    rows = await _db().all(
+        select(*[getattr(Prediction, c) for c in PREDICTION_COLUMNS])
+        .where(Prediction.symbol.in_(Config.STOCKS))
+        .where(Prediction.prediction_date == date.today())
+        .order_by(Prediction.id)
+    )
+    current = {}
+    for row in rows:
+        current.setdefault(row.symbol, row)
+    return current
+
+@api.route('/predictions/current', methods=['GET'])
+async def get_current_predictions():
+    """Get current predictions for all stocks"""
+    try:
+        current = await _current_predictions()
+        predictions = [_record(PREDICTION_COLUMNS, current[stock]) for stock in Config.STOCKS if stock in current]
+        return jsonify({'predictions': predictions})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _enqueue_refresh(sync_app, symbol):
+    """Queue a refresh job; runs in a worker thread"""
+    # Jobs are recorded and run through the sync session, shared with the WSGI app
+    with sync_app.app_context():
+        job, created = sync_app.extensions['refresh_jobs'].enqueue(symbol)
+        return job.to_dict(), created
+
+def _job_status(sync_app, job_id):
+    """A refresh job as a dict, or None; runs in a worker thread"""
+    with sync_app.app_context():
+        job = sync_app.extensions['refresh_jobs'].get(job_id)
+        return job.to_dict() if job is not None else None
+
+@api.route('/data/refresh', methods=['POST'])
+async def refresh_data():
+    """Queue a data refresh of every stock, or of one with {"symbol": ...}; poll /api/jobs/<id> for progress"""
+    try:
+        data = await request.get_json(silent=True) or {}
+        symbol = data.get('symbol')
+        if symbol is not None:
+            symbol = str(symbol).upper()
+            if symbol not in Config.STOCKS:
+                return jsonify({'error': f'Unknown symbol {symbol}'}), 400
+
+        job, created = await asyncio.to_thread(_enqueue_refresh, current_app.extensions['sync_app'], symbol)
+        return jsonify({
+            'message': 'Data refresh queued' if created else 'Data refresh already queued',
+            'deduplicated': not created,
+            'job': job,
+            'timestamp': datetime.utcnow().isoformat()
+        }), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/jobs/<int:job_id>', methods=['GET'])
+async def get_job(job_id):
+    """Status and progress of a refresh job"""
+    try:
+        job = await asyncio.to_thread(_job_status, current_app.extensions['sync_app'], job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/analytics/summary', methods=['GET'])
+async def get_analytics_summary():
+    """Get analytics summary across all stocks"""
+    try:
+        today = date.today()
+        week_ago = today - timedelta(days=7)
+
+        total_posts, avg_sentiments = await _db().gather(
+            select(func.count(Post.id)).where(Post.posted_at >= week_ago),
+            select(SentimentSummary.symbol, func.avg(SentimentSummary.avg_sentiment).label('avg_sentiment'))
+            .where(SentimentSummary.date >= week_ago)
+            .group_by(SentimentSummary.symbol)
+        )
+
+        return jsonify({
+            'total_posts_7d': total_posts[0][0],
+            'average_sentiments': [
+                {'symbol': s.symbol, 'avg_sentiment': float(s.avg_sentiment)}
+                for s in avg_sentiments
+            ],
+            'period': f"{week_ago.isoformat()} to {today.isoformat()}"
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+async def settled_offset(async_db, offset):
+    """change_log.settled_offset on the async engine"""
+    first_query, rows_query = settled_queries(offset)
+    first_id, rows = await async_db.gather(first_query, rows_query)
+    return settled_from_rows(offset, first_id[0][0], rows, Config.CHANGE_FEED_GAP_TIMEOUT)
+
+@api.route('/changes', methods=['GET'])
+async def get_changes():
+    """
+    Tail the change log: changes with an id greater than `after`, oldest first
+    Pass the returned next_offset as `after` to continue
+    """
+    try:
+        after = request.args.get('after', 0, type=int)
+        limit = clamp_page_size(request.args.get('limit', type=int),
+                                Config.CHANGE_LOG_MAX_PAGE_SIZE, Config.CHANGE_LOG_MAX_PAGE_SIZE)
+        tables = [t.strip() for t in request.args.get('tables', '').split(',') if t.strip()]
+
+        unknown = sorted(set(tables) - set(TRACKED_TABLES))
+        if unknown:
+            return jsonify({'error': f"Unknown tables: {', '.join(unknown)}; expected {', '.join(TRACKED_TABLES)}"}), 400
+
+        end = await settled_offset(_db(), after)
+        changes = await _db().all(tail_query(after, tables or None, limit, until=end))
+
+        return _json({
+            'changes': rows_to_records(CHANGE_COLUMNS, changes),
+            'next_offset': changes[-1].id if len(changes) == limit else end
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+async def _with_pending(prediction_id, counts):
+    """With write-behind, fold queued votes into stored counts"""
+    buffer = current_app.extensions.get('vote_buffer')
+    pending = buffer.pending_for(prediction_id) if buffer is not None else None
+    if not pending:
+        return counts
+    stored = await _db().all(stored_votes_query(prediction_id, pending))
+    return overlay_pending(counts, stored, pending)
+
+async def get_prediction_vote_stats(prediction_id):
+    """Vote statistics for a prediction, including queued votes"""
+    rows = await _db().all(vote_counts_query([prediction_id]))
+    counts = counts_from_rows([prediction_id], rows)[prediction_id]
+    return vote_stats(await _with_pending(prediction_id, counts))
+
+def _store_vote(sync_app, vote):
+    """Upsert a vote through the sync session; runs in a worker thread. Whether it replaced one"""
+    with sync_app.app_context():
+        updated = bool(upsert_votes([vote]))
+        db.session.commit()
+        return updated
+
+@api.route('/predictions/<int:prediction_id>/vote', methods=['POST'])
+async def vote_on_prediction(prediction_id):
+    """Vote on a prediction (agree/disagree)"""
+    try:
+        data = await request.get_json()
+        vote_type = data.get('vote_type')  # 'agree' or 'disagree'
+
+        if vote_type not in VOTE_TYPES:
+            return jsonify({'error': 'Vote type must be "agree" or "disagree"'}), 400
+
+        user_ip = client_ip(request)
+
+        exists = await _db().scalar(select(Prediction.id).where(Prediction.id == prediction_id))
+        if not exists:
+            return jsonify({'error': 'Prediction not found'}), 404
+
+        buffer = current_app.extensions.get('vote_buffer')
+        updated = False
+        vote = {'prediction_id': prediction_id, 'user_ip': user_ip, 'vote_type': vote_type}
+        stmt = upsert_statement(_db().dialect)
+        if buffer is not None:
+            buffer.submit(prediction_id, user_ip, vote_type)
+        elif stmt is None:
+            # No upsert on this dialect; the sync session does the select-then-update
+            updated = await asyncio.to_thread(_store_vote, current_app.extensions['sync_app'], vote)
+        else:
+            votes, stamp = stamped([vote])
+            async with _db().begin() as conn:
+                rows = (await conn.execute(stmt, votes)).all()
+                await conn.execute(insert(ChangeLog), change_rows(PredictionVote.__tablename__,
+                                                                  [row.id for row in rows], 'upsert'))
+            updated = bool(updated_keys(rows, stamp))
+
+        return jsonify({
+            'message': vote_message(updated),
+            'queued': buffer is not None,
+            'vote_stats': await get_prediction_vote_stats(prediction_id)
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/predictions/<int:prediction_id>/votes', methods=['GET'])
+async def get_prediction_votes(prediction_id):
+    """Get vote statistics for a prediction"""
+    try:
+        return jsonify(await get_prediction_vote_stats(prediction_id))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/predictions/current/with-votes', methods=['GET'])
+async def get_predictions_with_votes():
+    """Get current predictions with vote statistics"""
+    try:
+        current = await _current_predictions()
+        ids = [row.id for row in current.values()]
+        counts = counts_from_rows(ids, await _db().all(vote_counts_query(ids))) if ids else {}
+
+        ordered = [current[stock] for stock in Config.STOCKS if stock in current]
+        adjusted = await asyncio.gather(*(_with_pending(row.id, counts[row.id]) for row in ordered))
+
+        predictions = []
+        for row, prediction_counts in zip(ordered, adjusted):
+            pred_dict = _record(PREDICTION_COLUMNS, row)
+            pred_dict['vote_stats'] = vote_stats(prediction_counts)
+            predictions.append(pred_dict)
+
+        return jsonify({'predictions': predictions})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/compare/stocks', methods=['POST'])
+async def compare_stocks():
+    """Compare sentiment and price data for multiple stocks"""
+    try:
+        fmt = select_format(request.args.get('format'), request.accept_mimetypes)
+        data = await request.get_json()
+        symbols = data.get('symbols') or []
+        days = data.get('days', 30)
+
+        # Upper-case and de-duplicate while keeping the requested order, before
+        # counting, so AAPL,aapl is one stock and not a comparison
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+        if len(symbols) < 2:
+            return jsonify({'error': 'At least 2 stocks required for comparison'}), 400
+
+        if len(symbols) > Config.COMPARE_MAX_SYMBOLS:
+            return jsonify({'error': f'Maximum {Config.COMPARE_MAX_SYMBOLS} stocks can be compared at once'}), 400
+
+        today = date.today()
+        start_date = today - timedelta(days=days)
+
+        async def compute():
+            # Sentiment, prices and predictions don't depend on each other
+            sentiment, prices, predictions = await _db().gather(*comparison_queries(symbols, start_date, today))
+            return await asyncio.to_thread(build_entries, symbols, sentiment, prices,
+                                           first_predictions(predictions))
+
+        cached = await _cached(comparison_cache, (tuple(symbols), days, today), compute)
+        comparison_data = [dict(entry) for entry in cached]
+
+        envelope = {
+            'period': f"{start_date.isoformat()} to {today.isoformat()}",
+            'days': days
+        }
+
+        if fmt == 'arrow':
+            history_rows = []
+            for entry in comparison_data:
+                history_rows.extend(merge_comparison_history(
+                    entry['symbol'], entry.pop('sentiment_history'), entry.pop('price_history')))
+            envelope['comparison_data'] = comparison_data
+            return _body(arrow_body(COMPARISON_ARROW_COLUMNS, history_rows, metadata=envelope))
+
+        to_layout = rows_to_records if fmt == 'json' else rows_to_columns
+        for entry in comparison_data:
+            entry['sentiment_history'] = to_layout(COMPARISON_SENTIMENT_COLUMNS, entry['sentiment_history'])
+            entry['price_history'] = to_layout(COMPARISON_PRICE_COLUMNS, entry['price_history'])
+
+        envelope['comparison_data'] = comparison_data
+        if fmt != 'json':
+            envelope['format'] = 'columnar'
+
+        return _body(encode_body(envelope, fmt))
+
+    except UnsupportedFormat as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/compare/metrics/<symbols>', methods=['GET'])
+async def get_comparison_metrics(symbols):
+    """Get quick comparison metrics for stocks"""
+    try:
+        symbol_list = symbols.upper().split(',')
+        if len(symbol_list) < 2:
+            return jsonify({'error': 'At least 2 stocks required'}), 400
+
+        today = date.today()
+        sentiment_rows, price_rows, prediction_rows = await _db().gather(
+            latest_query(SentimentSummary, ('symbol', 'date', 'avg_sentiment', 'post_count'), symbol_list),
+            latest_query(StockPrice, ('symbol', 'close_price'), symbol_list),
+            select(Prediction.symbol, Prediction.predicted_direction, Prediction.confidence)
+            .where(Prediction.symbol.in_(symbol_list))
+            .where(Prediction.prediction_date == today)
+            .order_by(Prediction.id)
+        )
+        sentiments = {row.symbol: row for row in sentiment_rows}
+        prices = {row.symbol: row.close_price for row in price_rows}
+        predictions = first_predictions(prediction_rows)
+
+        metrics = []
+        for symbol in symbol_list:
+            latest_sentiment = sentiments.get(symbol)
+            direction, confidence = predictions.get(symbol, (None, None))
+            metrics.append({
+                'symbol': symbol,
+                'sentiment_score': latest_sentiment.avg_sentiment if latest_sentiment else 0,
+                'post_count': latest_sentiment.post_count if latest_sentiment else 0,
+                'current_price': prices.get(symbol, 0),
+                'prediction_direction': direction,
+                'prediction_confidence': confidence,
+                'last_updated': latest_sentiment.date.isoformat() if latest_sentiment else None
+            })
+
+        return jsonify({'metrics': metrics})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,170 @@
+"""
+Sentiment vs price correlation analytics
+Sentiment is aligned to trading days with an as-of join, so weekend and holiday
+sentiment carries into the next session instead of being dropped
+"""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func
+from backend.models.models import db, StockPrice, SentimentSummary
+
+SENTIMENT_SERIES_COLUMNS = ['date', 'sentiment', 'post_count']
+PRICE_SERIES_COLUMNS = ['date', 'close_price']
+
+def series_queries(symbol, start_date):
+    """Queries for one symbol's daily sentiment and close prices, oldest first"""
+    sentiment = select(SentimentSummary.date, SentimentSummary.avg_sentiment, SentimentSummary.post_count)\
+        .where(SentimentSummary.symbol == symbol)\
+        .where(SentimentSummary.date >= start_date)\
+        .order_by(SentimentSummary.date)
+    prices = select(StockPrice.date, StockPrice.close_price)\
+        .where(StockPrice.symbol == symbol)\
+        .where(StockPrice.date >= start_date)\
+        .order_by(StockPrice.date)
+    return sentiment, prices
+
+def series_frames(sentiment_rows, price_rows):
+    """DataFrames from the rows of series_queries"""
+    return (pd.DataFrame(sentiment_rows, columns=SENTIMENT_SERIES_COLUMNS),
+            pd.DataFrame(price_rows, columns=PRICE_SERIES_COLUMNS))
+
+def load_series(symbol, start_date):
+    """Load one symbol's daily sentiment and close prices as DataFrames sorted by date"""
+    sentiment, prices = series_queries(symbol, start_date)
+    return series_frames(db.session.execute(sentiment).all(), db.session.execute(prices).all())
+
+def fingerprint_queries(symbol, start_date):
+    """Aggregate queries whose results change whenever a symbol's rows are added or updated"""
+    sentiment = select(func.count(), func.max(SentimentSummary.id),
+                       func.coalesce(func.sum(SentimentSummary.avg_sentiment), 0),
+                       func.coalesce(func.sum(SentimentSummary.post_count), 0))\
+        .where(SentimentSummary.symbol == symbol)\
+        .where(SentimentSummary.date >= start_date)
+    prices = select(func.count(), func.max(StockPrice.id),
+                    func.coalesce(func.sum(StockPrice.close_price), 0))\
+        .where(StockPrice.symbol == symbol)\
+        .where(StockPrice.date >= start_date)
+    return sentiment, prices
+
+def data_fingerprint(symbol, start_date):
+    """
+    Cheap aggregate over a symbol's rows that changes whenever rows are added or updated
+    Used as part of the cache key so results are recomputed only when new data lands
+    """
+    sentiment, prices = fingerprint_queries(symbol, start_date)
+    return tuple(db.session.execute(sentiment).one()) + tuple(db.session.execute(prices).one())
+
+def asof_align(sentiment, prices, tolerance_days):
+    """
+    Attach to every trading day the latest sentiment at or before it
+    Sentiment older than tolerance_days is treated as missing
+    """
+    if prices.empty:
+        return pd.DataFrame(columns=['date', 'close_price', 'return', 'sentiment', 'post_count'])
+
+    trading = prices.copy()
+    trading['date'] = pd.to_datetime(trading['date'])
+    trading['return'] = trading['close_price'].pct_change(fill_method=None)
+
+    if sentiment.empty:
+        trading['sentiment'] = np.nan
+        trading['post_count'] = np.nan
+        return trading
+
+    daily = sentiment.copy()
+    daily['date'] = pd.to_datetime(daily['date'])
+
+    return pd.merge_asof(trading, daily, on='date', direction='backward',
+                         tolerance=pd.Timedelta(days=tolerance_days))
+
+def _pearson(x, y):
+    """Pearson correlation over pairs where both values are present"""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    if mask.sum() < 3:
+        return None
+    x, y = x[mask], y[mask]
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denominator) if denominator else None
+
+def _spearman(x, y):
+    """Spearman rank correlation over pairs where both values are present"""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    if mask.sum() < 3:
+        return None
+    ranked_x = pd.Series(x[mask]).rank().to_numpy()
+    ranked_y = pd.Series(y[mask]).rank().to_numpy()
+    return _pearson(ranked_x, ranked_y)
+
+def lagged_correlations(sentiment, returns, max_lag):
+    """
+    Correlation of sentiment on day t with the return on day t + lag, for lag 0..max_lag
+    All lags are computed in one pass over a (days x lags) matrix of shifted returns
+    """
+    n = len(returns)
+    lags = np.arange(max_lag + 1)
+
+    # shifted[t, k] = returns[t + k], NaN past the end
+    index = np.arange(n)[:, None] + lags[None, :]
+    padded = np.append(returns, np.full(max_lag + 1, np.nan))
+    shifted = padded[index]
+
+    x = np.broadcast_to(sentiment[:, None], shifted.shape)
+    mask = ~(np.isnan(x) | np.isnan(shifted))
+    counts = mask.sum(axis=0)
+
+    xm = np.where(mask, x, 0.0)
+    ym = np.where(mask, shifted, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = xm.sum(axis=0) / counts
+        mean_y = ym.sum(axis=0) / counts
+        dx = np.where(mask, x - mean_x, 0.0)
+        dy = np.where(mask, shifted - mean_y, 0.0)
+        corr = (dx * dy).sum(axis=0) / np.sqrt((dx * dx).sum(axis=0) * (dy * dy).sum(axis=0))
+
+    return [
+        {
+            'lag': int(lag),
+            'correlation': None if count < 3 or not np.isfinite(value) else round(float(value), 4),
+            'observations': int(count)
+        }
+        for lag, value, count in zip(lags, corr, counts)
+    ]
+
+def correlation_report(symbol, start_date, window, max_lag, tolerance_days):
+    """Full correlation analytics for one symbol from start_date onwards"""
+    sentiment, prices = load_series(symbol, start_date)
+    return analyze_series(symbol, sentiment, prices, window, max_lag, tolerance_days)
+
+def analyze_series(symbol, sentiment, prices, window, max_lag, tolerance_days):
+    """Correlation analytics from already-loaded series (see load_series)"""
+    aligned = asof_align(sentiment, prices, tolerance_days)
+
+    x = aligned['sentiment'].to_numpy(dtype=np.float64)
+    y = aligned['return'].to_numpy(dtype=np.float64)
+
+    pearson = _pearson(x, y)
+    spearman = _spearman(x, y)
+
+    rolling = aligned['sentiment'].astype(np.float64)\
+        .rolling(window, min_periods=window)\
+        .corr(aligned['return'].astype(np.float64))
+
+    rolling_records = [
+        {'date': day.date(), 'correlation': round(float(value), 4)}
+        for day, value in zip(aligned['date'], rolling)
+        if np.isfinite(value)
+    ]
+
+    return {
+        'symbol': symbol,
+        'trading_days': int(len(aligned)),
+        'observations': int((~(np.isnan(x) | np.isnan(y))).sum()),
+        'window': window,
+        'pearson': None if pearson is None else round(pearson, 4),
+        'spearman': None if spearman is None else round(spearman, 4),
+        'lagged': lagged_correlations(x, y, max_lag),
+        'rolling': rolling_records
+    }
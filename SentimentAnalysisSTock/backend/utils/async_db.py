@@ -0,0 +1,57 @@
+"""
+SQLAlchemy asyncio access for the async API
+The async engine points at the same database as the sync one, with the driver swapped
+for an async one (aiosqlite for SQLite, asyncpg for PostgreSQL). Every read checks out
+its own pooled connection, so independent queries run concurrently under gather().
+"""
+
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+def async_url(url):
+    """The async-driver equivalent of a sync SQLAlchemy URL"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}, expected one of: {', '.join(ASYNC_DRIVERS)}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+class AsyncDatabase:
+    """Thin wrapper over an AsyncEngine for one-statement reads and short write transactions"""
+
+    def __init__(self, url, **engine_options):
+        self.engine = create_async_engine(async_url(url), **engine_options)
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    async def all(self, stmt):
+        """All rows of a statement"""
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).all()
+
+    async def one(self, stmt):
+        """The single row of a statement"""
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).one()
+
+    async def scalar(self, stmt):
+        """The first column of the first row, or None"""
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).scalar()
+
+    async def gather(self, *stmts):
+        """Run independent statements concurrently; returns their rows in order"""
+        return await asyncio.gather(*(self.all(stmt) for stmt in stmts))
+
+    def begin(self):
+        """A connection in a transaction that commits on exit (async with db.begin() as conn)"""
+        return self.engine.begin()
+
+    async def dispose(self):
+        await self.engine.dispose()
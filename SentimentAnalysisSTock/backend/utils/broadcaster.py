@@ -0,0 +1,213 @@
+"""
+Real-time push of sentiment, price and post changes over Socket.IO
+The broadcaster follows the change log and emits only what changed, each event to the
+room of its symbol, so a client only hears about the stocks it subscribed to. It runs
+either inside the web server as a periodic poller, or inside the pipeline scripts after
+they commit (delivered through the Socket.IO message queue).
+
+Through a shared message queue every emit reaches every worker's clients, so there only
+the process holding the 'broadcaster' lease emits: one web worker's poller holds it for as
+long as it runs, and a script publishing its own commits emits only when no poller does.
+The others still follow the log and hand changes to their listeners (cache invalidation).
+"""
+
+import os
+import threading
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from backend.models.models import db, Post, StockPrice, SentimentSummary, JobLease
+from backend.utils.change_log import GAP_TIMEOUT, latest_offset, settled_offset, tail
+from backend.utils.scheduler import Lease
+from backend.utils.timeseries import latest_query
+
+ROOM_PREFIX = 'symbol:'
+
+def room_for(symbol):
+    """Socket.IO room that receives updates for one symbol"""
+    return f'{ROOM_PREFIX}{symbol}'
+
+def latest_sentiment(symbols):
+    """{symbol: (date, avg_sentiment, post_count)} for each symbol's most recent summary"""
+    rows = db.session.execute(latest_query(
+        SentimentSummary, ('symbol', 'date', 'avg_sentiment', 'post_count'), symbols))
+    return {row.symbol: tuple(row[1:]) for row in rows}
+
+def latest_prices(symbols):
+    """{symbol: (date, close_price)} for each symbol's most recent price"""
+    rows = db.session.execute(latest_query(StockPrice, ('symbol', 'date', 'close_price'), symbols))
+    return {row.symbol: tuple(row[1:]) for row in rows}
+
+PUBLISHED_TABLES = (Post.__tablename__, StockPrice.__tablename__, SentimentSummary.__tablename__)
+
+LEASE_NAME = 'broadcaster'
+
+class Broadcaster:
+    """
+    Tails the change log and emits compact per-symbol deltas
+    Only symbols that appear in new changes are re-read, so the work per publish is
+    proportional to what changed. Listeners added with add_listener() receive each
+    batch of changes too (e.g. to invalidate caches). With exclusive set (a message queue
+    shared with other processes) it only emits while holding the broadcaster lease.
+    """
+
+    def __init__(self, socketio, symbols, max_posts=50, max_changes=10000, exclusive=False, lease_ttl=90,
+                 gap_timeout=GAP_TIMEOUT):
+        self.socketio = socketio
+        self.symbols = list(symbols)
+        self.max_posts = max_posts
+        self.max_changes = max_changes
+        self.listeners = []
+        self.exclusive = exclusive
+        self.lease_ttl = lease_ttl
+        self.gap_timeout = gap_timeout
+        self._offset = None
+        self._sentiment = {}
+        self._prices = {}
+        self._lock = threading.Lock()
+        self._poller_pid = None
+        self._lease = None
+
+    def add_listener(self, listener):
+        """Call listener(changes) with every batch of changes this broadcaster handles"""
+        self.listeners.append(listener)
+
+    def snapshot(self):
+        """Start from the current end of the change log, without emitting"""
+        with self._lock:
+            self._offset = latest_offset()
+
+    def follow(self):
+        """Snapshot, unless this broadcaster already follows the log (e.g. it is polling)"""
+        if self._offset is None:
+            self.snapshot()
+
+    def _polling_here(self):
+        return self._poller_pid == os.getpid()
+
+    def _take_lease(self):
+        """Whether this process may emit; call inside an app context"""
+        if not self.exclusive:
+            return True
+        # Leases are per process, and so must be recreated after a fork
+        if self._lease is None or not self._lease.owner.endswith(f':{os.getpid()}'):
+            JobLease.__table__.create(db.engine, checkfirst=True)
+            self._lease = Lease(LEASE_NAME, self.lease_ttl)
+        try:
+            return self._lease.acquire()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Could not take the broadcaster lease: {e}")
+            return False
+
+    def publish(self):
+        """
+        Emit deltas for every change since the last snapshot/publish; returns counts per event.
+        Listeners get the changes even when another process holds the lease and emits them
+        """
+        counts = {'sentiment_update': 0, 'price_update': 0, 'new_post': 0}
+        if self._offset is None:
+            self.snapshot()
+            return counts
+
+        emitting = self._take_lease()
+        try:
+            return self._publish(counts, emitting)
+        finally:
+            # A poller keeps the lease while it runs; a script gives it back once it has published
+            if emitting and self.exclusive and not self._polling_here():
+                self._lease.release()
+
+    def _publish(self, counts, emitting):
+        with self._lock:
+            end = settled_offset(self._offset, self.gap_timeout)
+            changes = tail(self._offset, PUBLISHED_TABLES, self.max_changes, until=end)
+            self._offset = changes[-1].id if len(changes) == self.max_changes else end
+            if not changes:
+                return counts
+
+            universe = set(self.symbols)
+            touched = {table: {c.symbol for c in changes if c.table_name == table} & universe
+                       for table in PUBLISHED_TABLES}
+
+            sentiment = latest_sentiment(sorted(touched[SentimentSummary.__tablename__])) \
+                if touched[SentimentSummary.__tablename__] else {}
+            prices = latest_prices(sorted(touched[StockPrice.__tablename__])) \
+                if touched[StockPrice.__tablename__] else {}
+
+            # Rewrites of older days don't change the latest values, so compare before emitting
+            sentiment_changed = sorted(s for s, state in sentiment.items() if self._sentiment.get(s) != state)
+            price_changed = sorted(s for s, state in prices.items() if self._prices.get(s) != state)
+            self._sentiment.update(sentiment)
+            self._prices.update(prices)
+
+            new_post_ids = sorted(c.row_id for c in changes
+                                  if c.table_name == Post.__tablename__ and c.operation == 'insert'
+                                  and c.symbol in universe)[-self.max_posts:]
+            posts = db.session.execute(
+                select(Post.id, Post.symbol, Post.title, Post.sentiment_score, Post.source, Post.posted_at)
+                .where(Post.id.in_(new_post_ids))
+                .order_by(Post.id)
+            ).all() if new_post_ids and emitting else []
+
+        if not emitting:
+            # Still tracked above, so values compare right once this process emits again
+            sentiment_changed, price_changed = [], []
+
+        for symbol in sentiment_changed:
+            day, avg_sentiment, post_count = sentiment[symbol]
+            self.socketio.emit('sentiment_update', {
+                'symbol': symbol,
+                'date': day.isoformat(),
+                'avg_sentiment': avg_sentiment,
+                'post_count': post_count
+            }, to=room_for(symbol))
+
+        for symbol in price_changed:
+            day, close_price = prices[symbol]
+            self.socketio.emit('price_update', {
+                'symbol': symbol,
+                'date': day.isoformat(),
+                'current_price': close_price
+            }, to=room_for(symbol))
+
+        for post in posts:
+            self.socketio.emit('new_post', {
+                'id': post.id,
+                'symbol': post.symbol,
+                'title': post.title,
+                'sentiment_score': post.sentiment_score,
+                'source': post.source,
+                'posted_at': post.posted_at.isoformat() if post.posted_at else None
+            }, to=room_for(post.symbol))
+
+        for listener in self.listeners:
+            listener(changes)
+
+        counts.update(sentiment_update=len(sentiment_changed), price_update=len(price_changed),
+                      new_post=len(posts))
+        return counts
+
+    def _poll(self, app, interval):
+        with app.app_context():
+            self.snapshot()
+        while True:
+            self.socketio.sleep(interval)
+            with app.app_context():
+                try:
+                    self.publish()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error publishing updates: {e}")
+                finally:
+                    db.session.remove()
+
+    def start_polling(self, app, interval):
+        """
+        Poll for changes every `interval` seconds in a background task
+        Safe to call repeatedly; after a fork the poller is started again in the new process
+        """
+        with self._lock:
+            if self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+        self.socketio.start_background_task(self._poll, app, interval)
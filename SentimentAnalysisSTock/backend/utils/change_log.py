@@ -0,0 +1,169 @@
+"""
+Change-data-capture feed
+Inserts, updates and deletes of the tracked models are appended to the change_log table
+from a session after_flush hook, so each change row commits (or rolls back) together
+with the data it describes. Consumers remember the last change id they processed and
+tail from there.
+
+Core statements bypass the ORM flush; code that writes with them (e.g. vote upserts)
+calls record_changes() itself. Bulk Query.update()/delete() are not captured.
+
+Ids are handed out when a change is flushed, not when it commits, so with several writers
+at once (e.g. sharded pipeline workers on PostgreSQL) a change can become visible after one
+with a higher id. Consumers therefore only read up to the settled offset: the end of the
+unbroken run of ids after their own. A missing id holds them back until the change after it
+is gap_timeout seconds old; then it is taken for rolled back. A transaction that stays open
+longer than that between flushing and committing a change can still be missed.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, select, delete, func
+from sqlalchemy.orm import Session
+from backend.models.models import (db, Post, StockPrice, SentimentSummary, Prediction,
+                                   PredictionVote, ChangeLog, ConsumerOffset)
+
+TRACKED_MODELS = (Post, StockPrice, SentimentSummary, Prediction, PredictionVote)
+TRACKED_TABLES = tuple(model.__tablename__ for model in TRACKED_MODELS)
+
+def _change(obj, operation):
+    return {
+        'table_name': obj.__tablename__,
+        'row_id': obj.id,
+        'operation': operation,
+        'symbol': getattr(obj, 'symbol', None),
+        'changed_at': datetime.utcnow()
+    }
+
+def _capture(session, flush_context):
+    """after_flush hook: log the tracked rows this flush wrote, in the same transaction"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, TRACKED_MODELS):
+            changes.append(_change(obj, 'insert'))
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED_MODELS) and session.is_modified(obj, include_collections=False):
+            changes.append(_change(obj, 'update'))
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED_MODELS):
+            changes.append(_change(obj, 'delete'))
+
+    if changes:
+        session.connection().execute(insert(ChangeLog), changes)
+
+def enable_change_capture():
+    """Install the flush hook on every session (idempotent)"""
+    if not event.contains(Session, 'after_flush', _capture):
+        event.listen(Session, 'after_flush', _capture)
+
+def change_rows(table_name, row_ids, operation, symbols=None):
+    """change_log rows for changes made with Core statements"""
+    symbols = symbols or [None] * len(row_ids)
+    now = datetime.utcnow()
+    return [
+        {'table_name': table_name, 'row_id': row_id, 'operation': operation,
+         'symbol': symbol, 'changed_at': now}
+        for row_id, symbol in zip(row_ids, symbols)
+    ]
+
+def record_changes(table_name, row_ids, operation, symbols=None):
+    """Log changes made with Core statements; runs in the caller's transaction"""
+    if row_ids:
+        db.session.execute(insert(ChangeLog), change_rows(table_name, row_ids, operation, symbols))
+
+CHANGE_COLUMNS = ('id', 'table_name', 'row_id', 'operation', 'symbol', 'changed_at')
+
+def latest_offset_query():
+    return select(func.max(ChangeLog.id))
+
+def latest_offset():
+    """Id of the newest change, 0 when the log is empty"""
+    return db.session.execute(latest_offset_query()).scalar() or 0
+
+def tail_query(offset, tables=None, limit=1000, until=None):
+    """Changes after offset (and up to until), oldest first, optionally only for some tables"""
+    stmt = select(*[getattr(ChangeLog, c) for c in CHANGE_COLUMNS])\
+        .where(ChangeLog.id > offset)\
+        .order_by(ChangeLog.id)\
+        .limit(limit)
+    if until is not None:
+        stmt = stmt.where(ChangeLog.id <= until)
+    if tables:
+        stmt = stmt.where(ChangeLog.table_name.in_(tables))
+    return stmt
+
+# Seconds a missing change id may hold consumers back before it is taken for rolled back
+GAP_TIMEOUT = 120
+
+def settled_queries(offset, limit=10000):
+    """The first id in the log, and the ids and times of the changes after offset"""
+    return (select(func.min(ChangeLog.id)),
+            select(ChangeLog.id, ChangeLog.changed_at)
+            .where(ChangeLog.id > offset)
+            .order_by(ChangeLog.id)
+            .limit(limit))
+
+def settled_from_rows(offset, first_id, rows, gap_timeout=GAP_TIMEOUT, now=None):
+    """The settled offset after offset, from the results of settled_queries"""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=gap_timeout)
+    # Ids below the oldest change left were pruned, not skipped
+    settled = max(offset, (first_id or 1) - 1)
+    for row in rows:
+        if row.id != settled + 1 and row.changed_at > cutoff:
+            break
+        settled = row.id
+    return settled
+
+def settled_offset(offset, gap_timeout=GAP_TIMEOUT):
+    """How far after offset the log can be read without skipping changes still in flight"""
+    first_query, rows_query = settled_queries(offset)
+    first_id = db.session.execute(first_query).scalar()
+    return settled_from_rows(offset, first_id, db.session.execute(rows_query).all(), gap_timeout)
+
+def tail(offset, tables=None, limit=1000, until=None):
+    """Changes after offset (and up to until), oldest first, optionally only for some tables"""
+    return db.session.execute(tail_query(offset, tables, limit, until)).all()
+
+def prune(retention_days):
+    """
+    Delete changes older than retention_days, except the newest one; the caller commits.
+    Without AUTOINCREMENT (change_log tables created before it), SQLite would restart ids
+    below the consumers' offsets once the table is empty
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    newest = select(func.max(ChangeLog.id)).scalar_subquery()
+    return db.session.execute(
+        delete(ChangeLog).where(ChangeLog.changed_at < cutoff, ChangeLog.id < newest)).rowcount
+
+class ChangeFeed:
+    """A named consumer of the change log whose offset is stored in consumer_offsets"""
+
+    def __init__(self, consumer, tables=None, batch_size=1000, gap_timeout=GAP_TIMEOUT):
+        self.consumer = consumer
+        self.tables = tables
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+
+    def offset(self):
+        """Stored offset; a new consumer starts at the current end of the log"""
+        stored = db.session.get(ConsumerOffset, self.consumer)
+        if stored is None:
+            stored = ConsumerOffset(consumer=self.consumer, offset=latest_offset())
+            db.session.add(stored)
+            db.session.commit()
+        return stored.offset
+
+    def poll(self):
+        """(changes, next offset) after the stored offset; call commit(next offset) once handled"""
+        offset = self.offset()
+        end = settled_offset(offset, self.gap_timeout)
+        changes = tail(offset, self.tables, self.batch_size, until=end)
+        if len(changes) == self.batch_size:
+            return changes, changes[-1].id
+        # Everything up to end was seen, including changes to tables this consumer skips
+        return changes, end
+
+    def commit(self, offset):
+        """Store the offset of the last change this consumer has handled"""
+        stored = db.session.get(ConsumerOffset, self.consumer)
+        stored.offset = offset
+        db.session.commit()
@@ -0,0 +1,154 @@
+"""
+Vectorized multi-symbol comparison engine
+Loads every requested symbol with one bulk query per table, pivots into
+date-aligned (dates x symbols) frames and computes all metrics column-wise
+"""
+
+import math
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from backend.models.models import db, StockPrice, SentimentSummary, Prediction
+
+TRADING_DAYS_PER_YEAR = 252
+
+SENTIMENT_COLUMNS = ('symbol', 'date', 'sentiment', 'post_count')
+PRICE_COLUMNS = ('symbol', 'date', 'close_price', 'volume')
+
+def comparison_queries(symbols, start_date, today):
+    """The three independent queries behind a comparison: sentiment, prices, predictions"""
+    sentiment = select(SentimentSummary.symbol, SentimentSummary.date,
+                       SentimentSummary.avg_sentiment, SentimentSummary.post_count)\
+        .where(SentimentSummary.symbol.in_(symbols))\
+        .where(SentimentSummary.date >= start_date)\
+        .order_by(SentimentSummary.symbol, SentimentSummary.date)
+    prices = select(StockPrice.symbol, StockPrice.date, StockPrice.close_price, StockPrice.volume)\
+        .where(StockPrice.symbol.in_(symbols))\
+        .where(StockPrice.date >= start_date)\
+        .order_by(StockPrice.symbol, StockPrice.date)
+    predictions = select(Prediction.symbol, Prediction.predicted_direction, Prediction.confidence)\
+        .where(Prediction.symbol.in_(symbols))\
+        .where(Prediction.prediction_date == today)\
+        .order_by(Prediction.id)
+    return sentiment, prices, predictions
+
+def first_predictions(rows):
+    """{symbol: (direction, confidence)}, keeping the first prediction per symbol as .first() did"""
+    predictions = {}
+    for symbol, direction, confidence in rows:
+        predictions.setdefault(symbol, (direction, confidence))
+    return predictions
+
+def load_rows(symbols, start_date, today):
+    """
+    Bulk-load sentiment, prices and today's predictions for all symbols
+    Returns (sentiment rows, price rows, {symbol: (direction, confidence)}),
+    with rows sorted by (symbol, date)
+    """
+    sentiment, prices, predictions = (
+        db.session.execute(stmt).all() for stmt in comparison_queries(symbols, start_date, today)
+    )
+    return sentiment, prices, first_predictions(predictions)
+
+def _wide(frame, values, symbols):
+    """Pivot a long frame into a (dates x symbols) frame with one column per symbol"""
+    if frame.empty:
+        return pd.DataFrame(columns=symbols, dtype=np.float64)
+    return frame.pivot(index='date', columns='symbol', values=values)\
+        .reindex(columns=symbols)\
+        .astype(np.float64)\
+        .sort_index()
+
+def compute_metrics(sentiment, prices, symbols):
+    """Compute every per-symbol metric in vectorized form; returns a frame indexed by symbol"""
+    sentiment_wide = _wide(sentiment, 'sentiment', symbols)
+    posts_wide = _wide(sentiment, 'post_count', symbols)
+    close_wide = _wide(prices, 'close_price', symbols)
+
+    first_close = close_wide.bfill().iloc[0] if len(close_wide) else pd.Series(np.nan, index=symbols)
+    last_close = close_wide.ffill().iloc[-1] if len(close_wide) else pd.Series(np.nan, index=symbols)
+    price_points = close_wide.count()
+
+    # Price change only counts with at least two observations, like the per-symbol loop did
+    price_change = (last_close - first_close).where(price_points >= 2, 0.0)
+    price_change_percent = (price_change / first_close * 100).where(price_points >= 2, 0.0)
+
+    returns = close_wide.pct_change(fill_method=None)
+    volatility = returns.std() * math.sqrt(TRADING_DAYS_PER_YEAR) * 100
+    max_drawdown = ((close_wide / close_wide.cummax()) - 1).min() * 100
+
+    # Same-day sentiment vs return, pairwise over dates where both exist
+    aligned_sentiment = sentiment_wide.reindex(index=returns.index)
+    sentiment_return_corr = returns.corrwith(aligned_sentiment) if len(returns) else \
+        pd.Series(np.nan, index=symbols)
+
+    return pd.DataFrame({
+        'current_sentiment': sentiment_wide.ffill().iloc[-1] if len(sentiment_wide) else np.nan,
+        'average_sentiment': sentiment_wide.mean(),
+        'total_posts': posts_wide.sum(),
+        'current_price': last_close,
+        'price_change': price_change,
+        'price_change_percent': price_change_percent,
+        'volatility': volatility,
+        'max_drawdown': max_drawdown,
+        'sentiment_return_correlation': sentiment_return_corr
+    }, index=symbols)
+
+def _split_rows(rows, symbols):
+    """Group (symbol, ...) rows sorted by symbol into {symbol: [row tuples without symbol]}"""
+    split = {symbol: [] for symbol in symbols}
+    for symbol, group in groupby(rows, key=itemgetter(0)):
+        split[symbol] = [tuple(row[1:]) for row in group]
+    return split
+
+def _number(value, digits=None, default=None):
+    """Convert a NumPy scalar into a plain float, NaN becoming default"""
+    if value is None or pd.isna(value):
+        return default
+    value = float(value)
+    return round(value, digits) if digits is not None else value
+
+def compare_symbols(symbols, start_date, today):
+    """
+    Build comparison entries for symbols, in request order
+    History fields hold raw row tuples; callers choose the output layout
+    """
+    return build_entries(symbols, *load_rows(symbols, start_date, today))
+
+def build_entries(symbols, sentiment, prices, predictions):
+    """Comparison entries from already-loaded rows (see load_rows)"""
+    metrics = compute_metrics(
+        pd.DataFrame(sentiment, columns=SENTIMENT_COLUMNS),
+        pd.DataFrame(prices, columns=PRICE_COLUMNS),
+        symbols
+    )
+
+    # Histories keep the original row values so their JSON matches the per-row path
+    sentiment_rows = _split_rows(sentiment, symbols)
+    price_rows = _split_rows(prices, symbols)
+
+    entries = []
+    for symbol, m in zip(symbols, metrics.itertuples(index=False)):
+        direction, confidence = predictions.get(symbol, (None, None))
+        entries.append({
+            'symbol': symbol,
+            'current_sentiment': _number(m.current_sentiment, default=0),
+            'average_sentiment': _number(m.average_sentiment, 3, default=0),
+            'current_price': _number(m.current_price, default=0),
+            'price_change': _number(m.price_change, 2, default=0),
+            'price_change_percent': _number(m.price_change_percent, 2, default=0),
+            'total_posts': int(m.total_posts),
+            'volatility': _number(m.volatility, 2),
+            'max_drawdown': _number(m.max_drawdown, 2),
+            'sentiment_return_correlation': _number(m.sentiment_return_correlation, 3),
+            'prediction': {
+                'direction': direction,
+                'confidence': confidence
+            },
+            'sentiment_history': sentiment_rows[symbol],
+            'price_history': price_rows[symbol]
+        })
+
+    return entries
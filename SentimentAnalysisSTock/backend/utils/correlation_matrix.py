@@ -0,0 +1,294 @@
+"""
+Cross-asset correlation matrices over the tracked universe
+The universe is held as dense (days x symbols) arrays. Every matrix is computed from
+pairwise-complete sufficient statistics (counts, sums, sums of squares and cross
+products), which are plain matrix products and can be updated by adding or
+subtracting individual days, so appending a day costs O(symbols^2) instead of a
+full recomputation.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func
+from backend.models.models import db, StockPrice, SentimentSummary
+
+KINDS = ('sentiment', 'returns', 'sentiment_next_return')
+
+# A return is taken against the previous close at most this many days back
+PRICE_FILL_LIMIT = 5
+# Sentiment on day t is paired with the first return within this many days after t
+NEXT_RETURN_MAX_GAP = 4
+# The most recent days are reloaded on every refresh, since the price updater and
+# summary generation rewrite them in place
+VOLATILE_DAYS = 7
+
+class PairStats:
+    """Pairwise-complete sufficient statistics for corr(X[:, i], Y[:, j])"""
+
+    def __init__(self, n_symbols):
+        shape = (n_symbols, n_symbols)
+        self.n = np.zeros(shape)
+        self.sx = np.zeros(shape)
+        self.sy = np.zeros(shape)
+        self.sxx = np.zeros(shape)
+        self.syy = np.zeros(shape)
+        self.sxy = np.zeros(shape)
+
+    def add(self, x, y, sign=1):
+        """Add (sign=1) or remove (sign=-1) the days in x and y, both (days x symbols)"""
+        mx = (~np.isnan(x)).astype(np.float64)
+        my = (~np.isnan(y)).astype(np.float64)
+        x0 = np.nan_to_num(x)
+        y0 = np.nan_to_num(y)
+
+        self.n += sign * (mx.T @ my)
+        self.sx += sign * (x0.T @ my)
+        self.sy += sign * (mx.T @ y0)
+        self.sxx += sign * ((x0 * x0).T @ my)
+        self.syy += sign * (mx.T @ (y0 * y0))
+        self.sxy += sign * (x0.T @ y0)
+
+    def correlation(self, min_observations):
+        """Pearson correlation matrix; NaN where fewer than min_observations pairs exist"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = self.n * self.sxy - self.sx * self.sy
+            variance_x = self.n * self.sxx - self.sx * self.sx
+            variance_y = self.n * self.syy - self.sy * self.sy
+            corr = covariance / np.sqrt(variance_x * variance_y)
+
+        corr[(self.n < min_observations) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0), np.rint(self.n).astype(np.int64)
+
+class CorrelationMatrix:
+    """Incrementally maintained correlation matrices for one universe and lookback"""
+
+    def __init__(self, symbols, days, min_observations=5, refresh_seconds=30):
+        self.symbols = list(symbols)
+        self.symbol_index = pd.Index(self.symbols)
+        self.days = days
+        self.min_observations = min_observations
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+
+        self.dates = None
+        self.first = 0
+        self.checked_at = 0.0
+        self.stable_bounds = None
+        self.stable_fingerprint = None
+        self._results = {}
+
+    # Loading
+
+    def _universe_filter(self, model, lo, hi):
+        return (model.symbol.in_(self.symbols), model.date >= lo, model.date <= hi)
+
+    def _latest_date(self):
+        """Most recent date with data for any symbol in the universe"""
+        latest = [
+            db.session.execute(select(func.max(model.date)).where(model.symbol.in_(self.symbols))).scalar()
+            for model in (SentimentSummary, StockPrice)
+        ]
+        latest = [d for d in latest if d is not None]
+        return max(latest) if latest else None
+
+    def _fingerprint(self, lo, hi):
+        """Aggregate over every row between lo and hi; changes if any of them change"""
+        if lo > hi:
+            return None
+        sentiment = db.session.execute(
+            select(func.count(), func.max(SentimentSummary.id),
+                   func.coalesce(func.sum(SentimentSummary.avg_sentiment), 0))
+            .where(*self._universe_filter(SentimentSummary, lo, hi))
+        ).one()
+        prices = db.session.execute(
+            select(func.count(), func.max(StockPrice.id),
+                   func.coalesce(func.sum(StockPrice.close_price), 0))
+            .where(*self._universe_filter(StockPrice, lo, hi))
+        ).one()
+        return tuple(sentiment) + tuple(prices)
+
+    def _load_into(self, start_row):
+        """Fill rows start_row.. of the dense arrays from one bulk query per table"""
+        lo = self.dates[start_row].astype(object)
+        hi = self.dates[-1].astype(object)
+        self.sentiment[start_row:] = np.nan
+        self.closes[start_row:] = np.nan
+
+        for model, value_column, target in (
+            (SentimentSummary, SentimentSummary.avg_sentiment, self.sentiment),
+            (StockPrice, StockPrice.close_price, self.closes)
+        ):
+            rows = db.session.execute(
+                select(model.symbol, model.date, value_column)
+                .where(*self._universe_filter(model, lo, hi))
+            ).all()
+            if not rows:
+                continue
+
+            symbols, dates, values = zip(*rows)
+            row_idx = (np.array(dates, dtype='datetime64[D]') - self.dates[0]).astype(np.int64)
+            col_idx = self.symbol_index.get_indexer(symbols)
+            target[row_idx, col_idx] = np.array(values, dtype=np.float64)
+
+    def _derive(self):
+        """Recompute daily returns and next-session returns from the dense closes"""
+        closes = pd.DataFrame(self.closes)
+        previous = closes.ffill(limit=PRICE_FILL_LIMIT).shift(1)
+        returns = closes / previous - 1
+        self.returns = returns.to_numpy()
+        self.next_returns = returns.bfill(limit=NEXT_RETURN_MAX_GAP - 1).shift(-1).to_numpy()
+
+    # Statistics
+
+    def _apply(self, lo, hi, sign):
+        """Add or remove the contribution of dense rows lo..hi-1 to every matrix"""
+        if lo >= hi:
+            return
+        s = self.sentiment[lo:hi]
+        r = self.returns[lo:hi]
+        self.stats['sentiment'].add(s, s, sign)
+        self.stats['returns'].add(r, r, sign)
+        self.stats['sentiment_next_return'].add(s, self.next_returns[lo:hi], sign)
+        self._results.clear()
+
+    def _remember_stable_section(self):
+        """Fingerprint the in-window days that are not reloaded on every refresh"""
+        lo = self.dates[self.first].astype(object) if self.first < len(self.dates) else None
+        hi = (self.dates[-1] - VOLATILE_DAYS).astype(object) if len(self.dates) else None
+        if lo is None or hi is None or lo > hi:
+            self.stable_bounds = None
+            self.stable_fingerprint = None
+            return
+        self.stable_bounds = (lo, hi)
+        self.stable_fingerprint = self._fingerprint(lo, hi)
+
+    def _rebuild(self, start, latest):
+        """Load the whole window and compute every matrix in one vectorized pass"""
+        context_start = start - (PRICE_FILL_LIMIT + 1)
+        end = max(latest, start - 1) if latest is not None else start - 1
+        self.dates = np.arange(context_start, end + 1)
+
+        shape = (len(self.dates), len(self.symbols))
+        self.sentiment = np.full(shape, np.nan)
+        self.closes = np.full(shape, np.nan)
+        if len(self.dates):
+            self._load_into(0)
+        self._derive()
+
+        self.first = int(np.searchsorted(self.dates, start))
+        self.stats = {kind: PairStats(len(self.symbols)) for kind in KINDS}
+        self._apply(self.first, len(self.dates), 1)
+        self._remember_stable_section()
+
+    def _append(self, start, latest):
+        """Reload the volatile tail, append new days and slide the window start"""
+        old_len = len(self.dates)
+        tail = max(self.first, old_len - VOLATILE_DAYS)
+        # Next-session returns of the days just before the tail depend on the tail
+        affected = max(self.first, tail - NEXT_RETURN_MAX_GAP)
+        self._apply(affected, old_len, -1)
+
+        if latest > self.dates[-1]:
+            extra = int((latest - self.dates[-1]).astype(np.int64))
+            padding = np.full((extra, len(self.symbols)), np.nan)
+            self.dates = np.arange(self.dates[0], latest + 1)
+            self.sentiment = np.vstack([self.sentiment, padding])
+            self.closes = np.vstack([self.closes, padding])
+
+        self._load_into(tail)
+        self._derive()
+        self._apply(affected, len(self.dates), 1)
+
+        # Days that fell out of the lookback window
+        new_first = int(np.searchsorted(self.dates, start))
+        if new_first > self.first:
+            self._apply(self.first, new_first, -1)
+            self.first = new_first
+
+        # Keep just enough earlier days to compute the first in-window return
+        cut = max(0, self.first - (PRICE_FILL_LIMIT + 1))
+        if cut:
+            self.dates = self.dates[cut:]
+            self.sentiment = self.sentiment[cut:]
+            self.closes = self.closes[cut:]
+            self.returns = self.returns[cut:]
+            self.next_returns = self.next_returns[cut:]
+            self.first -= cut
+
+        self._remember_stable_section()
+
+    def refresh(self, force=False):
+        """Bring the matrices up to date with the database (checked at most every refresh_seconds)"""
+        now = time.monotonic()
+        if not force and self.dates is not None and now - self.checked_at < self.refresh_seconds:
+            return
+        self.checked_at = now
+
+        start = np.datetime64(date.today() - timedelta(days=self.days), 'D')
+        latest = self._latest_date()
+        latest = np.datetime64(latest, 'D') if latest is not None else None
+
+        needs_rebuild = (
+            self.dates is None
+            or latest is None
+            or latest < self.dates[-1]
+            or (self.stable_bounds is not None
+                and self._fingerprint(*self.stable_bounds) != self.stable_fingerprint)
+        )
+
+        if needs_rebuild:
+            self._rebuild(start, latest)
+        else:
+            self._append(start, latest)
+
+    # Results
+
+    def result(self, kind):
+        """Return (correlation, observations) for one kind, cached until the data changes"""
+        if kind not in self._results:
+            self._results[kind] = self.stats[kind].correlation(self.min_observations)
+        return self._results[kind]
+
+    def select(self, kind, symbols=None):
+        """Return (symbols, correlation, observations), restricted to a subset of the universe"""
+        corr, observations = self.result(kind)
+        if not symbols:
+            return self.symbols, corr, observations
+
+        idx = self.symbol_index.get_indexer(symbols)
+        unknown = [s for s, i in zip(symbols, idx) if i < 0]
+        if unknown:
+            raise ValueError(f"Symbols not in the tracked universe: {', '.join(unknown)}")
+        return list(symbols), corr[np.ix_(idx, idx)], observations[np.ix_(idx, idx)]
+
+def matrix_to_lists(values, digits=None):
+    """Convert a matrix into nested lists for JSON, NaN becoming None"""
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    if digits is not None:
+        values = np.round(values, digits)
+    return np.where(np.isnan(values), None, values).tolist()
+
+# One maintained matrix per (universe, lookback), least recently used first; days comes
+# from the query string, so only the max_matrices most recently asked for are kept
+_matrices = OrderedDict()
+_matrices_lock = threading.Lock()
+
+def get_correlation_matrix(symbols, days, min_observations, refresh_seconds, max_matrices=4):
+    """Get the shared, refreshed CorrelationMatrix for a universe and lookback"""
+    key = (tuple(symbols), days)
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is None:
+            matrix = _matrices[key] = CorrelationMatrix(symbols, days, min_observations, refresh_seconds)
+        _matrices.move_to_end(key)
+        while len(_matrices) > max(1, max_matrices):
+            _matrices.popitem(last=False)
+
+    with matrix.lock:
+        matrix.refresh()
+    return matrix
@@ -0,0 +1,212 @@
+"""
+Dependency-ordered, concurrent execution of pipeline stages
+Each stage names the stages it needs and starts as soon as they have all succeeded, so
+independent stages run side by side and a run takes about as long as its critical path.
+A failing stage is retried on its own with exponential backoff; if it still fails, the
+stages that need it are skipped and the rest of the graph carries on. Stages marked
+`always` run once their needs have finished, whether those succeeded or not.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from contextvars import copy_context
+from datetime import datetime
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+class Stage:
+    """A named unit of work and the names of the stages it needs"""
+
+    def __init__(self, name, func, needs=(), retries=None, always=False):
+        self.name = name
+        self.func = func
+        self.needs = tuple(needs)
+        self.retries = retries  # None: the run's default
+        self.always = always
+
+class StageResult:
+    """Outcome and timing of one stage; times are seconds since the run started"""
+    __slots__ = ('name', 'status', 'attempts', 'started', 'finished', 'error', 'value')
+
+    def __init__(self, name, status, attempts=0, started=None, finished=None, error=None, value=None):
+        self.name = name
+        self.status = status
+        self.attempts = attempts
+        self.started = started
+        self.finished = finished
+        self.error = error
+        self.value = value
+
+    @property
+    def seconds(self):
+        return self.finished - self.started if self.started is not None else 0.0
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'attempts': self.attempts,
+            'started': round(self.started, 3) if self.started is not None else None,
+            'seconds': round(self.seconds, 3),
+            'error': self.error
+        }
+
+class Run:
+    """Results of one DAG run"""
+
+    def __init__(self, dag, results, started_at, seconds):
+        self.dag = dag
+        self.results = results
+        self.started_at = started_at
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return all(result.status == SUCCEEDED for result in self.results.values())
+
+    def failed(self):
+        return [name for name, result in self.results.items() if result.status == FAILED]
+
+    def critical_path(self):
+        """The chain of stages that ended last: each one's latest-finishing need, back to a root"""
+        ran = {name: result for name, result in self.results.items() if result.started is not None}
+        if not ran:
+            return []
+        name = max(ran, key=lambda n: ran[n].finished)
+        path = [name]
+        while True:
+            needs = [need for need in self.dag.stages[name].needs if need in ran]
+            if not needs:
+                break
+            name = max(needs, key=lambda n: ran[n].finished)
+            path.append(name)
+        return path[::-1]
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': round(self.seconds, 3),
+            'ok': self.ok,
+            'critical_path': self.critical_path(),
+            'stage_seconds': round(sum(result.seconds for result in self.results.values()), 3),
+            'stages': {name: result.to_dict() for name, result in self.results.items()}
+        }
+
+    def print_summary(self):
+        critical = set(self.critical_path())
+        print(f"\n{'stage':24} {'status':10} {'tries':>5} {'start s':>8} {'seconds':>8}")
+        for name, result in sorted(self.results.items(), key=lambda item: (item[1].started is None, item[1].started or 0)):
+            start = f'{result.started:8.2f}' if result.started is not None else f"{'-':>8}"
+            print(f"{name:24} {result.status:10} {result.attempts:5d} {start} {result.seconds:8.2f}"
+                  f"{'  *' if name in critical else ''}")
+        total = sum(result.seconds for result in self.results.values())
+        print(f"Run took {self.seconds:.2f}s for {total:.2f}s of stage time (* critical path)")
+
+    def save(self, path):
+        """Append the run as one JSON line to path"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.to_dict()) + '\n')
+
+class DAG:
+    """A set of stages with dependencies; run() executes them on a thread pool"""
+
+    def __init__(self, stages):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            unknown = [need for need in stage.needs if need not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} needs unknown stages {unknown}")
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        order, state = [], {}
+
+        def visit(name, chain):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Dependency cycle: {' -> '.join(chain + [name])}")
+            state[name] = 'visiting'
+            for need in self.stages[name].needs:
+                visit(need, chain + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def run(self, max_workers=4, retries=0, retry_delay=1.0, context=None, on_stage=None):
+        """
+        Run every stage, each attempt inside context() if given (e.g. app.app_context);
+        returns a Run. Stage exceptions are caught and reported, never raised. on_stage,
+        if given, is called with each StageResult as soon as it is known (e.g. for progress)
+        """
+        started_at = datetime.now()
+        origin = time.perf_counter()
+        results = {}
+        running = {}
+
+        def attempt(stage):
+            tries = stage.retries if stage.retries is not None else retries
+            started = time.perf_counter() - origin
+            for number in range(1, tries + 2):
+                try:
+                    with (context() if context else nullcontext()):
+                        value = stage.func()
+                    return StageResult(stage.name, SUCCEEDED, number, started,
+                                       time.perf_counter() - origin, value=value)
+                except Exception as e:
+                    error = f'{type(e).__name__}: {e}'
+                    if number > tries:
+                        return StageResult(stage.name, FAILED, number, started,
+                                           time.perf_counter() - origin, error=error)
+                    delay = retry_delay * 2 ** (number - 1)
+                    print(f"Stage {stage.name} failed (attempt {number}): {error}; retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+        def finished(result):
+            if on_stage is None:
+                return
+            try:
+                on_stage(result)
+            except Exception as e:
+                print(f"Error reporting stage {result.name}: {e}")
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pipeline') as pool:
+            while len(results) < len(self.stages):
+                for name in self.order:
+                    if name in results or name in running:
+                        continue
+                    stage = self.stages[name]
+                    needs = [results.get(need) for need in stage.needs]
+                    if any(result is None for result in needs):
+                        continue
+                    if not stage.always and any(result.status != SUCCEEDED for result in needs):
+                        results[name] = StageResult(name, SKIPPED)
+                        finished(results[name])
+                        continue
+                    # Stages see the caller's context, e.g. its tracing span
+                    running[name] = pool.submit(copy_context().run, attempt, stage)
+
+                if not running:
+                    continue
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [name for name, future in running.items() if future in done]:
+                    results[name] = running.pop(name).result()
+                    if results[name].status == FAILED:
+                        print(f"Stage {name} failed: {results[name].error}")
+                    finished(results[name])
+
+        return Run(self, results, started_at, time.perf_counter() - origin)
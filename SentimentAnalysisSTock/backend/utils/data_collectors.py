@@ -5,6 +5,7 @@ from datetime import datetime, date, timedelta
 from newsapi import NewsApiClient
 from backend.config.config import Config
 from backend.utils.sentiment_analyzer import SentimentAnalyzer
+from backend.utils.tracing import KIND_CLIENT, start_span, traced
 
 class RedditCollector:
     def __init__(self):
@@ -15,6 +16,7 @@ class RedditCollector:
         )
         self.sentiment_analyzer = SentimentAnalyzer()
 
+    @traced('reddit.collect_posts')
     def collect_posts(self, symbols, limit=50):
         """Collect posts from Reddit for given stock symbols"""
         posts = []
@@ -22,24 +24,30 @@ class RedditCollector:
 
         for symbol in symbols:
             try:
-                for post in subreddit.search(symbol, sort='new', limit=limit):
-                    # Analyze sentiment
-                    sentiment_data = self.sentiment_analyzer.analyze_post(
-                        post.title,
-                        post.selftext
-                    )
+                # Fetch before scoring so the search and the scoring are timed apart
+                with start_span('reddit.search', KIND_CLIENT, symbol=symbol) as search_span:
+                    results = list(subreddit.search(symbol, sort='new', limit=limit))
+                    search_span.set_attribute('results', len(results))
 
-                    post_data = {
-                        'symbol': symbol,
-                        'title': post.title,
-                        'content': post.selftext,
-                        'clean_text': sentiment_data['clean_text'],
-                        'sentiment_score': sentiment_data['sentiment_score'],
-                        'source': 'reddit',
-                        'source_url': f"https://reddit.com{post.permalink}",
-                        'posted_at': datetime.fromtimestamp(post.created_utc)
-                    }
-                    posts.append(post_data)
+                with start_span('sentiment.batch', symbol=symbol, source='reddit', size=len(results)):
+                    for post in results:
+                        # Analyze sentiment
+                        sentiment_data = self.sentiment_analyzer.analyze_post(
+                            post.title,
+                            post.selftext
+                        )
+
+                        post_data = {
+                            'symbol': symbol,
+                            'title': post.title,
+                            'content': post.selftext,
+                            'clean_text': sentiment_data['clean_text'],
+                            'sentiment_score': sentiment_data['sentiment_score'],
+                            'source': 'reddit',
+                            'source_url': f"https://reddit.com{post.permalink}",
+                            'posted_at': datetime.fromtimestamp(post.created_utc)
+                        }
+                        posts.append(post_data)
 
             except Exception as e:
                 print(f"Error collecting Reddit posts for {symbol}: {e}")
@@ -51,6 +59,7 @@ class NewsCollector:
         self.newsapi = NewsApiClient(api_key=Config.NEWS_API_KEY) if Config.NEWS_API_KEY else None
         self.sentiment_analyzer = SentimentAnalyzer()
 
+    @traced('newsapi.collect_news')
     def collect_news(self, symbols, days_back=7):
         """Collect news articles for given stock symbols"""
         if not self.newsapi:
@@ -73,35 +82,39 @@ class NewsCollector:
 
                 query = f"{symbol} OR {company_names.get(symbol, symbol)}"
 
-                news_data = self.newsapi.get_everything(
-                    q=query,
-                    from_param=from_date,
-                    language='en',
-                    sort_by='publishedAt',
-                    page_size=20
-                )
-
-                for article in news_data.get('articles', []):
-                    if article['title'] and article['description']:
-                        # Analyze sentiment
-                        sentiment_data = self.sentiment_analyzer.analyze_post(
-                            article['title'],
-                            article['description']
-                        )
-
-                        article_data = {
-                            'symbol': symbol,
-                            'title': article['title'],
-                            'content': article['description'],
-                            'clean_text': sentiment_data['clean_text'],
-                            'sentiment_score': sentiment_data['sentiment_score'],
-                            'source': 'news',
-                            'source_url': article['url'],
-                            'posted_at': datetime.fromisoformat(
-                                article['publishedAt'].replace('Z', '+00:00')
-                            ).replace(tzinfo=None)
-                        }
-                        articles.append(article_data)
+                with start_span('newsapi.get_everything', KIND_CLIENT, symbol=symbol) as search_span:
+                    news_data = self.newsapi.get_everything(
+                        q=query,
+                        from_param=from_date,
+                        language='en',
+                        sort_by='publishedAt',
+                        page_size=20
+                    )
+                    search_span.set_attribute('results', len(news_data.get('articles', [])))
+
+                with start_span('sentiment.batch', symbol=symbol, source='news',
+                                size=len(news_data.get('articles', []))):
+                    for article in news_data.get('articles', []):
+                        if article['title'] and article['description']:
+                            # Analyze sentiment
+                            sentiment_data = self.sentiment_analyzer.analyze_post(
+                                article['title'],
+                                article['description']
+                            )
+
+                            article_data = {
+                                'symbol': symbol,
+                                'title': article['title'],
+                                'content': article['description'],
+                                'clean_text': sentiment_data['clean_text'],
+                                'sentiment_score': sentiment_data['sentiment_score'],
+                                'source': 'news',
+                                'source_url': article['url'],
+                                'posted_at': datetime.fromisoformat(
+                                    article['publishedAt'].replace('Z', '+00:00')
+                                ).replace(tzinfo=None)
+                            }
+                            articles.append(article_data)
 
             except Exception as e:
                 print(f"Error collecting news for {symbol}: {e}")
@@ -112,14 +125,17 @@ class StockDataCollector:
     def __init__(self):
         pass
 
+    @traced('yfinance.collect_stock_prices')
     def collect_stock_prices(self, symbols, period="14d"):
         """Collect stock price data using yfinance"""
         stock_data = []
 
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=period)
+                with start_span('yfinance.history', KIND_CLIENT, symbol=symbol, period=period) as history_span:
+                    ticker = yf.Ticker(symbol)
+                    hist = ticker.history(period=period)
+                    history_span.set_attribute('rows', len(hist))
 
                 for date_idx, row in hist.iterrows():
                     price_data = {
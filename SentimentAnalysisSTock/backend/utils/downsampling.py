@@ -0,0 +1,133 @@
+"""
+Server-side downsampling for long time series
+Two strategies:
+  lttb    Largest-Triangle-Three-Buckets, keeps the visual shape of one y column
+  bucket  aggregates equal-width time buckets column by column (OHLC-style)
+"""
+
+import numpy as np
+
+METHODS = ('lttb', 'bucket')
+
+# How each column is reduced when rows are merged into a bucket
+AGGREGATIONS = ('first', 'last', 'mean', 'sum', 'max', 'min')
+
+def _x_values(dates):
+    """Convert a sequence of dates/datetimes into float seconds for geometry"""
+    return np.array(dates, dtype='datetime64[s]').astype(np.float64)
+
+def _float_column(values):
+    """Convert a column with possible None values into a float array with NaNs"""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points LTTB keeps when reducing (x, y) to n_out points
+    The first and last points are always kept
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Missing values shouldn't win the area comparison
+    y = np.where(np.isnan(y), np.nanmean(y) if np.any(~np.isnan(y)) else 0.0, y)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Averages of every bucket, used as the third vertex for the previous bucket
+    bucket_sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    bucket_sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    bucket_sizes = np.diff(edges)
+    avg_x = np.append(bucket_sums_x / bucket_sizes, x[n - 1])
+    avg_y = np.append(bucket_sums_y / bucket_sizes, y[n - 1])
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+def lttb(columns, rows, max_points, x_column='date', y_column=None):
+    """Downsample row tuples with LTTB on y_column"""
+    if len(rows) <= max_points:
+        return rows
+
+    x_idx = columns.index(x_column)
+    y_idx = columns.index(y_column)
+    x = _x_values([row[x_idx] for row in rows])
+    y = _float_column([row[y_idx] for row in rows])
+
+    return [rows[i] for i in lttb_indices(x, y, max_points)]
+
+def bucket_aggregate(columns, rows, max_points, aggregations, x_column='date'):
+    """
+    Merge rows into at most max_points equal-width time buckets
+    `aggregations` maps column name to one of AGGREGATIONS; unlisted columns keep the last value
+    """
+    if len(rows) <= max_points:
+        return rows
+
+    x_idx = columns.index(x_column)
+    x = _x_values([row[x_idx] for row in rows])
+
+    # Assign each row to a bucket and keep only the non-empty ones
+    edges = np.linspace(x[0], x[-1], max_points + 1)
+    bucket_ids = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, max_points - 1)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+
+    output_columns = []
+    for idx, column in enumerate(columns):
+        how = aggregations.get(column, 'last')
+        raw = [row[idx] for row in rows]
+
+        if how == 'first':
+            output_columns.append([raw[i] for i in starts])
+            continue
+        if how == 'last':
+            output_columns.append([raw[i - 1] for i in ends])
+            continue
+
+        values = _float_column(raw)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        counts = np.add.reduceat(present.astype(np.int64), starts)
+
+        if how == 'sum':
+            reduced = np.add.reduceat(filled, starts)
+        elif how == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                reduced = np.add.reduceat(filled, starts) / counts
+        elif how == 'max':
+            reduced = np.maximum.reduceat(np.where(present, values, -np.inf), starts)
+        elif how == 'min':
+            reduced = np.minimum.reduceat(np.where(present, values, np.inf), starts)
+        else:
+            raise ValueError(f"Unknown aggregation '{how}' for column {column}")
+
+        is_int = all(isinstance(v, int) for v in raw if v is not None)
+        output_columns.append([
+            None if count == 0 else (int(value) if is_int and how == 'sum' else float(value))
+            for value, count in zip(reduced, counts)
+        ])
+
+    return list(zip(*output_columns))
+
+def downsample(columns, rows, max_points, method, y_column, aggregations, x_column='date'):
+    """Reduce rows to at most max_points with the given method"""
+    if method == 'lttb':
+        return lttb(columns, rows, max_points, x_column=x_column, y_column=y_column)
+    if method == 'bucket':
+        return bucket_aggregate(columns, rows, max_points, aggregations, x_column=x_column)
+    raise ValueError(f"Unknown downsampling method '{method}', expected one of: {', '.join(METHODS)}")
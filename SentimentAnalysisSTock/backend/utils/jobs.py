@@ -0,0 +1,216 @@
+"""
+Background data refresh jobs
+POST /api/data/refresh records a RefreshJob and hands its id to a queue; a worker then runs
+the data pipeline, for every tracked stock or just one, and reports progress as its stages
+finish. The queue is a thread pool inside the web process by default, or Celery (brokered
+by Redis) so refreshes run on separate worker processes. Identical requests share the job
+already queued: its pending_key is unique while it waits, which holds across every web
+worker sharing the database. Runs take the pipeline's lease, renewed while they work, and
+check that no shard or adaptive run holds its own, so a refresh never overlaps a scheduled
+or hand-started pipeline run; it waits for that run to finish instead.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from backend.models.models import db, JobLease, RefreshJob
+from backend.utils.scheduler import Lease, default_owner, pipeline_conflicts, renewing
+
+# celery is optional; the Celery backend is only available when it is installed
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+LEASE_NAME = 'pipeline'  # shared with the scheduler and data_pipeline.py
+
+def pending_key(symbol):
+    """What identical requests have in common: the symbol, or '*' for every stock"""
+    return symbol or '*'
+
+class InProcessQueue:
+    """Runs jobs on a thread pool in this process; queued jobs are lost if it exits"""
+
+    def __init__(self, workers=1):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refresh-job')
+
+    def bind(self, run):
+        self.run = run
+
+    def submit(self, job_id):
+        self.pool.submit(self.run, job_id)
+
+class CeleryQueue:
+    """Sends job ids to Celery workers started with `celery -A backend.worker worker`"""
+
+    def __init__(self, broker_url):
+        if Celery is None:
+            raise RuntimeError('The Celery job queue backend requires the celery package')
+        self.celery = Celery('stock_sentiment', broker=broker_url)
+        self.celery.conf.task_acks_late = True  # a job whose worker dies is delivered again
+        self.celery.conf.worker_prefetch_multiplier = 1
+        self.task = None
+
+    def bind(self, run):
+        self.task = self.celery.task(name='refresh_data', ignore_result=True)(run)
+
+    def submit(self, job_id):
+        self.task.delay(job_id)
+
+class RefreshJobs:
+    """Queues refresh jobs and runs them in app's context"""
+
+    def __init__(self, app, queue, pending_timeout=3600, lease_wait=600, broadcaster=None):
+        self.app = app
+        self.queue = queue
+        self.pending_timeout = pending_timeout
+        self.lease_wait = lease_wait
+        self.broadcaster = broadcaster
+        queue.bind(self.run)
+
+    @classmethod
+    def from_config(cls, app, config, broadcaster=None):
+        """Build the job queue from the JOB_* settings"""
+        if config.JOB_QUEUE_BACKEND == 'celery':
+            queue = CeleryQueue(config.CELERY_BROKER_URL or config.REDIS_URL)
+        elif config.JOB_QUEUE_BACKEND == 'memory':
+            queue = InProcessQueue(config.JOB_WORKERS)
+        else:
+            raise ValueError(f"Unknown job queue backend '{config.JOB_QUEUE_BACKEND}', expected memory or celery")
+        return cls(app, queue, config.JOB_PENDING_TIMEOUT, config.JOB_LEASE_WAIT, broadcaster)
+
+    def expire_stale(self):
+        """
+        Fail jobs still queued after pending_timeout seconds (e.g. their process exited), so
+        they stop absorbing new requests; call inside an app context
+        """
+        now = datetime.utcnow()
+        return db.session.execute(
+            update(RefreshJob)
+            .where(RefreshJob.status == QUEUED,
+                   RefreshJob.created_at < now - timedelta(seconds=self.pending_timeout))
+            .values(status=FAILED, pending_key=None, finished_at=now,
+                    message='Expired before a worker picked it up')
+        ).rowcount
+
+    def enqueue(self, symbol=None):
+        """
+        The queued refresh of symbol (None: every stock), queuing one if there is none;
+        returns (job, created). Call inside an app context
+        """
+        key = pending_key(symbol)
+        self.expire_stale()
+        for _ in range(3):
+            existing = RefreshJob.query.filter_by(pending_key=key).first()
+            if existing is not None:
+                db.session.commit()
+                return existing, False
+
+            job = RefreshJob(symbol=symbol, status=QUEUED, pending_key=key)
+            db.session.add(job)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another request queued the same refresh first; it may even have started since
+                db.session.rollback()
+                continue
+
+            try:
+                self.queue.submit(job.id)
+            except Exception as e:
+                self._finish(job.id, FAILED, f'Could not queue job: {e}')
+                raise
+            return job, True
+        raise RuntimeError(f"Could not queue a refresh of {key}")
+
+    def get(self, job_id):
+        return db.session.get(RefreshJob, job_id)
+
+    def run(self, job_id):
+        """Claim a queued job and run the pipeline for it; what the queue's workers call"""
+        with self.app.app_context():
+            try:
+                self._run(job_id)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Refresh job {job_id} failed: {e}")
+                self._finish(job_id, FAILED, f'{type(e).__name__}: {e}')
+            finally:
+                db.session.remove()
+
+    def _run(self, job_id):
+        # Nobody else runs it, even if the queue delivers it twice
+        claimed = db.session.execute(
+            update(RefreshJob)
+            .where(RefreshJob.id == job_id, RefreshJob.status == QUEUED)
+            .values(status=RUNNING, pending_key=None, started_at=datetime.utcnow(),
+                    message='Waiting for the pipeline')
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            print(f"Refresh job {job_id} is no longer queued")
+            return
+        symbol = self.get(job_id).symbol
+
+        JobLease.__table__.create(db.engine, checkfirst=True)
+        # Owned by the job, not the process, so jobs on other threads here wait too
+        lease = Lease(LEASE_NAME, ttl=600, owner=f'{default_owner()}:job-{job_id}')
+        deadline = time.monotonic() + self.lease_wait
+        while True:
+            if lease.acquire():
+                # Shards and adaptive runs hold leases of their own
+                busy = lease.conflicts(pipeline_conflicts(LEASE_NAME))
+                if not busy:
+                    break
+                lease.release()
+                running = f'{busy[0].name} on {busy[0].owner}'
+            else:
+                running = f'{LEASE_NAME} on {lease.holder()}'
+            if time.monotonic() >= deadline:
+                self._finish(job_id, SKIPPED, f'The pipeline is still running ({running})')
+                return
+            time.sleep(5)
+
+        try:
+            # Imported here: the pipeline lives in the project root, next to the other scripts
+            from data_pipeline import build_pipeline, run_pipeline
+
+            symbols = [symbol] if symbol else None
+            total = len(build_pipeline(symbols=symbols).stages)
+            finished = []
+
+            def on_stage(result):
+                finished.append(result.name)
+                self._progress(job_id, len(finished) / total, f'{result.name} {result.status}')
+
+            self._progress(job_id, 0.0, 'Started')
+            if self.broadcaster:
+                # This process's poller may already follow the log; don't skip what it hasn't read
+                self.broadcaster.follow()
+            with renewing(lease, self.app):
+                run_pipeline(self.app, self.broadcaster, symbols, on_stage)
+            self._finish(job_id, SUCCEEDED, 'Refreshed ' + (symbol or 'all stocks'))
+        finally:
+            lease.release()
+
+    def _progress(self, job_id, progress, message):
+        db.session.execute(
+            update(RefreshJob).where(RefreshJob.id == job_id).values(progress=progress, message=message)
+        )
+        db.session.commit()
+
+    def _finish(self, job_id, status, message):
+        db.session.execute(
+            update(RefreshJob).where(RefreshJob.id == job_id)
+            .values(status=status, pending_key=None, message=message[:500], finished_at=datetime.utcnow(),
+                    **({'progress': 1.0} if status == SUCCEEDED else {}))
+        )
+        db.session.commit()
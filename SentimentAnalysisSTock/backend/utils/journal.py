@@ -0,0 +1,166 @@
+"""
+Run journal for resumable data jobs
+A journaled run works through its symbols in chunks and commits each chunk's rows together
+with journal entries saying which (stage, symbol) pairs are done. If the run fails or the
+process dies, a run asked to resume (the scripts' --resume) picks up the open run of the
+same job over the same symbols on the same day, started within the resume window, and skips
+what is already done, so finished chunks cost no API calls or time a second time. Scheduled
+runs don't resume: each cycle starts over, so it fetches current data. Rows that fail to insert are skipped one by one instead of
+failing their whole chunk.
+"""
+
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from backend.models.models import db, JournalEntry, JournalRun
+
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+WHOLE_STAGE = '*'
+
+def scope_of(symbols, day=None):
+    """Identifies a run's day and set of symbols, whatever their order"""
+    day = day or date.today()
+    return hashlib.sha1(f"{day.isoformat()}:{','.join(sorted(symbols))}".encode()).hexdigest()
+
+def chunked(items, size):
+    for start in range(0, len(items), max(1, size)):
+        yield items[start:start + size]
+
+def add_rows(objects):
+    """
+    Add objects to the session and flush them; if that fails, add them one at a time, each
+    in its own savepoint, skipping the ones that fail. Returns how many were skipped
+    """
+    if not objects:
+        return 0
+    try:
+        with db.session.begin_nested():
+            db.session.add_all(objects)
+        return 0
+    except SQLAlchemyError as e:
+        print(f"Batch of {len(objects)} rows failed ({type(e).__name__}), adding them one by one")
+
+    skipped = 0
+    for obj in objects:
+        try:
+            with db.session.begin_nested():
+                db.session.add(obj)
+        except SQLAlchemyError as e:
+            skipped += 1
+            print(f"Skipped {obj.__class__.__name__} row: {str(e).splitlines()[0]}")
+    return skipped
+
+class Journal:
+    """The journal of one run; use it from any thread's app context"""
+
+    def __init__(self, run_id, job, symbols, done=None, resumed=False, chunk_size=20):
+        self.run_id = run_id
+        self.job = job
+        self.symbols = list(symbols)
+        self.resumed = resumed
+        self.chunk_size = chunk_size
+        self._done = done or {}  # {stage: {symbol}}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def untracked(cls, symbols, chunk_size=20):
+        """Commits in chunks like a journaled run, but records nothing and can't be resumed"""
+        return cls(None, None, symbols, chunk_size=chunk_size)
+
+    @classmethod
+    def open(cls, job, symbols, resume=False, resume_window=6 * 3600, chunk_size=20):
+        """
+        Start a new run of job, or with resume, pick up the latest unfinished one over the same
+        symbols if it started today within resume_window seconds; call inside an app context.
+        A run doesn't carry over midnight, since what it writes is dated the day it runs
+        """
+        JournalRun.__table__.create(db.engine, checkfirst=True)
+        JournalEntry.__table__.create(db.engine, checkfirst=True)
+        scope = scope_of(symbols)
+        run = None
+        if resume:
+            run = JournalRun.query\
+                .filter(JournalRun.job == job, JournalRun.scope == scope,
+                        JournalRun.status.in_((RUNNING, FAILED)),
+                        JournalRun.started_at >= datetime.utcnow() - timedelta(seconds=resume_window))\
+                .order_by(JournalRun.started_at.desc())\
+                .first()
+
+        if run is None:
+            run = JournalRun(job=job, scope=scope, status=RUNNING)
+            db.session.add(run)
+            db.session.commit()
+            return cls(run.id, job, symbols, chunk_size=chunk_size)
+
+        done = {}
+        for stage, symbol in db.session.execute(
+                select(JournalEntry.stage, JournalEntry.symbol).where(JournalEntry.run_id == run.id)):
+            done.setdefault(stage, set()).add(symbol)
+        run.status = RUNNING
+        run.error = None
+        db.session.commit()
+        print(f"Resuming {job} run {run.id} from {run.started_at:%Y-%m-%d %H:%M:%S}: "
+              + (', '.join(f'{stage} {len(finished)}' for stage, finished in sorted(done.items())) or 'nothing done yet'))
+        return cls(run.id, job, symbols, done, resumed=True, chunk_size=chunk_size)
+
+    def is_done(self, stage, symbol=WHOLE_STAGE):
+        with self._lock:
+            return symbol in self._done.get(stage, ())
+
+    def pending(self, stage, symbols=None):
+        """The symbols stage still has to do, in order"""
+        with self._lock:
+            done = set(self._done.get(stage, ()))
+        return [symbol for symbol in (symbols if symbols is not None else self.symbols) if symbol not in done]
+
+    def mark(self, stage, symbols=(WHOLE_STAGE,)):
+        """Record stage as done for symbols in the current transaction; the caller commits"""
+        symbols = list(symbols)
+        if symbols and self.run_id is not None:
+            db.session.execute(insert(JournalEntry), [
+                {'run_id': self.run_id, 'stage': stage, 'symbol': symbol} for symbol in symbols])
+
+    def committed(self, stage, symbols=(WHOLE_STAGE,)):
+        """Note marks as durable once their transaction has committed"""
+        with self._lock:
+            self._done.setdefault(stage, set()).update(symbols)
+
+    def each_chunk(self, stage, work, symbols=None):
+        """
+        Call work(chunk) on the pending symbols of stage, chunk by chunk, committing each
+        chunk's rows together with its journal entries; returns work's results. A failing
+        chunk is rolled back and its error raised, leaving the chunks before it done
+        """
+        results = []
+        for chunk in chunked(self.pending(stage, symbols), self.chunk_size):
+            try:
+                results.append(work(chunk))
+                self.mark(stage, chunk)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            self.committed(stage, chunk)
+        return results
+
+    def finish(self, error=None):
+        """Close the run as completed, or leave it failed (and resumable) with error"""
+        if self.run_id is None:
+            return
+        run = db.session.get(JournalRun, self.run_id)
+        run.status = FAILED if error else COMPLETED
+        run.error = error
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+
+def prune(days):
+    """Delete finished runs older than days and their entries; the caller commits"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    old = select(JournalRun.id).where(JournalRun.started_at < cutoff)
+    db.session.execute(delete(JournalEntry).where(JournalEntry.run_id.in_(old)))
+    return db.session.execute(delete(JournalRun).where(JournalRun.started_at < cutoff)).rowcount
@@ -0,0 +1,171 @@
+"""
+Request metrics in the Prometheus text format
+Per-route latency histograms and status counts, plus the number of SQL statements each
+request ran and the time spent in them, counted with SQLAlchemy engine events. Requests
+that run more statements than the configured limit are logged, which is how N+1 query
+patterns show up. Metrics are kept per process.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+QUERY_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class QueryStats:
+    """SQL statements run on behalf of one request"""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# The request being served in this thread or task; None outside requests
+_current = ContextVar('query_stats', default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    started = getattr(context, '_query_started', None)
+    if started is not None:
+        stats.seconds += time.perf_counter() - started
+
+def enable_query_tracking():
+    """Count statements on every engine, sync and async (idempotent)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket and made cumulative on export"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    """Render labels as k="v" pairs, escaped per the exposition format"""
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+class RequestTimer:
+    """Start time and SQL statistics of one request in flight"""
+    __slots__ = ('started', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = QueryStats()
+
+class RequestMetrics:
+    """Per-route request and SQL metrics of this process"""
+
+    def __init__(self, query_log_threshold=10):
+        self.query_log_threshold = query_log_threshold
+        self._lock = threading.Lock()
+        self._requests = {}      # (method, route, status) -> count
+        self._latency = {}       # (method, route) -> Histogram
+        self._queries = {}       # route -> Histogram of statements per request
+        self._query_time = {}    # route -> Histogram of SQL seconds per request
+        self._over_limit = {}    # route -> requests over query_log_threshold
+
+    def start(self):
+        """Call when a request starts; SQL run in this thread or task counts towards it until finish()"""
+        timer = RequestTimer()
+        _current.set(timer.queries)
+        return timer
+
+    def finish(self, timer, method, route, path, status):
+        """Record a finished request"""
+        _current.set(None)
+        seconds = time.perf_counter() - timer.started
+        queries = timer.queries
+        over_limit = queries.count > self.query_log_threshold
+
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._latency, (method, route), LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self._queries, route, QUERY_COUNT_BUCKETS).observe(queries.count)
+            self._histogram(self._query_time, route, QUERY_TIME_BUCKETS).observe(queries.seconds)
+            if over_limit:
+                self._over_limit[route] = self._over_limit.get(route, 0) + 1
+
+        if over_limit:
+            print(f"{method} {path} ran {queries.count} SQL queries in {queries.seconds * 1000:.1f} ms "
+                  f"(limit {self.query_log_threshold}, request {seconds * 1000:.1f} ms)")
+
+    @staticmethod
+    def _histogram(histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    def route_stats(self):
+        """{route: (requests, SQL statements, SQL seconds)} so far, e.g. to diff around a load test"""
+        with self._lock:
+            return {
+                route: (queries.count, queries.sum, self._query_time[route].sum)
+                for route, queries in self._queries.items()
+            }
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram_lines(name, help_text, histograms, label_names):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for key, histogram in sorted(histograms.items()):
+                values = key if isinstance(key, tuple) else (key,)
+                labels = _labels(**dict(zip(label_names, values)))
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        with self._lock:
+            lines.append('# HELP http_requests_total Requests served, by route and status')
+            lines.append('# TYPE http_requests_total counter')
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}')
+
+            histogram_lines('http_request_duration_seconds', 'Request latency',
+                            self._latency, ('method', 'route'))
+            histogram_lines('db_queries_per_request', 'SQL statements run by one request',
+                            self._queries, ('route',))
+            histogram_lines('db_query_seconds_per_request', 'Time one request spent in SQL statements',
+                            self._query_time, ('route',))
+
+            lines.append('# HELP http_requests_over_query_limit_total Requests that ran more SQL '
+                         'statements than METRICS_QUERY_LOG_THRESHOLD')
+            lines.append('# TYPE http_requests_over_query_limit_total counter')
+            for route, count in sorted(self._over_limit.items()):
+                lines.append(f'http_requests_over_query_limit_total{{{_labels(route=route)}}} {count}')
+
+        return '\n'.join(lines) + '\n'
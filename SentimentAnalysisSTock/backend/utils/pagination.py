@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+
+def encode_cursor(posted_at, post_id):
+    """Encode a (posted_at, id) keyset position as an opaque cursor string"""
+    raw = f"{posted_at.isoformat()}|{post_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into (posted_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        posted_at, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(posted_at), int(post_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def clamp_page_size(limit, default, maximum):
+    """Clamp a requested page size to the range [1, maximum]"""
+    if limit is None:
+        limit = default
+    return max(1, min(limit, maximum))
+
+def parse_fields(fields_param, allowed, always=(), default=None):
+    """
+    Parse a comma-separated fields= projection
+    Returns the requested fields in allowed order, plus any fields in always;
+    default (or every allowed field) when none are requested
+    """
+    if not fields_param:
+        return list(default if default is not None else allowed)
+
+    requested = {f.strip() for f in fields_param.split(',') if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    requested.update(always)
+    return [f for f in allowed if f in requested]
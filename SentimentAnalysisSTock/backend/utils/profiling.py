@@ -0,0 +1,155 @@
+"""
+Opt-in per-request profiling
+A request is profiled when it carries the operator token in the X-Profile header, or when
+its endpoint is on the PROFILE_ENDPOINTS allowlist (sampled at PROFILE_SAMPLE_RATE). It
+runs under cProfile, or under pyinstrument's sampling profiler when that is selected and
+installed. The profile lands in PROFILE_DIR (.prof for pstats, .speedscope.json for
+pyinstrument) next to a .json file with the route, args and the timeline of SQL
+statements. Nothing is hooked in unless PROFILING_ENABLED is set.
+"""
+
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# pyinstrument is optional; without it requests are profiled with cProfile
+try:
+    import pyinstrument
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    pyinstrument = None
+
+HEADER = 'X-Profile'
+MAX_STATEMENT_LENGTH = 2000
+
+# SQL statements of the request being profiled in this thread; None otherwise
+_timeline = ContextVar('sql_timeline', default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _timeline.get() is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timeline = _timeline.get()
+    started = getattr(context, '_profile_started', None)
+    if timeline is None or started is None:
+        return
+    timeline.entries.append({
+        'offset_ms': round((started - timeline.started) * 1000, 3),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        'statement': statement[:MAX_STATEMENT_LENGTH],
+        'executemany': executemany
+    })
+
+class SQLTimeline:
+    __slots__ = ('started', 'entries')
+
+    def __init__(self, started):
+        self.started = started
+        self.entries = []
+
+class ProfileSession:
+    """One request being profiled"""
+
+    def __init__(self, profiler_name):
+        self.profiler_name = profiler_name
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.timeline = SQLTimeline(self.started)
+        _timeline.set(self.timeline)
+
+        if profiler_name == 'pyinstrument':
+            self.profiler = pyinstrument.Profiler(interval=0.001)
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler_name == 'pyinstrument':
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        _timeline.set(None)
+        return time.perf_counter() - self.started
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles"""
+
+    def __init__(self, directory, token=None, endpoints=(), sample_rate=1.0, profiler='cprofile'):
+        if profiler not in ('cprofile', 'pyinstrument'):
+            raise ValueError(f"Unknown profiler '{profiler}', expected cprofile or pyinstrument")
+        if profiler == 'pyinstrument' and pyinstrument is None:
+            print("pyinstrument is not installed, profiling with cProfile")
+            profiler = 'cprofile'
+
+        self.directory = directory
+        self.token = token
+        self.endpoints = set(endpoints)
+        self.sample_rate = sample_rate
+        self.profiler = profiler
+        self._sequence = itertools.count(1)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a profiler from the PROFILE_* settings"""
+        return cls(config.PROFILE_DIR, config.PROFILING_TOKEN, config.PROFILE_ENDPOINTS,
+                   config.PROFILE_SAMPLE_RATE, config.PROFILER)
+
+    def wants(self, endpoint, header_value):
+        """Whether to profile a request to endpoint that sent header_value in X-Profile"""
+        if header_value and self.token and hmac.compare_digest(header_value, self.token):
+            return True
+        return endpoint in self.endpoints and random.random() < self.sample_rate
+
+    def start(self):
+        return ProfileSession(self.profiler)
+
+    def finish(self, session, details):
+        """
+        Stop profiling and write the profile and its metadata
+        details holds the request fields (endpoint, route, method, path, args, status);
+        returns the profile id, the shared file name stem
+        """
+        duration = session.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        endpoint = (details.get('endpoint') or 'unmatched').replace('.', '_')
+        profile_id = (f"{session.started_at.strftime('%Y%m%dT%H%M%S')}-{endpoint}"
+                      f"-{os.getpid()}-{next(self._sequence)}")
+        stem = os.path.join(self.directory, profile_id)
+
+        if session.profiler_name == 'pyinstrument':
+            profile_file = f'{stem}.speedscope.json'
+            with open(profile_file, 'w') as f:
+                f.write(session.profiler.output(SpeedscopeRenderer()))
+        else:
+            profile_file = f'{stem}.prof'
+            session.profiler.dump_stats(profile_file)
+
+        sql = session.timeline.entries
+        metadata = dict(details,
+                        profile_id=profile_id,
+                        profiler=session.profiler_name,
+                        profile_file=os.path.basename(profile_file),
+                        started_at=session.started_at.isoformat(),
+                        duration_ms=round(duration * 1000, 3),
+                        sql_count=len(sql),
+                        sql_ms=round(sum(entry['duration_ms'] for entry in sql), 3),
+                        sql=sql)
+        with open(f'{stem}.json', 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+        return profile_id
@@ -0,0 +1,236 @@
+"""
+Per-client rate limiting and load shedding for the API
+Every request draws one token from a bucket keyed by (client IP, cost class). Buckets
+live in memory by default, or in Redis so all workers share them. Independently, the
+number of requests in flight is capped per process, per client and per cost class;
+requests over a cap are rejected immediately (429 for one client's excess, 503 when
+the process is saturated) rather than waiting in line behind slow queries.
+"""
+
+import math
+import threading
+import time
+import ipaddress
+from collections import OrderedDict
+from functools import lru_cache
+from flask import request
+from backend.config.config import Config
+
+# redis is optional; the Redis backend is only available when it is installed
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Endpoints outside the default class; anything unlisted costs 'default'
+COST_CLASSES = {
+    'api.compare_stocks': 'heavy',
+    'api.get_comparison_metrics': 'heavy',
+    'api.get_correlation_analytics': 'heavy',
+    'api.get_correlation_matrix_view': 'heavy',
+    'api.vote_on_prediction': 'write',
+    'api.refresh_data': 'write',
+}
+
+# Never limited, so load balancers can always reach them
+EXEMPT_ENDPOINTS = {'api.health_check', 'api.get_metrics'}
+
+@lru_cache(maxsize=8)
+def _networks(trusted_proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies)
+
+def is_trusted_proxy(address, trusted_proxies):
+    """Whether address is one of trusted_proxies (addresses or CIDR ranges)"""
+    try:
+        address = ipaddress.ip_address(address)
+    except (TypeError, ValueError):
+        return False
+    return any(address in network for network in _networks(tuple(trusted_proxies)))
+
+def client_ip(req=None, trusted_proxies=None):
+    """
+    Client address of a Flask or Quart request (default: the current Flask one). The
+    X-Real-IP header is only believed when the peer is one of TRUSTED_PROXIES, since
+    anyone else could send a new one with every request
+    """
+    req = req if req is not None else request
+    trusted_proxies = trusted_proxies if trusted_proxies is not None else Config.TRUSTED_PROXIES
+    forwarded = req.headers.get('X-Real-IP')
+    if forwarded and is_trusted_proxy(req.remote_addr, trusted_proxies):
+        return forwarded.strip()
+    return req.remote_addr
+
+def parse_limit(spec):
+    """Parse 'rate:burst' (tokens per second, bucket size) into floats"""
+    rate, _, burst = spec.partition(':')
+    rate = float(rate)
+    burst = float(burst) if burst else max(rate, 1.0)
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Invalid rate limit '{spec}', expected 'rate:burst' with rate > 0 and burst >= 1")
+    return rate, burst
+
+class MemoryBucketStore:
+    """Token buckets in a bounded in-process LRU dict"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """Take cost tokens; returns (allowed, tokens left, seconds until allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+class RedisBucketStore:
+    """Token buckets in Redis, updated atomically by a Lua script and shared by all workers"""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        if redis is None:
+            raise RuntimeError('The Redis rate limit backend requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst, cost=1):
+        """Take cost tokens; returns (allowed, tokens left, seconds until allowed)"""
+        try:
+            allowed, tokens = self._script(
+                keys=[self.prefix + ':'.join(key)],
+                args=[rate, burst, time.time(), cost]
+            )
+        except redis.RedisError as e:
+            # Fail open: an unavailable Redis shouldn't take the API down with it
+            print(f"Rate limit backend error: {e}")
+            return True, burst, 0.0
+
+        tokens = float(tokens)
+        allowed = bool(allowed)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+class ConcurrencyLimiter:
+    """Non-blocking in-flight counters; acquire() fails instead of waiting"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key=None):
+        with self._lock:
+            count = self._counts.get(key, 0)
+            if count >= self.limit:
+                return False
+            self._counts[key] = count + 1
+            return True
+
+    def release(self, key=None):
+        with self._lock:
+            count = self._counts.get(key, 0) - 1
+            if count > 0:
+                self._counts[key] = count
+            else:
+                self._counts.pop(key, None)
+
+    def in_flight(self, key=None):
+        return self._counts.get(key, 0)
+
+class Rejected(Exception):
+    """A request refused by the limiter, carrying its HTTP status and Retry-After"""
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class RateLimiter:
+    """Token buckets per (client, cost class) plus in-flight caps"""
+
+    def __init__(self, store, limits, max_concurrent, max_concurrent_per_client, class_concurrency):
+        self.store = store
+        self.limits = limits
+        self.total = ConcurrencyLimiter(max_concurrent)
+        self.per_client = ConcurrencyLimiter(max_concurrent_per_client)
+        self.per_class = {name: ConcurrencyLimiter(limit) for name, limit in class_concurrency.items()}
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a limiter from the RATE_LIMIT_* settings"""
+        if config.RATE_LIMIT_BACKEND == 'redis':
+            store = RedisBucketStore(config.RATE_LIMIT_REDIS_URL or config.REDIS_URL)
+        elif config.RATE_LIMIT_BACKEND == 'memory':
+            store = MemoryBucketStore()
+        else:
+            raise ValueError(f"Unknown rate limit backend '{config.RATE_LIMIT_BACKEND}', expected memory or redis")
+
+        limits = {name: parse_limit(spec) for name, spec in config.RATE_LIMITS.items()}
+        return cls(store, limits, config.MAX_CONCURRENT_REQUESTS,
+                   config.MAX_CONCURRENT_REQUESTS_PER_CLIENT, config.MAX_CONCURRENT_BY_CLASS)
+
+    def admit(self, client, cost_class):
+        """
+        Admit a request or raise Rejected
+        Returns the acquired slots (to pass to release) and the tokens left
+        """
+        rate, burst = self.limits.get(cost_class, self.limits['default'])
+        allowed, remaining, retry_after = self.store.take((client, cost_class), rate, burst)
+        if not allowed:
+            raise Rejected('Rate limit exceeded', 429, retry_after)
+
+        acquired = []
+        slots = [
+            (self.per_client, client, 'Too many concurrent requests', 429),
+            (self.per_class.get(cost_class), cost_class, 'Server busy', 503),
+            (self.total, None, 'Server busy', 503),
+        ]
+        for limiter, key, message, status in slots:
+            if limiter is None:
+                continue
+            if not limiter.acquire(key):
+                self.release(acquired)
+                raise Rejected(message, status, 1)
+            acquired.append((limiter, key))
+
+        return acquired, remaining
+
+    def release(self, acquired):
+        for limiter, key in acquired:
+            limiter.release(key)
+
+def retry_after_header(seconds):
+    """Retry-After takes whole seconds"""
+    return str(max(1, math.ceil(seconds)))
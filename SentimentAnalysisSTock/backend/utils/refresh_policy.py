@@ -0,0 +1,202 @@
+"""
+Activity-adaptive refresh scheduling
+Instead of refreshing every symbol every UPDATE_INTERVAL, each symbol gets its own interval
+from how active it is: its recent post velocity (sentiment_summary.post_count) and price
+volatility (stdev of daily close-to-close returns), each relative to the median symbol.
+Hot symbols are refreshed down to the minimum interval, cold ones up to the maximum, and all
+of them less often while the market is closed. Refreshing one symbol costs a few API calls
+(Reddit search, News API, Yahoo Finance); intervals are stretched so the plan fits the
+hourly call budget, and a sliding one-hour count of calls actually made enforces it. The
+minimum and maximum intervals bound the final plan, off hours and stretching included.
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from datetime import date, datetime, time as clock, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+from backend.models.models import db, SentimentSummary, StockPrice
+
+# Reddit search, News API query and Yahoo Finance history per symbol refresh
+CALLS_PER_SYMBOL = 3
+
+# How much each signal counts towards a symbol's heat; 1.0 is the median symbol
+POST_WEIGHT = 0.7
+VOLATILITY_WEIGHT = 0.3
+
+def post_velocity(symbols, days=7, today=None):
+    """
+    {symbol: posts per day}: the larger of the average over the last days and the latest
+    day, so a symbol that just started trending counts as hot right away
+    """
+    today = today or date.today()
+    rows = db.session.query(SentimentSummary.symbol, SentimentSummary.date, SentimentSummary.post_count)\
+        .filter(SentimentSummary.symbol.in_(symbols))\
+        .filter(SentimentSummary.date > today - timedelta(days=days))\
+        .order_by(SentimentSummary.symbol, SentimentSummary.date)\
+        .all()
+
+    totals, latest = {}, {}
+    for symbol, _, post_count in rows:
+        totals[symbol] = totals.get(symbol, 0) + post_count
+        latest[symbol] = post_count
+    return {symbol: max(totals.get(symbol, 0) / days, latest.get(symbol, 0)) for symbol in symbols}
+
+def volatility(symbols, days=30, today=None):
+    """{symbol: stdev of daily log returns} over the last days of closes; 0 without enough data"""
+    today = today or date.today()
+    rows = db.session.query(StockPrice.symbol, StockPrice.close_price)\
+        .filter(StockPrice.symbol.in_(symbols))\
+        .filter(StockPrice.date > today - timedelta(days=days))\
+        .order_by(StockPrice.symbol, StockPrice.date)\
+        .all()
+
+    closes = {}
+    for symbol, close_price in rows:
+        if close_price and close_price > 0:
+            closes.setdefault(symbol, []).append(close_price)
+    result = {}
+    for symbol in symbols:
+        series = closes.get(symbol, [])
+        result[symbol] = float(np.std(np.diff(np.log(series)))) if len(series) > 2 else 0.0
+    return result
+
+def relative(values):
+    """Each value over the median of the positive ones (1.0 when there are none)"""
+    positive = [value for value in values.values() if value > 0]
+    median = float(np.median(positive)) if positive else 0.0
+    return {key: value / median if median else 1.0 for key, value in values.items()}
+
+class MarketHours:
+    """Regular trading hours on weekdays in the exchange's time zone; holidays are not known"""
+
+    def __init__(self, timezone='America/New_York', opens='09:30', closes='16:00'):
+        self.timezone = ZoneInfo(timezone)
+        self.opens = clock.fromisoformat(opens)
+        self.closes = clock.fromisoformat(closes)
+
+    def is_open(self, when=None):
+        local = datetime.fromtimestamp(when if when is not None else time.time(), self.timezone)
+        return local.weekday() < 5 and self.opens <= local.time() < self.closes
+
+class AdaptiveRefresh:
+    """
+    Refreshes each symbol when its own interval has passed; call it every few seconds (it is
+    the scheduler's 'adaptive' job). refresh(symbols) does the work, e.g. runs the pipeline
+    """
+
+    def __init__(self, symbols, refresh, base_interval=300, min_interval=60, max_interval=3600,
+                 off_hours_factor=4.0, calls_per_hour=1000, replan_interval=600, market=None):
+        self.symbols = list(symbols)
+        self.refresh = refresh
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.off_hours_factor = off_hours_factor
+        self.calls_per_hour = calls_per_hour
+        self.replan_interval = replan_interval
+        self.market = market or MarketHours()
+        self.intervals = {}
+        self.heat = {}
+        self.next_due = {}
+        self.last_refresh = {}
+        self.planned_at = None
+        self._calls = deque()  # (timestamp, calls) over the last hour
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, symbols, refresh):
+        """Build the policy from the ADAPTIVE_REFRESH_* and MARKET_* settings"""
+        return cls(symbols, refresh,
+                   base_interval=config.UPDATE_INTERVAL,
+                   min_interval=config.ADAPTIVE_REFRESH_MIN_INTERVAL,
+                   max_interval=config.ADAPTIVE_REFRESH_MAX_INTERVAL,
+                   off_hours_factor=config.ADAPTIVE_REFRESH_OFF_HOURS_FACTOR,
+                   calls_per_hour=config.REFRESH_API_CALLS_PER_HOUR,
+                   replan_interval=config.ADAPTIVE_REFRESH_REPLAN_INTERVAL,
+                   market=MarketHours(config.MARKET_TIMEZONE, config.MARKET_OPEN, config.MARKET_CLOSE))
+
+    def plan(self, now=None):
+        """{symbol: seconds between refreshes} from current activity; call inside an app context"""
+        now = now if now is not None else time.time()
+        posts = relative(post_velocity(self.symbols))
+        moves = relative(volatility(self.symbols))
+        self.heat = {symbol: POST_WEIGHT * posts[symbol] + VOLATILITY_WEIGHT * moves[symbol]
+                     for symbol in self.symbols}
+
+        factor = 1.0 if self.market.is_open(now) else self.off_hours_factor
+        intervals = {symbol: factor * self.base_interval / max(heat, 1e-6) for symbol, heat in self.heat.items()}
+
+        # Stretch every interval alike until the plan fits the budget
+        planned_calls = sum(3600 / interval for interval in intervals.values()) * CALLS_PER_SYMBOL
+        if planned_calls > self.calls_per_hour > 0:
+            stretch = planned_calls / self.calls_per_hour
+            intervals = {symbol: interval * stretch for symbol, interval in intervals.items()}
+
+        # Clamp last, so the bounds hold off hours too; if the maximum keeps the plan over
+        # budget, due() holds symbols back instead
+        intervals = {symbol: min(self.max_interval, max(self.min_interval, interval))
+                     for symbol, interval in intervals.items()}
+
+        # A symbol that just got hotter shouldn't wait out the longer interval it had before
+        for symbol, interval in intervals.items():
+            if symbol in self.last_refresh:
+                self.next_due[symbol] = min(self.next_due.get(symbol, now), self.last_refresh[symbol] + interval)
+
+        self.intervals = intervals
+        self.planned_at = now
+        return intervals
+
+    def calls_last_hour(self, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            while self._calls and self._calls[0][0] <= now - 3600:
+                self._calls.popleft()
+            return sum(calls for _, calls in self._calls)
+
+    def due(self, now=None):
+        """Symbols due for a refresh that the budget still allows, hottest first"""
+        now = now if now is not None else time.time()
+        due = sorted((symbol for symbol in self.symbols if self.next_due.get(symbol, 0) <= now),
+                     key=lambda symbol: -self.heat.get(symbol, 0))
+        if self.calls_per_hour > 0:
+            left = self.calls_per_hour - self.calls_last_hour(now)
+            due = due[:max(0, math.floor(left / CALLS_PER_SYMBOL))]
+        return due
+
+    def __call__(self):
+        now = time.time()
+        if self.planned_at is None or now - self.planned_at >= self.replan_interval:
+            self.plan(now)
+
+        symbols = self.due(now)
+        if not symbols:
+            return []
+        with self._lock:
+            self._calls.append((now, len(symbols) * CALLS_PER_SYMBOL))
+        try:
+            self.refresh(symbols)
+        finally:
+            # Even after a failure, so a failing symbol isn't retried (and billed) every tick
+            for symbol in symbols:
+                self.last_refresh[symbol] = now
+                self.next_due[symbol] = now + self.intervals[symbol]
+        return symbols
+
+    def status(self):
+        return {
+            'calls_last_hour': self.calls_last_hour(),
+            'calls_per_hour': self.calls_per_hour,
+            'market_open': self.market.is_open(),
+            'symbols': {
+                symbol: {
+                    'heat': round(self.heat.get(symbol, 0), 3),
+                    'interval': round(self.intervals[symbol]) if symbol in self.intervals else None,
+                    'next_due': datetime.fromtimestamp(self.next_due[symbol]).isoformat(timespec='seconds')
+                                if symbol in self.next_due else None
+                }
+                for symbol in self.symbols
+            }
+        }
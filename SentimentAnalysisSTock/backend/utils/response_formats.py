@@ -0,0 +1,125 @@
+"""
+Negotiated encodings for time-series responses
+Clients pick a format with ?format= or the Accept header:
+  json      records (default, unchanged from before)
+  columnar  JSON with one array per field
+  msgpack   the columnar layout packed as MessagePack
+  arrow     an Arrow IPC stream, envelope fields in the schema metadata
+"""
+
+from datetime import date, datetime
+from flask import Response, request
+from backend.utils.serializers import dumps, rows_to_records
+
+# msgpack and pyarrow are optional; their formats answer 406 when missing
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+MIMETYPES = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.columnar+json',
+    'msgpack': 'application/x-msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+class UnsupportedFormat(Exception):
+    """Raised when the requested format is unknown or its library isn't installed"""
+
+    def __init__(self, message, status=406):
+        super().__init__(message)
+        self.status = status
+
+def select_format(fmt, accept_mimetypes):
+    """Resolve a ?format= value (or None) and an Accept header to a supported format"""
+    if fmt is None:
+        # JSON is listed first so */* and missing Accept headers keep today's output
+        best = accept_mimetypes.best_match(list(MIMETYPES.values()), default='application/json')
+        fmt = next(name for name, mime in MIMETYPES.items() if mime == best)
+
+    if fmt not in MIMETYPES:
+        raise UnsupportedFormat(f"Unknown format '{fmt}', expected one of: {', '.join(MIMETYPES)}", 400)
+    if fmt == 'msgpack' and msgpack is None:
+        raise UnsupportedFormat('MessagePack support requires the msgpack package')
+    if fmt == 'arrow' and pa is None:
+        raise UnsupportedFormat('Arrow support requires the pyarrow package')
+
+    return fmt
+
+def negotiate_format():
+    """Pick the response format from ?format= or the Accept header"""
+    return select_format(request.args.get('format'), request.accept_mimetypes)
+
+def rows_to_columns(columns, rows):
+    """Transpose Core row tuples into a dict of parallel lists"""
+    if not rows:
+        return {c: [] for c in columns}
+    return {c: list(values) for c, values in zip(columns, zip(*rows))}
+
+def _plain(value):
+    """Convert dates to ISO strings for encoders without a date type"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+# The *_body functions return (body bytes, mimetype) so the async API can reuse them
+
+def encode_body(payload, fmt):
+    """Encode an already-shaped payload (records or columnar)"""
+    if fmt == 'msgpack':
+        return msgpack.packb(_plain(payload), use_bin_type=True), MIMETYPES[fmt]
+    return dumps(payload), MIMETYPES[fmt]
+
+def arrow_body(columns, rows, metadata=None):
+    """Encode row tuples as a single-batch Arrow IPC stream"""
+    table = pa.table(rows_to_columns(columns, rows))
+    if metadata:
+        table = table.replace_schema_metadata({k: dumps(v) for k, v in metadata.items()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes(), MIMETYPES['arrow']
+
+def table_body(envelope, key, columns, rows, fmt):
+    """
+    Encode one table of rows in the negotiated format
+    `envelope` holds the non-tabular fields (e.g. symbol); the table goes under `key`
+    """
+    if fmt == 'arrow':
+        return arrow_body(columns, rows, metadata=envelope)
+
+    payload = dict(envelope)
+    if fmt == 'json':
+        payload[key] = rows_to_records(columns, rows)
+    else:
+        payload[key] = rows_to_columns(columns, rows)
+        payload['format'] = 'columnar'
+
+    return encode_body(payload, fmt)
+
+def encode(payload, fmt):
+    """Encode an already-shaped payload (records or columnar) as a response"""
+    body, mimetype = encode_body(payload, fmt)
+    return Response(body, mimetype=mimetype)
+
+def arrow_response(columns, rows, metadata=None):
+    """Respond with row tuples as a single-batch Arrow IPC stream"""
+    body, mimetype = arrow_body(columns, rows, metadata)
+    return Response(body, mimetype=mimetype)
+
+def table_response(envelope, key, columns, rows, fmt):
+    """Respond with one table of rows in the negotiated format"""
+    body, mimetype = table_body(envelope, key, columns, rows, fmt)
+    return Response(body, mimetype=mimetype)
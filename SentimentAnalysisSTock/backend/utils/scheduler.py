@@ -0,0 +1,302 @@
+"""
+Resident job scheduler
+Runs jobs at fixed intervals (with jitter, so processes started together drift apart) in a
+process that stays up, keeping the app, collectors and connection pool warm between runs.
+Each run holds a lease in the job_leases table, renewed while it works, so runs of the same
+job never overlap, whether across threads, scheduler processes or hosts sharing the
+database, or with the same script started by hand. Lag (how late a run started against
+its due time) is tracked per job and written with the rest of the status to a JSON file.
+Runs that touch the same data under different lease names (the whole pipeline and one of
+its shards) also check each other's leases, and stand down if one is held.
+"""
+
+import os
+import json
+import time
+import random
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from backend.models.models import db, JobLease
+
+def default_owner():
+    """Identifies this process in job_leases"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+class Lease:
+    """An expiring, renewable lock on one job name; call inside an app context"""
+
+    def __init__(self, name, ttl, owner=None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+
+    def acquire(self):
+        """Take the lease if it is free, expired or already ours; True on success"""
+        now = datetime.utcnow()
+        values = {'owner': self.owner, 'acquired_at': now, 'expires_at': now + timedelta(seconds=self.ttl)}
+        try:
+            taken = db.session.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name)
+                .where((JobLease.expires_at < now) | (JobLease.owner == self.owner))
+                .values(**values)
+            ).rowcount
+            if not taken:
+                db.session.execute(insert(JobLease).values(name=self.name, **values))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Someone else holds it
+            db.session.rollback()
+            return False
+
+    def renew(self):
+        """Push the expiry out by ttl; False if the lease was lost in the meantime"""
+        renewed = db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == self.name, JobLease.owner == self.owner)
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+        ).rowcount
+        db.session.commit()
+        return bool(renewed)
+
+    def release(self):
+        db.session.execute(delete(JobLease).where(JobLease.name == self.name, JobLease.owner == self.owner))
+        db.session.commit()
+
+    def holder(self):
+        lease = db.session.get(JobLease, self.name)
+        return lease.owner if lease is not None else None
+
+    def conflicts(self, patterns):
+        """Unexpired leases other than this one whose names match patterns (SQL LIKE)"""
+        if not patterns:
+            return []
+        return JobLease.query.filter(JobLease.name != self.name,
+                                     JobLease.expires_at >= datetime.utcnow(),
+                                     or_(*[JobLease.name.like(pattern) for pattern in patterns])).all()
+
+def pipeline_conflicts(name):
+    """
+    Lease names (LIKE patterns) a pipeline run holding lease name must not overlap: a run
+    over every stock conflicts with every other pipeline run, including shards and adaptive
+    refreshes, and a shard's run ('pipeline:i/N') with those over every stock
+    """
+    if ':' in name:
+        return ('pipeline', 'adaptive')
+    return ('pipeline', 'pipeline:%', 'adaptive', 'adaptive:%')
+
+@contextmanager
+def renewing(lease, app=None):
+    """Renew lease every ttl/3 seconds from a background thread while the block runs"""
+    app = app or current_app._get_current_object()
+    done = threading.Event()
+
+    def renew():
+        while not done.wait(lease.ttl / 3):
+            try:
+                with app.app_context():
+                    if not lease.renew():
+                        print(f"Job {lease.name} lost its lease")
+            except Exception as e:
+                print(f"Could not renew lease of {lease.name}: {e}")
+
+    renewer = threading.Thread(target=renew, name=f'lease-{lease.name}', daemon=True)
+    renewer.start()
+    try:
+        yield lease
+    finally:
+        done.set()
+        renewer.join()
+
+def run_exclusively(name, func, ttl=600, conflicts=()):
+    """
+    Run func under the named job's lease, renewed while it runs, as a scheduler run would,
+    e.g. from a script started by hand or by cron; returns False without running it if the
+    lease, or one matching conflicts, is held
+    """
+    JobLease.__table__.create(db.engine, checkfirst=True)
+    lease = Lease(name, ttl)
+    if not lease.acquire():
+        print(f"Not running {name}: already running on {lease.holder()}")
+        return False
+    try:
+        busy = lease.conflicts(conflicts)
+        if busy:
+            print(f"Not running {name}: {busy[0].name} is running on {busy[0].owner}")
+            return False
+        with renewing(lease):
+            func()
+    finally:
+        lease.release()
+    return True
+
+class Job:
+    """
+    A function to run every interval seconds, give or take jitter (a fraction of interval);
+    details, if given, returns extra status to report for the job. A run is skipped while a
+    lease matching conflicts (see Lease.conflicts) is held
+    """
+
+    def __init__(self, name, func, interval, jitter=0.1, lease_ttl=None, details=None, conflicts=()):
+        self.name = name
+        self.func = func
+        self.details = details
+        self.conflicts = conflicts
+        self.interval = interval
+        self.jitter = jitter
+        self.lease_ttl = lease_ttl or max(60, interval)
+        # Status
+        self.due = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_status = None
+        self.last_started = None
+        self.last_seconds = None
+        self.last_lag = None
+        self.max_lag = 0.0
+        self.last_error = None
+
+    def next_interval(self):
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def to_dict(self):
+        return {
+            'interval': self.interval,
+            'running': self.running,
+            'next_due': datetime.fromtimestamp(self.due).isoformat(timespec='seconds') if self.due else None,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'last_status': self.last_status,
+            'last_started': self.last_started,
+            'last_seconds': self.last_seconds,
+            'last_lag': self.last_lag,
+            'max_lag': round(self.max_lag, 3),
+            'last_error': self.last_error,
+            'details': self.details() if self.details else None
+        }
+
+class Scheduler:
+    """Runs jobs on their own threads in app's context until stop() is called"""
+
+    def __init__(self, app, jobs, status_file=None, owner=None):
+        self.app = app
+        self.jobs = {job.name: job for job in jobs}
+        self.status_file = status_file
+        self.owner = owner or default_owner()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def run(self, run_now=True):
+        """Block, starting each job when it is due; returns once stop() has been called"""
+        now = time.time()
+        for job in self.jobs.values():
+            # Without run_now, spread the first runs over one interval
+            job.due = now if run_now else now + random.uniform(0, job.interval)
+        print(f"Scheduler {self.owner} started: " + ', '.join(
+            f'{job.name} every {job.interval}s' for job in self.jobs.values()))
+
+        while not self._stop.is_set():
+            now = time.time()
+            for job in self.jobs.values():
+                if job.due <= now and not job.running:
+                    job.running = True
+                    thread = threading.Thread(target=self._run_job, args=(job, job.due),
+                                              name=f'job-{job.name}', daemon=True)
+                    self._threads.append(thread)
+                    thread.start()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            waits = [job.due - now for job in self.jobs.values() if not job.running]
+            self._stop.wait(min([1.0] + [max(0.05, wait) for wait in waits]))
+
+        for thread in self._threads:
+            thread.join()
+        print("Scheduler stopped")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_job(self, job, due):
+        started = time.time()
+        lag = started - due
+        lease = Lease(job.name, job.lease_ttl, self.owner)
+        try:
+            with self.app.app_context():
+                if not lease.acquire():
+                    job.skipped += 1
+                    job.last_status = 'skipped'
+                    print(f"Job {job.name} skipped: lease held by {lease.holder()}")
+                    return
+                busy = lease.conflicts(job.conflicts)
+                if busy:
+                    lease.release()
+                    job.skipped += 1
+                    job.last_status = 'skipped'
+                    print(f"Job {job.name} skipped: {busy[0].name} is running on {busy[0].owner}")
+                    return
+
+            job.last_started = datetime.fromtimestamp(started).isoformat(timespec='seconds')
+            job.last_lag = round(lag, 3)
+            job.max_lag = max(job.max_lag, lag)
+            try:
+                with renewing(lease, self.app), self.app.app_context():
+                    job.func()
+                job.last_status = 'succeeded'
+                job.last_error = None
+            except Exception as e:
+                job.failures += 1
+                job.last_status = 'failed'
+                job.last_error = f'{type(e).__name__}: {e}'
+                print(f"Job {job.name} failed: {job.last_error}")
+            finally:
+                with self.app.app_context():
+                    lease.release()
+
+            job.runs += 1
+            job.last_seconds = round(time.time() - started, 3)
+            print(f"Job {job.name} {job.last_status} in {job.last_seconds:.2f}s (started {lag:.2f}s late)")
+        except Exception as e:
+            # Lease bookkeeping itself failed (e.g. the database is down); try again next time
+            job.failures += 1
+            job.last_status = 'failed'
+            job.last_error = f'{type(e).__name__}: {e}'
+            print(f"Job {job.name} could not run: {job.last_error}")
+        finally:
+            # The next run is due an interval after this one was; runs missed while this one
+            # overran are dropped rather than started back to back
+            job.due = due + job.next_interval()
+            if job.due < time.time():
+                job.due = time.time() + job.next_interval() * 0.1
+            job.running = False
+            self.write_status()
+
+    def status(self):
+        return {
+            'owner': self.owner,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'jobs': {name: job.to_dict() for name, job in self.jobs.items()}
+        }
+
+    def write_status(self):
+        if not self.status_file:
+            return
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.status_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                partial = f'{self.status_file}.tmp'
+                with open(partial, 'w') as f:
+                    json.dump(self.status(), f, indent=2)
+                os.replace(partial, self.status_file)
+            except OSError as e:
+                print(f"Could not write scheduler status: {e}")
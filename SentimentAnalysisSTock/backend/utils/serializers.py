@@ -0,0 +1,36 @@
+import json
+from datetime import date, datetime
+from flask import Response
+
+# orjson is optional; it serializes dates natively and is several times
+# faster than the standard library encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    """Fallback encoder for values the standard json module can't handle"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload):
+    """
+    Serialize a payload to JSON bytes
+    Keys are sorted and separators are compact to match Flask's jsonify output
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(payload, default=_default, sort_keys=True,
+                      separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Build a Flask JSON response using the fast encoder"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+def rows_to_records(columns, rows):
+    """Turn Core row tuples into a list of dicts keyed by column name"""
+    return [dict(zip(columns, row)) for row in rows]
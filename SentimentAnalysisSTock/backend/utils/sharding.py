@@ -0,0 +1,133 @@
+"""
+Splitting the tracked symbols between pipeline workers
+A shard is written 'i/N' (1 <= i <= N). With the 'hash' strategy each symbol goes to the
+shard with the highest hash of (symbol, shard), i.e. rendezvous hashing: every worker works
+out the same split on its own, shards stay balanced, and going from N to N+1 shards moves
+only about 1/(N+1) of the symbols. The 'range' strategy cuts the sorted symbols into N
+contiguous, equally sized ranges instead, which is easier to read but reshuffles everything
+when N changes. Each sharded worker writes its status to a file that run_shards.py merges.
+"""
+
+import os
+import json
+import time
+import socket
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+
+STRATEGIES = ('hash', 'range')
+
+def parse_shard(value):
+    """(index, count) from 'i/N', with 1 <= i <= N; raises ValueError otherwise"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Shard must look like i/N, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {value} is out of range, expected 1 <= i <= N")
+    return index, count
+
+def shard_name(index, count):
+    return f'{index}/{count}'
+
+def _weight(symbol, index):
+    digest = hashlib.blake2b(f'{symbol}:{index}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def shard_of(symbol, count):
+    """The shard (1-based) a symbol belongs to under the 'hash' strategy"""
+    return max(range(1, count + 1), key=lambda index: _weight(symbol, index))
+
+def shard_symbols(symbols, index, count, strategy='hash'):
+    """The symbols of shard index out of count, in their original order"""
+    if strategy == 'hash':
+        return [symbol for symbol in symbols if shard_of(symbol, count) == index]
+    if strategy == 'range':
+        ordered = sorted(symbols)
+        start = len(ordered) * (index - 1) // count
+        end = len(ordered) * index // count
+        chosen = set(ordered[start:end])
+        return [symbol for symbol in symbols if symbol in chosen]
+    raise ValueError(f"Unknown shard strategy '{strategy}', expected one of: {', '.join(STRATEGIES)}")
+
+def add_arguments(parser):
+    """The --shard options every sharded script takes"""
+    parser.add_argument('--shard', help='only work on this shard of STOCKS, as i/N (see run_shards.py)')
+    parser.add_argument('--shard-strategy', choices=STRATEGIES, help='how symbols are split (default: SHARD_STRATEGY)')
+
+def from_arguments(parser, args, symbols, default_strategy='hash'):
+    """(symbols of the requested shard, (index, count)), or all symbols and None without --shard"""
+    if not args.shard:
+        return list(symbols), None
+    try:
+        index, count = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    return shard_symbols(symbols, index, count, args.shard_strategy or default_strategy), (index, count)
+
+def status_path(directory, job, index, count):
+    return os.path.join(directory, f'{job}-{index}-of-{count}.json')
+
+def write_status(directory, job, index, count, status):
+    """Write one worker's status for the coordinator, atomically"""
+    os.makedirs(directory, exist_ok=True)
+    path = status_path(directory, job, index, count)
+    status = dict(status, job=job, shard=shard_name(index, count),
+                  updated_at=datetime.now().isoformat(timespec='seconds'))
+    partial = f'{path}.tmp'
+    with open(partial, 'w') as f:
+        json.dump(status, f, indent=2)
+    os.replace(partial, path)
+    return path
+
+@contextmanager
+def reporting(directory, job, shard, symbols):
+    """
+    Write a shard worker's status when its block exits, failed or not; yields the status dict,
+    where the block can set 'skipped' or add details. Does nothing for unsharded runs
+    """
+    status = {'ok': False, 'skipped': False, 'symbols': len(symbols), 'error': None,
+              'host': socket.gethostname(), 'pid': os.getpid()}
+    started = time.perf_counter()
+    try:
+        yield status
+        status['ok'] = not status['skipped']
+    except Exception as e:
+        status['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        status['seconds'] = round(time.perf_counter() - started, 3)
+        if shard is not None:
+            try:
+                write_status(directory, job, *shard, status)
+            except OSError as e:
+                print(f"Could not write shard status: {e}")
+
+def read_status(directory, job, count):
+    """{shard: status} of the workers of job that have written one"""
+    statuses = {}
+    for index in range(1, count + 1):
+        path = status_path(directory, job, index, count)
+        try:
+            with open(path) as f:
+                statuses[shard_name(index, count)] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return statuses
+
+def merge_status(statuses, shards):
+    """One status for a sharded run over the named shards: totals, and which failed or are missing"""
+    missing = [shard for shard in shards if shard not in statuses]
+    failed = [shard for shard in shards if shard in statuses and not statuses[shard].get('ok')]
+    seconds = [statuses[shard].get('seconds') or 0.0 for shard in shards if shard in statuses]
+    return {
+        'shards': len(shards),
+        'ok': not missing and not failed,
+        'failed': failed,
+        'missing': missing,
+        'symbols': sum(statuses[shard].get('symbols', 0) for shard in shards if shard in statuses),
+        'slowest_seconds': round(max(seconds), 3) if seconds else None,
+        'total_seconds': round(sum(seconds), 3),
+        'workers': {shard: statuses[shard] for shard in shards if shard in statuses}
+    }
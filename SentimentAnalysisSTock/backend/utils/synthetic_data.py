@@ -0,0 +1,352 @@
+"""
+Synthetic market data at universe scale
+generate() draws a reproducible dataset with NumPy from one seed:
+- daily prices: correlated random walks built from a market factor, a sector factor and
+  idiosyncratic noise, on weekdays only
+- sentiment: a mean-reverting series per symbol, partly shared across the market, that
+  leads the next session's return
+- posts scored around their day's sentiment, and daily summaries computed from them
+- predictions for the last days, with their outcome once the next session is known, plus
+  votes on them
+
+load() bulk-inserts a dataset: COPY on PostgreSQL and chunked executemany elsewhere. By
+default it leaves stored data alone and skips the days a symbol already has rows for; with
+replace it first deletes the rows the dataset replaces, real ones and their votes included,
+so reloading the same seed gives the same database. Rows are written with Core statements
+and do not go through the change log.
+"""
+
+import csv
+import io
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select
+from backend.models.models import db, Post, StockPrice, SentimentSummary, Prediction, PredictionVote
+
+SYNTHETIC_PREFIX = 'SYM'
+
+POST_TEMPLATES = [
+    ("Strong quarterly earnings beat expectations", "Company reported revenue growth of 15% year-over-year with strong fundamentals."),
+    ("New product launch driving investor sentiment", "Latest product announcement has generated significant market buzz and positive analyst coverage."),
+    ("Analyst upgrade boosts stock confidence", "Major investment firm raised price target citing strong competitive position."),
+    ("Market volatility affects tech sector broadly", "Broader market trends impacting technology stocks across the board today."),
+    ("CEO announces strategic partnership deal", "New collaboration expected to drive revenue growth in coming quarters."),
+    ("Insider buying signals confidence", "Several executives purchased additional shares, indicating strong internal confidence."),
+    ("Revenue guidance raised for next quarter", "Management increased forward guidance based on strong demand trends."),
+    ("Analyst downgrade weighs on shares", "Concerns over slowing growth led to a lower price target."),
+    ("Supply chain issues pressure margins", "Rising costs and delays are expected to hurt profitability this quarter."),
+    ("Regulatory probe announced", "Investors worry about potential fines and restrictions on the core business.")
+]
+
+# Tables in insert order, and the column each one is dated by
+TABLES = (
+    (StockPrice, StockPrice.date),
+    (SentimentSummary, SentimentSummary.date),
+    (Post, Post.posted_at),
+    (Prediction, Prediction.prediction_date)
+)
+
+def universe(count, base=()):
+    """count symbols: the base tickers first, then made-up ones (SYM0018, ...)"""
+    base = list(base)[:count]
+    return base + [f'{SYNTHETIC_PREFIX}{i:04d}' for i in range(len(base), count)]
+
+def _ar1(rng, phi, scale, shape):
+    """Stationary AR(1) paths along the first axis"""
+    shocks = rng.normal(0, scale, shape)
+    paths = np.empty(shape)
+    paths[0] = shocks[0] / np.sqrt(1 - phi ** 2)
+    for t in range(1, shape[0]):
+        paths[t] = phi * paths[t - 1] + shocks[t]
+    return paths
+
+def generate(symbols, days=365, posts_per_day=5, votes_per_prediction=10, prediction_days=30,
+             store_posts=True, seed=42, end_date=None):
+    """
+    A synthetic dataset for symbols over the `days` days up to end_date (today by default);
+    returns {'prices', 'sentiment', 'posts', 'predictions', 'votes'} DataFrames. Votes refer
+    to their prediction by row position (prediction_index) until load() assigns ids
+    """
+    rng = np.random.default_rng(seed)
+    symbols = list(symbols)
+    n = len(symbols)
+    end_date = end_date or date.today()
+    dates = pd.date_range(end=pd.Timestamp(end_date), periods=days, freq='D')
+    trading = dates.weekday < 5
+    sym = np.array(symbols, dtype=object)
+
+    # Sentiment: per-symbol level + shared market mood + idiosyncratic AR(1), in [-1, 1]
+    level = rng.normal(0.1, 0.15, n)
+    mood = _ar1(rng, 0.9, 0.04, (days, 1))
+    sentiment = np.clip(level + mood + _ar1(rng, 0.8, 0.12, (days, n)), -1, 1)
+
+    # Returns on trading days: beta * market + sector + idiosyncratic, plus a small pull
+    # towards the previous day's sentiment
+    sessions = int(trading.sum())
+    sectors = max(1, n // 25)
+    beta = rng.uniform(0.6, 1.4, n)
+    vol = rng.uniform(0.008, 0.025, n)
+    market = rng.normal(0.0004, 0.01, (sessions, 1))
+    sector = rng.normal(0, 0.007, (sessions, sectors))[:, np.arange(n) % sectors]
+    prior_sentiment = np.vstack([sentiment[:1], sentiment[:-1]])[trading]
+    returns = beta * market + sector + rng.normal(0, 1, (sessions, n)) * vol + 0.004 * prior_sentiment
+
+    closes = np.exp(rng.uniform(np.log(20), np.log(500), n)) * np.exp(np.cumsum(returns, axis=0))
+    opens = np.vstack([closes[:1], closes[:-1]]) * (1 + rng.normal(0, 0.003, (sessions, n)))
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.006, (sessions, n))))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.006, (sessions, n))))
+    volumes = (np.exp(rng.normal(np.log(3e6), 0.8, n)) * (1 + 20 * np.abs(returns))
+               * rng.lognormal(0, 0.25, (sessions, n))).astype(np.int64)
+
+    session_dates = dates[trading].date
+    prices = pd.DataFrame({
+        'symbol': np.tile(sym, sessions),
+        'date': np.repeat(session_dates, n),
+        'open_price': opens.ravel(),
+        'high_price': highs.ravel(),
+        'low_price': lows.ravel(),
+        'close_price': closes.ravel(),
+        'volume': volumes.ravel()
+    })
+
+    # Posts: a Poisson count per symbol and day, scored around that day's sentiment
+    activity = rng.lognormal(0, 0.5, n)
+    counts = rng.poisson(max(posts_per_day, 0) * activity, (days, n))
+    cell = np.repeat(np.arange(days * n), counts.ravel())
+    scores = np.clip(sentiment.ravel()[cell] + rng.normal(0, 0.35, cell.size), -1, 1)
+
+    cells = days * n
+    post_count = counts.ravel()
+    has_posts = post_count > 0
+    sums = np.bincount(cell, weights=scores, minlength=cells)
+    positive = np.bincount(cell, weights=scores > 0.05, minlength=cells).astype(np.int64)
+    negative = np.bincount(cell, weights=scores < -0.05, minlength=cells).astype(np.int64)
+    day_of_cell = np.repeat(dates.date, n)
+    summaries = pd.DataFrame({
+        'symbol': np.tile(sym, days)[has_posts],
+        'date': day_of_cell[has_posts],
+        'avg_sentiment': sums[has_posts] / post_count[has_posts],
+        'post_count': post_count[has_posts],
+        'positive_count': positive[has_posts],
+        'negative_count': negative[has_posts],
+        'neutral_count': (post_count - positive - negative)[has_posts]
+    })
+
+    if store_posts and cell.size:
+        template = rng.integers(0, len(POST_TEMPLATES), cell.size)
+        titles = np.array([t for t, _ in POST_TEMPLATES], dtype=object)
+        contents = np.array([c for _, c in POST_TEMPLATES], dtype=object)
+        post_symbols = np.tile(sym, days)[cell]
+        # Spread over the day, but not past now on the last day
+        day_length = np.full(days, 86400.0)
+        if end_date == date.today():
+            now = datetime.now()
+            day_length[-1] = max(1, (now - datetime.combine(now.date(), datetime.min.time())).total_seconds())
+        seconds = (rng.random(cell.size) * day_length[cell // n]).astype('timedelta64[s]')
+        posted_at = np.repeat(dates.values, n)[cell] + seconds
+        posts = pd.DataFrame({
+            'symbol': post_symbols,
+            'title': post_symbols + ': ' + titles[template],
+            'content': contents[template],
+            'clean_text': contents[template],
+            'sentiment_score': scores,
+            'source': np.where(rng.random(cell.size) < 0.7, 'reddit', 'news').astype(object),
+            'source_url': None,
+            'posted_at': posted_at
+        })
+    else:
+        posts = pd.DataFrame(columns=['symbol', 'title', 'content', 'clean_text', 'sentiment_score',
+                                      'source', 'source_url', 'posted_at'])
+
+    # Predictions from the trailing week of sentiment: its average sets the direction, and
+    # its strength and trend the confidence
+    span = min(prediction_days, days)
+    window = 7
+    padded = np.vstack([np.repeat(sentiment[:1], window - 1, axis=0), sentiment])
+    trailing = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)[-span:]
+    avg = trailing.mean(axis=2)
+    trend = trailing[:, :, -1] - trailing[:, :, 0]
+    confidence = np.clip(0.55 + np.minimum(0.25, np.abs(avg) * 0.4) + np.minimum(0.15, np.abs(trend) * 0.3)
+                         + rng.normal(0, 0.03, avg.shape), 0.52, 0.92)
+    direction = np.where(avg >= 0, 'up', 'down')
+    direction = np.where((avg > 0.1) & (trend >= -0.1), 'up', direction)
+    direction = np.where((avg < -0.1) & (trend <= 0.1), 'down', direction)
+
+    # The outcome is the move of the first session after the prediction date, once it happened
+    prediction_dates = dates[-span:]
+    next_session = np.searchsorted(dates[trading].values, prediction_dates.values, side='right')
+    known = next_session < sessions
+    outcome = np.full((span, n), None, dtype=object)
+    if known.any():
+        moves = returns[next_session[known]]
+        outcome[known] = np.where(moves > 0, 'up', 'down')
+
+    predictions = pd.DataFrame({
+        'symbol': np.tile(sym, span),
+        'prediction_date': np.repeat(prediction_dates.date, n),
+        'predicted_direction': direction.ravel().astype(object),
+        'confidence': confidence.ravel(),
+        'sentiment_score': avg.ravel(),
+        'actual_direction': outcome.ravel()
+    })
+
+    # Votes: distinct voters per prediction, agreeing more often with confident predictions
+    vote_counts = rng.poisson(max(votes_per_prediction, 0), len(predictions))
+    prediction_index = np.repeat(np.arange(len(predictions)), vote_counts)
+    voter = np.arange(prediction_index.size) - np.repeat(np.cumsum(vote_counts) - vote_counts, vote_counts)
+    agree = rng.random(prediction_index.size) < 0.2 + 0.6 * predictions['confidence'].to_numpy()[prediction_index]
+    votes = pd.DataFrame({
+        'prediction_index': prediction_index,
+        'user_ip': [f'10.{v >> 16 & 255}.{v >> 8 & 255}.{v & 255}' for v in voter.tolist()],
+        'vote_type': np.where(agree, 'agree', 'disagree').astype(object)
+    })
+
+    return {'prices': prices, 'sentiment': summaries, 'posts': posts,
+            'predictions': predictions, 'votes': votes}
+
+def _columns(frame, table, dialect):
+    """Column-wise lists of DB-API values for frame, converted by each column's type"""
+    columns = []
+    for name in frame.columns:
+        series = frame[name]
+        if dialect.name == 'sqlite' and pd.api.types.is_datetime64_any_dtype(series):
+            # The text SQLAlchemy stores SQLite DATETIMEs as, without a call per value
+            text = np.char.replace(np.datetime_as_string(series.to_numpy('datetime64[us]'), unit='us'), 'T', ' ')
+            columns.append(np.where(series.isna(), None, text.astype(object)).tolist())
+            continue
+        values = series.astype(object).where(series.notna(), None).tolist()
+        processor = table.c[name].type.dialect_impl(dialect).bind_processor(dialect)
+        if processor is not None:
+            values = [processor(value) for value in values]
+        columns.append(values)
+    return columns
+
+def _copy(connection, table, frame):
+    """COPY a frame into table through psycopg2"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        zip(*[['' if value is None else value for value in values]
+              for values in _columns(frame, table, connection.dialect)]))
+    buffer.seek(0)
+    columns = ', '.join(frame.columns)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _executemany(connection, table, frame, chunk_size):
+    """One compiled INSERT run through the driver's executemany, chunk_size rows at a time"""
+    compiled = table.insert().compile(dialect=connection.dialect, column_keys=list(frame.columns))
+    names = list(compiled.positiontup) if compiled.positional else list(frame.columns)
+    frame = frame[[compiled.binds[name].key for name in names]] if compiled.positional else frame
+    for start in range(0, len(frame), chunk_size):
+        rows = list(zip(*_columns(frame.iloc[start:start + chunk_size], table, connection.dialect)))
+        if not compiled.positional:
+            rows = [dict(zip(names, row)) for row in rows]
+        connection.exec_driver_sql(compiled.string, rows)
+
+def bulk_insert(table, frame, chunk_size=10000):
+    """Insert a DataFrame into table: COPY on PostgreSQL with psycopg2, executemany otherwise"""
+    if frame.empty:
+        return 0
+    if 'created_at' in table.c and 'created_at' not in frame.columns:
+        frame = frame.assign(created_at=datetime.utcnow())
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        _copy(connection, table, frame)
+    else:
+        _executemany(connection, table, frame, chunk_size)
+    return len(frame)
+
+def _clear(symbols, first_day, last_day, chunk=500):
+    """Delete the rows of symbols between first_day and last_day, votes on those predictions included"""
+    last_moment = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    for start in range(0, len(symbols), chunk):
+        batch = symbols[start:start + chunk]
+        replaced = select(Prediction.id).where(Prediction.symbol.in_(batch),
+                                               Prediction.prediction_date.between(first_day, last_day))
+        db.session.execute(delete(PredictionVote).where(PredictionVote.prediction_id.in_(replaced)))
+        for model, column in TABLES:
+            if model is Post:
+                window = (column >= first_day, column < last_moment)
+            else:
+                window = (column.between(first_day, last_day),)
+            db.session.execute(delete(model).where(model.symbol.in_(batch), *window))
+
+def _existing(symbols, first_day, last_day, chunk=500):
+    """{model: {(symbol, day)}} already stored for symbols between first_day and last_day"""
+    last_moment = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    existing = {}
+    for model, column in TABLES:
+        keys = existing.setdefault(model, set())
+        for start in range(0, len(symbols), chunk):
+            batch = symbols[start:start + chunk]
+            if model is Post:
+                query = select(model.symbol, func.date(column)).distinct()\
+                    .where(model.symbol.in_(batch), column >= first_day, column < last_moment)
+            else:
+                query = select(model.symbol, column)\
+                    .where(model.symbol.in_(batch), column.between(first_day, last_day))
+            # func.date() gives text on SQLite
+            keys.update((symbol, day if isinstance(day, date) else date.fromisoformat(str(day)[:10]))
+                        for symbol, day in db.session.execute(query))
+    return existing
+
+def _absent(frame, days, keys):
+    """A mask of the frame's rows whose (symbol, day) is not in keys"""
+    if not keys:
+        return np.ones(len(frame), dtype=bool)
+    return np.fromiter(((symbol, day) not in keys for symbol, day in zip(frame['symbol'], days)),
+                       dtype=bool, count=len(frame))
+
+def load(dataset, chunk_size=10000, replace=False):
+    """
+    Bulk-load a generate() dataset in one transaction; returns rows inserted per table.
+    Rows for a (symbol, day) a table already has are skipped, and so are votes on skipped
+    predictions. With replace, existing rows of the dataset's symbols and dates, and the
+    votes on those predictions, are deleted first instead
+    """
+    symbols = sorted(set(dataset['sentiment']['symbol']) | set(dataset['prices']['symbol'])
+                     | set(dataset['predictions']['symbol']))
+    days = pd.concat([dataset['prices']['date'], dataset['sentiment']['date'],
+                      dataset['predictions']['prediction_date']])
+    prices, sentiment, posts = dataset['prices'], dataset['sentiment'], dataset['posts']
+    predictions, votes = dataset['predictions'], dataset['votes']
+    try:
+        new_predictions = np.ones(len(predictions), dtype=bool)
+        if replace and len(days):
+            _clear(symbols, days.min(), days.max())
+        elif len(days):
+            existing = _existing(symbols, days.min(), days.max())
+            prices = prices[_absent(prices, prices['date'], existing[StockPrice])]
+            sentiment = sentiment[_absent(sentiment, sentiment['date'], existing[SentimentSummary])]
+            posts = posts[_absent(posts, pd.to_datetime(posts['posted_at']).dt.date, existing[Post])]
+            new_predictions = _absent(predictions, predictions['prediction_date'], existing[Prediction])
+            votes = votes[new_predictions[votes['prediction_index'].to_numpy()]]
+
+        counts = {
+            StockPrice.__tablename__: bulk_insert(StockPrice.__table__, prices, chunk_size),
+            SentimentSummary.__tablename__: bulk_insert(SentimentSummary.__table__, sentiment, chunk_size),
+            Post.__tablename__: bulk_insert(Post.__table__, posts, chunk_size),
+            Prediction.__tablename__: bulk_insert(Prediction.__table__, predictions[new_predictions], chunk_size)
+        }
+
+        # Votes need the ids the predictions were just given
+        if not votes.empty:
+            ids = {}
+            for start in range(0, len(symbols), 500):
+                ids.update(((row.symbol, row.prediction_date), row.id) for row in db.session.execute(
+                    select(Prediction.id, Prediction.symbol, Prediction.prediction_date).where(
+                        Prediction.symbol.in_(symbols[start:start + 500]),
+                        Prediction.prediction_date.between(predictions['prediction_date'].min(),
+                                                           predictions['prediction_date'].max()))))
+            keys = zip(predictions['symbol'], predictions['prediction_date'])
+            prediction_ids = np.array([ids[key] for key in keys])
+            votes = pd.DataFrame({'prediction_id': prediction_ids[votes['prediction_index'].to_numpy()],
+                                  'user_ip': votes['user_ip'], 'vote_type': votes['vote_type']})
+        counts[PredictionVote.__tablename__] = bulk_insert(PredictionVote.__table__, votes, chunk_size)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
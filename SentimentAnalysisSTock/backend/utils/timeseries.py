@@ -0,0 +1,41 @@
+"""
+Column-level read helpers for time-series endpoints
+These select plain Core row tuples instead of hydrating ORM instances; the query
+builders are shared with the async API
+"""
+
+from sqlalchemy import select, func, and_
+from backend.models.models import db, StockPrice, SentimentSummary
+
+# Column order matches the models' to_dict output
+SENTIMENT_COLUMNS = ('id', 'symbol', 'date', 'avg_sentiment', 'post_count',
+                     'positive_count', 'negative_count', 'neutral_count', 'created_at')
+PRICE_COLUMNS = ('id', 'symbol', 'date', 'open_price', 'high_price', 'low_price',
+                 'close_price', 'volume', 'created_at')
+
+def history_query(model, columns, symbol, start_date):
+    """Select the given columns for one symbol from start_date onwards, oldest first"""
+    return select(*[getattr(model, c) for c in columns])\
+        .where(model.symbol == symbol)\
+        .where(model.date >= start_date)\
+        .order_by(model.date)
+
+def latest_query(model, columns, symbols):
+    """Select the given columns of each symbol's most recent row (one query for all symbols)"""
+    latest = select(model.symbol, func.max(model.date).label('date'))\
+        .where(model.symbol.in_(symbols))\
+        .group_by(model.symbol)\
+        .subquery()
+    return select(*[getattr(model, c) for c in columns])\
+        .join(latest, and_(model.symbol == latest.c.symbol, model.date == latest.c.date))
+
+def _history_rows(model, columns, symbol, start_date):
+    return db.session.execute(history_query(model, columns, symbol, start_date)).all()
+
+def sentiment_history_rows(symbol, start_date, columns=SENTIMENT_COLUMNS):
+    """Get (columns, rows) of daily sentiment summaries for a symbol"""
+    return columns, _history_rows(SentimentSummary, columns, symbol, start_date)
+
+def price_history_rows(symbol, start_date, columns=PRICE_COLUMNS):
+    """Get (columns, rows) of daily prices for a symbol"""
+    return columns, _history_rows(StockPrice, columns, symbol, start_date)
@@ -0,0 +1,401 @@
+"""
+Lightweight tracing spans
+Spans nest through a context variable, so a span opened inside another becomes its child,
+and every span of one pipeline run or API request shares a trace id. Finished spans are
+batched by a background thread and exported in the OTLP/JSON encoding, either appended
+as JSON lines to TRACE_FILE or posted to an OTLP/HTTP collector at TRACE_OTLP_ENDPOINT.
+Until configure() is called, start_span() hands out a shared no-op span.
+
+    python -m backend.utils.tracing traces/spans.jsonl
+
+prints each trace in the file as a tree, marking its critical path with '*'.
+"""
+
+import atexit
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import requests
+from contextvars import ContextVar
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACEPARENT = 'traceparent'
+
+# The innermost open span of this thread or task; None outside traces
+_current = ContextVar('current_span', default=None)
+
+# Batches finished spans to the exporter; None while tracing is off
+_processor = None
+
+class Span:
+    """One timed operation; ends and is exported when its with-block exits"""
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'attributes',
+                 'start_ns', 'end_ns', 'status', 'status_message', '_token')
+
+    def __init__(self, name, kind, trace_id, parent_id, attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = None
+        self.status_message = None
+        self._token = _current.set(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Ended from another context than it started in; leave that one alone
+            pass
+        if _processor is not None:
+            _processor.submit(self)
+
+    @property
+    def traceparent(self):
+        """W3C trace context header value for calls made on behalf of this span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_exception(exc)
+        self.end()
+        return False
+
+class _NoopSpan:
+    """Stands in for spans while tracing is off"""
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+def parse_traceparent(value):
+    """(trace_id, span_id) from a W3C traceparent header, or None if it is missing or malformed"""
+    parts = (value or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2]
+
+def start_span(name, kind=KIND_INTERNAL, parent=None, **attributes):
+    """
+    Open a span as a child of the current one, or of parent, a (trace_id, span_id) pair from
+    another process; call end() on it, or use it in a with-block
+    """
+    if _processor is None:
+        return NOOP_SPAN
+    if parent is None:
+        current = _current.get()
+        parent = (current.trace_id, current.span_id) if current is not None else None
+    trace_id, parent_id = parent if parent is not None else (secrets.token_hex(16), None)
+    return Span(name, kind, trace_id, parent_id, attributes)
+
+def traced(name, kind=KIND_INTERNAL):
+    """Decorator running each call of a function in its own span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def _attributes(values):
+    return [{'key': key, 'value': _attribute_value(value)} for key, value in values.items()]
+
+def encode_spans(spans, resource):
+    """An OTLP/JSON ExportTraceServiceRequest holding spans"""
+    encoded = []
+    for s in spans:
+        item = {
+            'traceId': s.trace_id,
+            'spanId': s.span_id,
+            'name': s.name,
+            'kind': s.kind,
+            'startTimeUnixNano': str(s.start_ns),
+            'endTimeUnixNano': str(s.end_ns),
+            'attributes': _attributes(s.attributes),
+            'status': {'code': s.status or STATUS_OK}
+        }
+        if s.parent_id:
+            item['parentSpanId'] = s.parent_id
+        if s.status_message:
+            item['status']['message'] = s.status_message
+        encoded.append(item)
+
+    return {'resourceSpans': [{
+        'resource': {'attributes': _attributes(resource)},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': encoded}]
+    }]}
+
+class FileExporter:
+    """Appends each batch as one line of OTLP/JSON, the layout OTLP JSON file receivers read"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, payload):
+        # A single write per batch keeps lines whole when several processes append
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(payload, separators=(',', ':')) + '\n')
+
+class OTLPHTTPExporter:
+    """Posts batches to an OTLP/HTTP collector's /v1/traces endpoint as JSON"""
+
+    def __init__(self, endpoint, timeout=5):
+        self.session = requests.Session()
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payload):
+        response = self.session.post(self.endpoint, data=json.dumps(payload, separators=(',', ':')),
+                                     headers={'Content-Type': 'application/json'},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+class BatchSpanProcessor:
+    """
+    Queues finished spans and exports them from a background thread every `interval`
+    seconds, or sooner once `max_batch` are waiting; export errors drop the batch
+    """
+
+    def __init__(self, exporter, resource, interval=2.0, max_batch=512, max_queue=10000):
+        self.exporter = exporter
+        self.resource = resource
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        # Queued spans are exported on interpreter exit
+        atexit.register(self.stop)
+
+    def submit(self, finished):
+        with self._lock:
+            if len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._pending.append(finished)
+            full = len(self._pending) >= self.max_batch
+        # Threads don't survive a fork, so a preloading server's workers restart the exporter here
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Export everything queued; returns how many spans were exported"""
+        exported = 0
+        with self._export_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.max_batch]
+                    del self._pending[:self.max_batch]
+                if not batch:
+                    return exported
+                try:
+                    self.exporter.export(encode_spans(batch, self.resource))
+                    exported += len(batch)
+                except Exception as e:
+                    print(f"Error exporting {len(batch)} spans: {e}")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background exporter (again, if it is not running)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the exporter and export whatever is still queued"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+def _before_flush(session, flush_context, instances):
+    session.info['flush_span'] = start_span('db.flush',
+                                            new=len(session.new),
+                                            dirty=len(session.dirty),
+                                            deleted=len(session.deleted))
+
+def _after_flush_postexec(session, flush_context):
+    flush_span = session.info.pop('flush_span', None)
+    if flush_span is not None:
+        flush_span.end()
+
+def _after_rollback(session):
+    # A failed flush rolls back before it raises, so its span ends here
+    flush_span = session.info.pop('flush_span', None)
+    if flush_span is not None:
+        flush_span.status = STATUS_ERROR
+        flush_span.status_message = 'flush rolled back'
+        flush_span.end()
+
+def configure(config, service_name=None):
+    """
+    Turn tracing on from the TRACE_* settings (idempotent); does nothing unless
+    TRACING_ENABLED is set. Returns the span processor, or None
+    """
+    global _processor
+    if not config.TRACING_ENABLED:
+        return None
+    if _processor is not None:
+        return _processor
+
+    if config.TRACE_EXPORTER == 'otlp':
+        exporter = OTLPHTTPExporter(config.TRACE_OTLP_ENDPOINT)
+    elif config.TRACE_EXPORTER == 'file':
+        exporter = FileExporter(config.TRACE_FILE)
+    else:
+        raise ValueError(f"Unknown trace exporter '{config.TRACE_EXPORTER}', expected file or otlp")
+
+    resource = {
+        'service.name': service_name or config.TRACE_SERVICE_NAME,
+        'process.pid': os.getpid(),
+        'process.command': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+    }
+    _processor = BatchSpanProcessor(exporter, resource, interval=config.TRACE_EXPORT_INTERVAL)
+
+    if not event.contains(Session, 'before_flush', _before_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush_postexec', _after_flush_postexec)
+        event.listen(Session, 'after_rollback', _after_rollback)
+    return _processor
+
+def flush():
+    """Export queued spans now, e.g. at the end of a script run"""
+    if _processor is not None:
+        _processor.flush()
+
+def _load_spans(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line).get('resourceSpans', []):
+                for scope_spans in resource_spans.get('scopeSpans', []):
+                    spans.extend(scope_spans.get('spans', []))
+    return spans
+
+def print_traces(path):
+    """Print every trace in an exported file as an indented tree with durations"""
+    spans = _load_spans(path)
+    by_id = {s['spanId']: s for s in spans}
+    children = {}
+    for s in spans:
+        children.setdefault(s.get('parentSpanId'), []).append(s)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: int(s['startTimeUnixNano']))
+
+    def critical_path(node, path):
+        # Walk back from the child that finished last, then the one that finished last
+        # before it started, and so on; sequential steps all land on the path
+        path.add(node['spanId'])
+        cursor = int(node['endTimeUnixNano'])
+        kids = children.get(node['spanId'], [])
+        while True:
+            done = [s for s in kids if int(s['endTimeUnixNano']) <= cursor]
+            if not done:
+                return path
+            last = max(done, key=lambda s: int(s['endTimeUnixNano']))
+            critical_path(last, path)
+            cursor = int(last['startTimeUnixNano'])
+
+    def print_span(s, depth, origin, path):
+        offset_ms = (int(s['startTimeUnixNano']) - origin) / 1e6
+        duration_ms = (int(s['endTimeUnixNano']) - int(s['startTimeUnixNano'])) / 1e6
+        attributes = ' '.join(f"{a['key']}={next(iter(a['value'].values()))}"
+                              for a in s.get('attributes', []))
+        error = ' ERROR' if s.get('status', {}).get('code') == STATUS_ERROR else ''
+        marker = '*' if s['spanId'] in path else ' '
+        print(f"{marker} {offset_ms:10.1f} ms {duration_ms:10.1f} ms  {'  ' * depth}{s['name']}"
+              f"{error}  {attributes}".rstrip())
+        for child in children.get(s['spanId'], []):
+            print_span(child, depth + 1, origin, path)
+
+    # Roots are spans without a parent, or whose parent is in another process's file
+    roots = [s for s in spans if s.get('parentSpanId') not in by_id]
+    roots.sort(key=lambda s: int(s['startTimeUnixNano']))
+    for root in roots:
+        print(f"trace {root['traceId']}")
+        print_span(root, 0, int(root['startTimeUnixNano']), critical_path(root, set()))
+        print()
+
+if __name__ == '__main__':
+    print_traces(sys.argv[1] if len(sys.argv) > 1 else 'traces/spans.jsonl')
@@ -0,0 +1,278 @@
+"""
+Prediction vote ingestion
+Votes are written with a single-statement upsert on (prediction_id, user_ip). With
+write-behind enabled they are first collected in memory and flushed in batched
+transactions, so a burst of votes takes the SQLite write lock a few times per second
+instead of once per request.
+"""
+
+import atexit
+import threading
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from backend.models.models import db, PredictionVote
+from backend.utils.change_log import record_changes
+
+VOTE_TYPES = ('agree', 'disagree')
+
+def upsert_statement(dialect):
+    """
+    INSERT ... ON CONFLICT (prediction_id, user_ip) DO UPDATE, returning each vote's id, key
+    and created_at; None on dialects without it (e.g. MySQL)
+    """
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+
+    stmt = insert(PredictionVote)
+    return stmt.on_conflict_do_update(
+        index_elements=[PredictionVote.prediction_id, PredictionVote.user_ip],
+        set_={'vote_type': stmt.excluded.vote_type}
+    ).returning(PredictionVote.id, PredictionVote.prediction_id, PredictionVote.user_ip,
+                PredictionVote.created_at)
+
+def stamped(votes):
+    """
+    The votes with one new created_at, and that stamp. The upsert leaves created_at alone on
+    update, so a returned row with another created_at was an existing vote
+    """
+    stamp = datetime.utcnow()
+    return [dict(vote, created_at=stamp) for vote in votes], stamp
+
+def updated_keys(rows, stamp):
+    """{(prediction_id, user_ip)} of upsert_statement rows that updated an existing vote"""
+    return {(row.prediction_id, row.user_ip) for row in rows if row.created_at != stamp}
+
+def _locked_vote(vote):
+    return db.session.execute(
+        select(PredictionVote)
+        .where(PredictionVote.prediction_id == vote['prediction_id'],
+               PredictionVote.user_ip == vote['user_ip'])
+        .with_for_update()
+    ).scalar_one_or_none()
+
+def update_or_insert_votes(votes):
+    """
+    Select-then-update each vote, locking its row, for dialects without an upsert; returns
+    the keys of the votes that existed. The ORM flush logs the changes. The caller commits
+    """
+    updated = set()
+    for vote in votes:
+        key = (vote['prediction_id'], vote['user_ip'])
+        existing = _locked_vote(vote)
+        if existing is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(PredictionVote(**vote))
+                continue
+            except IntegrityError:
+                # There was no row to lock, and another voter's request inserted it meanwhile
+                existing = _locked_vote(vote)
+        existing.vote_type = vote['vote_type']
+        updated.add(key)
+    db.session.flush()
+    return updated
+
+def upsert_votes(votes):
+    """
+    Insert or update votes in one statement (a select-then-update per vote where the
+    dialect has no upsert); votes are dicts with prediction_id, user_ip and vote_type.
+    Returns the (prediction_id, user_ip) keys of the votes that replaced an earlier one.
+    The caller commits.
+    """
+    if not votes:
+        return set()
+    stmt = upsert_statement(db.session.get_bind().dialect.name)
+    if stmt is None:
+        return update_or_insert_votes(votes)
+    votes, stamp = stamped(votes)
+    rows = db.session.execute(stmt, votes).all()
+
+    # Core statements skip the ORM flush hook, so log the change explicitly
+    record_changes(PredictionVote.__tablename__, [row.id for row in rows], 'upsert')
+    return updated_keys(rows, stamp)
+
+def vote_message(updated):
+    return 'Vote updated successfully' if updated else 'Vote recorded successfully'
+
+def vote_counts_query(prediction_ids):
+    """Per-prediction, per-type vote counts in one GROUP BY"""
+    return select(PredictionVote.prediction_id, PredictionVote.vote_type, func.count())\
+        .where(PredictionVote.prediction_id.in_(list(prediction_ids)))\
+        .group_by(PredictionVote.prediction_id, PredictionVote.vote_type)
+
+def counts_from_rows(prediction_ids, rows):
+    """{prediction_id: {'agree': n, 'disagree': n}} from vote_counts_query rows"""
+    counts = {pid: dict.fromkeys(VOTE_TYPES, 0) for pid in prediction_ids}
+    for prediction_id, vote_type, count in rows:
+        counts[prediction_id][vote_type] = count
+    return counts
+
+def vote_counts(prediction_ids):
+    """{prediction_id: {'agree': n, 'disagree': n}} from one GROUP BY query"""
+    if not prediction_ids:
+        return {}
+    return counts_from_rows(prediction_ids, db.session.execute(vote_counts_query(prediction_ids)))
+
+def stored_votes_query(prediction_id, user_ips):
+    """Stored votes of some voters on one prediction"""
+    return select(PredictionVote.user_ip, PredictionVote.vote_type)\
+        .where(PredictionVote.prediction_id == prediction_id)\
+        .where(PredictionVote.user_ip.in_(list(user_ips)))
+
+def overlay_pending(counts, stored, pending):
+    """
+    Adjust stored counts for votes that haven't been flushed yet
+    A pending vote replaces the voter's stored vote (from stored_votes_query), if they had one
+    """
+    counts = dict(counts)
+    for user_ip, vote_type in stored:
+        counts[vote_type] -= 1
+    for vote_type in pending.values():
+        counts[vote_type] += 1
+    return counts
+
+def apply_pending(prediction_id, counts, pending):
+    """Fold queued votes ({user_ip: vote_type}) into one prediction's stored counts"""
+    if not pending:
+        return counts
+    stored = db.session.execute(stored_votes_query(prediction_id, pending))
+    return overlay_pending(counts, stored, pending)
+
+def vote_stats(counts):
+    """Shape agree/disagree counts the way the voting endpoints return them"""
+    agree_count = counts.get('agree', 0)
+    disagree_count = counts.get('disagree', 0)
+    total_votes = agree_count + disagree_count
+    agreement_percentage = (agree_count / total_votes * 100) if total_votes > 0 else 0
+
+    return {
+        'agree_count': agree_count,
+        'disagree_count': disagree_count,
+        'total_votes': total_votes,
+        'agreement_percentage': round(agreement_percentage, 1)
+    }
+
+class VoteBuffer:
+    """
+    In-memory write-behind buffer for votes
+    Repeated votes from one voter collapse to the latest before they reach the database.
+    A background thread flushes every `interval` seconds, or sooner once `max_batch`
+    votes are waiting.
+    """
+
+    def __init__(self, app, interval=0.25, max_batch=500, max_attempts=5):
+        self.app = app
+        self.interval = interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self._pending = {}
+        self._attempts = {}  # {(prediction_id, user_ip): failed writes} of requeued votes
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        # Queued votes are written on interpreter exit
+        atexit.register(self.stop)
+
+    def submit(self, prediction_id, user_ip, vote_type):
+        """Queue a vote; it overrides any queued vote from the same voter"""
+        with self._lock:
+            self._pending[(prediction_id, user_ip)] = vote_type
+            self._attempts.pop((prediction_id, user_ip), None)
+            full = len(self._pending) >= self.max_batch
+        # Threads don't survive a fork, so a preloading server's workers restart the flusher here
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        if full:
+            self._wake.set()
+
+    def pending_for(self, prediction_id):
+        """{user_ip: vote_type} of queued votes for one prediction"""
+        with self._lock:
+            return {ip: vote_type for (pid, ip), vote_type in self._pending.items() if pid == prediction_id}
+
+    def flush(self):
+        """
+        Write every queued vote in one transaction; returns how many were written. If the
+        batch fails, its votes are written one by one, and the ones that still fail are
+        queued again, up to max_attempts times before they are dropped
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        votes = [
+            {'prediction_id': pid, 'user_ip': ip, 'vote_type': vote_type}
+            for (pid, ip), vote_type in batch.items()
+        ]
+        with self.app.app_context():
+            try:
+                upsert_votes(votes)
+                db.session.commit()
+                self._written(batch)
+                return len(votes)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error flushing {len(votes)} votes, writing them one by one: {e}")
+
+            failed = {}
+            for vote in votes:
+                key = (vote['prediction_id'], vote['user_ip'])
+                try:
+                    upsert_votes([vote])
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    failed[key] = (vote['vote_type'], e)
+        self._written([key for key in batch if key not in failed])
+        self._requeue(failed)
+        return len(votes) - len(failed)
+
+    def _written(self, keys):
+        with self._lock:
+            for key in keys:
+                self._attempts.pop(key, None)
+
+    def _requeue(self, failed):
+        """Queue failed votes again, unless a newer vote from the same voter arrived meanwhile"""
+        with self._lock:
+            for key, (vote_type, error) in failed.items():
+                if key in self._pending:
+                    continue
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(key, None)
+                    print(f"Dropping vote of {key[1]} on prediction {key[0]} after {attempts} failed writes: {str(error).splitlines()[0]}")
+                    continue
+                self._attempts[key] = attempts
+                self._pending[key] = vote_type
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flusher (again, if it is not running)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='vote-flusher', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
@@ -0,0 +1,20 @@
+"""
+Celery worker entry point for background data refreshes (JOB_QUEUE_BACKEND=celery)
+Run from the project root, next to the web server:
+
+    celery -A backend.worker worker --concurrency 1
+
+Jobs run the data pipeline in this process, against the same database as the web app.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+
+app, socketio = create_app()
+refresh_jobs = app.extensions['refresh_jobs']
+if not hasattr(refresh_jobs.queue, 'celery'):
+    raise RuntimeError('Set JOB_QUEUE_BACKEND=celery to run refresh jobs on Celery workers')
+celery = refresh_jobs.queue.celery
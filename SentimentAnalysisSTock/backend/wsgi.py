@@ -0,0 +1,16 @@
+"""
+Production entry point
+Run with gunicorn from the project root:
+
+    gunicorn -c gunicorn.conf.py backend.wsgi:app
+
+See gunicorn.conf.py for worker, thread and connection settings.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app import create_app
+
+app, socketio = create_app()
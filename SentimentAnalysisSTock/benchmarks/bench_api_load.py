@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Load test the API the way dashboards use it
+Builds a synthetic database (symbols x days x posts per day, plus votes on today's
+predictions), serves the WSGI app from a thread of this process and lets concurrent
+simulated dashboards replay the request mix of static/js/dashboard.js: the initial load,
+then new posts, price updates, stock changes, votes and comparisons. Each dashboard also
+visits every other API route once; refresh jobs are queued but never run. Reports p50/p95/p99 latency, throughput and SQL
+statements per request, overall and per route, and compares them with a JSON baseline:
+
+    python benchmarks/bench_api_load.py --save-baseline   # record the baseline
+    python benchmarks/bench_api_load.py                   # exits 1 if anything regressed
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from common import BASELINE_DIR, ROOT, load_baseline, save_baseline, use_temp_database
+
+sys.path.append(ROOT)
+
+import numpy as np
+import requests
+from backend.models.models import db, Prediction
+from backend.utils.synthetic_data import generate, load, universe
+
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, 'api_load.json')
+DEFAULT_SYMBOLS = ['AAPL', 'GOOGL', 'AMZN', 'META', 'NFLX', 'TSLA', 'MSFT', 'NVDA', 'IBM',
+                   'CRM', 'ORCL', 'ADBE', 'INTC', 'AMD', 'UBER', 'PYPL', 'SPOT', 'SQ']
+POST_FIELDS = 'id,symbol,title,content,sentiment_score,source,source_url,posted_at'
+
+# What a connected dashboard does after its initial load, and how often
+DASHBOARD_EVENTS = (
+    ('new_post', 0.35),       # socket 'new_post' -> fetch posts since the latest id
+    ('price_update', 0.2),    # socket 'price_update' for the selected stock -> reload its chart
+    ('select_stock', 0.2),    # stock selector change -> load that stock's chart
+    ('vote', 0.1),
+    ('compare', 0.1),
+    ('reconnect', 0.05)       # socket reconnect -> full reload
+)
+
+def seed(symbols, days, posts_per_day, votes, seed_value):
+    """Load the synthetic dataset; returns today's prediction ids"""
+    load(generate(symbols, days=days, posts_per_day=posts_per_day, votes_per_prediction=votes,
+                  seed=seed_value))
+    return [pid for pid, in db.session.query(Prediction.id).filter(Prediction.prediction_date == date.today())]
+
+class IdleQueue:
+    """
+    A refresh job queue that never runs its jobs, so POST /api/data/refresh is measured
+    without a real pipeline run (live API calls, writes, retry sleeps) inside the benchmark
+    """
+
+    def bind(self, run):
+        pass
+
+    def submit(self, job_id):
+        pass
+
+class Dashboard:
+    """One simulated browser tab; yields (route rule, method, path, json body)"""
+
+    def __init__(self, rng, symbols, prediction_ids):
+        self.rng = rng
+        self.symbols = symbols
+        self.prediction_ids = prediction_ids
+        self.selected = symbols[0]
+        self.latest_post_id = None
+
+    def initial_load(self):
+        return [
+            ('/api/sentiment/current', 'GET', '/api/sentiment/current', None),
+            ('/api/prices/current', 'GET', '/api/prices/current', None),
+            ('/api/sentiment/current', 'GET', '/api/sentiment/current', None),
+            self.correlation(),
+            self.recent_posts(),
+            ('/api/predictions/current/with-votes', 'GET', '/api/predictions/current/with-votes', None),
+            ('/api/prices/current', 'GET', '/api/prices/current', None)
+        ]
+
+    def correlation(self):
+        return ('/api/correlation/<symbol>', 'GET',
+                f'/api/correlation/{self.selected}?days=30&max_points=500', None)
+
+    def recent_posts(self):
+        path = f'/api/posts/recent?limit=20&fields={POST_FIELDS}'
+        if self.latest_post_id is not None:
+            path += f'&since_id={self.latest_post_id}'
+        return ('/api/posts/recent', 'GET', path, None)
+
+    def every_other_route(self):
+        """The routes the dashboard never calls, once each"""
+        symbol = self.rng.choice(self.symbols)
+        pair = ','.join(self.rng.sample(self.symbols, min(2, len(self.symbols))))
+        pid = self.rng.choice(self.prediction_ids)
+        return [
+            ('/api/health', 'GET', '/api/health', None),
+            ('/api/metrics', 'GET', '/api/metrics', None),
+            ('/api/stocks', 'GET', '/api/stocks', None),
+            ('/api/sentiment/history/<symbol>', 'GET', f'/api/sentiment/history/{symbol}?days=90', None),
+            ('/api/prices/history/<symbol>', 'GET', f'/api/prices/history/{symbol}?days=90', None),
+            ('/api/analytics/correlation/<symbol>', 'GET', f'/api/analytics/correlation/{symbol}?days=90', None),
+            ('/api/correlation/matrix', 'GET', '/api/correlation/matrix?days=90', None),
+            ('/api/predictions/current', 'GET', '/api/predictions/current', None),
+            ('/api/data/refresh', 'POST', '/api/data/refresh', None),
+            ('/api/analytics/summary', 'GET', '/api/analytics/summary', None),
+            ('/api/changes', 'GET', '/api/changes?limit=100', None),
+            ('/api/predictions/<int:prediction_id>/votes', 'GET', f'/api/predictions/{pid}/votes', None),
+            ('/api/compare/metrics/<symbols>', 'GET', f'/api/compare/metrics/{pair}', None)
+        ]
+
+    def next_event(self):
+        names, weights = zip(*DASHBOARD_EVENTS)
+        event = self.rng.choices(names, weights)[0]
+        if event == 'new_post':
+            return [self.recent_posts()]
+        if event == 'price_update':
+            return [self.correlation()]
+        if event == 'select_stock':
+            self.selected = self.rng.choice(self.symbols)
+            return [self.correlation()]
+        if event == 'vote':
+            pid = self.rng.choice(self.prediction_ids)
+            return [('/api/predictions/<int:prediction_id>/vote', 'POST', f'/api/predictions/{pid}/vote',
+                     {'vote_type': self.rng.choice(['agree', 'disagree'])})]
+        if event == 'compare':
+            picked = self.rng.sample(self.symbols, min(self.rng.randint(2, 4), len(self.symbols)))
+            return [('/api/compare/stocks', 'POST', '/api/compare/stocks', {'symbols': picked, 'days': 30})]
+        return self.initial_load()
+
+def run_dashboard(base_url, dashboard, steps):
+    """Replay one dashboard; returns [(rule, seconds, status)]"""
+    session = requests.Session()
+    results = []
+
+    def send(requests_to_send):
+        for rule, method, path, body in requests_to_send:
+            start = time.perf_counter()
+            response = session.request(method, base_url + path, json=body, timeout=120)
+            results.append((rule, time.perf_counter() - start, response.status_code))
+            if rule == '/api/posts/recent' and response.ok:
+                ids = [post['id'] for post in response.json().get('posts', [])]
+                if ids:
+                    dashboard.latest_post_id = max(ids + [dashboard.latest_post_id or 0])
+
+    send(dashboard.initial_load())
+    send(dashboard.every_other_route())
+    for _ in range(steps):
+        send(dashboard.next_event())
+    return results
+
+def summarize(latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3), 'p99_ms': round(float(p99), 3)}
+
+def run_level(base_url, metrics, dashboards, steps, symbols, prediction_ids, seed_value):
+    """Run `dashboards` concurrent dashboards of `steps` events each; returns the level's results"""
+    before = metrics.route_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=dashboards) as pool:
+        runs = list(pool.map(
+            lambda i: run_dashboard(base_url, Dashboard(random.Random(seed_value * 1000 + i), symbols, prediction_ids), steps),
+            range(dashboards)))
+    wall = time.perf_counter() - start
+    after = metrics.route_stats()
+
+    results = [result for run in runs for result in run]
+    by_route = {}
+    for rule, seconds, status in results:
+        by_route.setdefault(rule, []).append((seconds, status))
+
+    routes = {}
+    total_queries = 0
+    for rule, samples in sorted(by_route.items()):
+        requests_before, queries_before, _ = before.get(rule, (0, 0, 0))
+        requests_after, queries_after, _ = after.get(rule, (0, 0, 0))
+        queries = queries_after - queries_before
+        total_queries += queries
+        served = requests_after - requests_before
+        routes[rule] = dict(summarize([s for s, _ in samples]),
+                            requests=len(samples),
+                            errors=sum(status >= 400 for _, status in samples),
+                            queries_per_request=round(queries / served, 3) if served else None)
+
+    return dict(summarize([seconds for _, seconds, _ in results]),
+                requests=len(results),
+                errors=sum(status >= 400 for _, _, status in results),
+                throughput=round(len(results) / wall, 2),
+                queries_per_request=round(total_queries / len(results), 3),
+                routes=routes)
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """Regressions of current against baseline, as printable lines"""
+    regressions = []
+    for level, result in current['levels'].items():
+        base = baseline['levels'].get(level)
+        if base is None:
+            continue
+        if result['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f"{level} dashboards: throughput {result['throughput']} req/s, "
+                               f"baseline {base['throughput']}")
+        if result['errors'] > base['errors']:
+            regressions.append(f"{level} dashboards: {result['errors']} errors, baseline {base['errors']}")
+        for rule, route in [('(all)', result)] + sorted(result['routes'].items()):
+            base_route = base if rule == '(all)' else base['routes'].get(rule)
+            if base_route is None:
+                continue
+            for key in ('p95_ms', 'p99_ms'):
+                if (route[key] > base_route[key] * (1 + tolerance)
+                        and route[key] - base_route[key] > min_delta_ms):
+                    regressions.append(f"{level} dashboards {rule}: {key} {route[key]:.1f}, "
+                                       f"baseline {base_route[key]:.1f}")
+            if (route['queries_per_request'] is not None and base_route['queries_per_request'] is not None
+                    and route['queries_per_request'] > base_route['queries_per_request'] + 0.01):
+                regressions.append(f"{level} dashboards {rule}: {route['queries_per_request']} queries per "
+                                   f"request, baseline {base_route['queries_per_request']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=18)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--posts-per-day', type=int, default=5)
+    parser.add_argument('--votes', type=int, default=20, help='average votes per prediction')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the synthetic dataset')
+    parser.add_argument('--dashboards', default='1,8,32', help='comma-separated numbers of concurrent dashboards')
+    parser.add_argument('--steps', type=int, default=30, help='events per dashboard after its initial load')
+    parser.add_argument('--no-cache', action='store_true', help='turn the history cache off')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed fractional slowdown of p95/p99 and throughput')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='latency changes smaller than this never count as regressions')
+    args = parser.parse_args()
+
+    # The app reads these when its config is imported, so set them first
+    symbols = universe(args.symbols, DEFAULT_SYMBOLS)
+    use_temp_database('bench_api_load_')
+    os.environ.update({
+        'STOCKS': ','.join(symbols),
+        'RATE_LIMIT_ENABLED': 'false',
+        'METRICS_ENABLED': 'true',
+        'METRICS_QUERY_LOG_THRESHOLD': '1000000',
+        'BROADCAST_POLL_INTERVAL': '0',
+        'COMPARE_MAX_SYMBOLS': str(max(50, len(symbols)))
+    })
+    if args.no_cache:
+        os.environ['HISTORY_CACHE_TTL'] = '0'
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from backend.app import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    app, _ = create_app()
+    app.extensions['refresh_jobs'].queue = IdleQueue()
+    with app.app_context():
+        prediction_ids = seed(symbols, args.days, args.posts_per_day, args.votes, args.seed)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    metrics = app.extensions['metrics']
+
+    levels = [int(d) for d in args.dashboards.split(',')]
+    print(f"API load test ({len(symbols)} stocks x {args.days} days, {args.posts_per_day} posts/day, "
+          f"{args.votes} votes/prediction, {args.steps} events per dashboard)")
+    print("=" * 84)
+
+    try:
+        run_level(base_url, metrics, 2, 3, symbols, prediction_ids, 0)  # warm up imports and connections
+        results = {}
+        for dashboards in levels:
+            result = results[str(dashboards)] = run_level(base_url, metrics, dashboards, args.steps,
+                                                          symbols, prediction_ids, dashboards)
+            print(f"\n{dashboards} dashboards: {result['requests']} requests, {result['throughput']:.1f} req/s, "
+                  f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+                  f"{result['queries_per_request']:.2f} queries/request, {result['errors']} errors")
+            print(f"  {'route':44} {'reqs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7}")
+            for rule, route in result['routes'].items():
+                queries = route['queries_per_request']
+                print(f"  {rule:44} {route['requests']:5d} {route['p50_ms']:8.1f} {route['p95_ms']:8.1f} "
+                      f"{route['p99_ms']:8.1f} {queries if queries is not None else '-':>7}")
+    finally:
+        server.shutdown()
+
+    current = {
+        'dataset': {'symbols': len(symbols), 'days': args.days, 'posts_per_day': args.posts_per_day,
+                    'votes': args.votes, 'seed': args.seed, 'steps': args.steps, 'cache': not args.no_cache},
+        'levels': results
+    }
+
+    if args.save_baseline:
+        save_baseline(args.baseline, current)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        return 0
+    if baseline['dataset'] != current['dataset']:
+        print(f"\nBaseline was recorded with {baseline['dataset']}; not comparable, rerun with the same options")
+        return 1
+
+    regressions = compare(current, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sync API (gunicorn, thread per request) against the async API
+(hypercorn + Quart + SQLAlchemy asyncio), one worker process each, on a synthetic
+database. Every level of client concurrency replays the same dashboard-like request
+mix against both servers and reports throughput and latency percentiles.
+"""
+
+import os
+import sys
+import time
+import random
+import signal
+import tempfile
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Point the app at a throwaway database before the config is imported
+_db_dir = tempfile.mkdtemp(prefix='bench_async_api_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import numpy as np
+import requests
+from backend.app import create_app
+from backend.config.config import Config
+from backend.utils.synthetic_data import generate, load
+
+# Both servers read the same file; caching and rate limiting are off so every request hits the database
+SERVER_ENV = {
+    'DATABASE_URL': os.environ['DATABASE_URL'],
+    'RATE_LIMIT_ENABLED': 'false',
+    'HISTORY_CACHE_TTL': '0',
+    'BROADCAST_POLL_INTERVAL': '0',
+    'GUNICORN_ACCESS_LOG': os.devnull,
+    'GUNICORN_PRELOAD': 'false'
+}
+
+def seed(days, posts_per_day):
+    """Load `days` of synthetic prices, sentiment, posts and predictions for every tracked stock"""
+    load(generate(Config.STOCKS, days=days, posts_per_day=posts_per_day, votes_per_prediction=0))
+
+def workload(rng):
+    """One dashboard-like request: (method, path, json body or None)"""
+    symbol = rng.choice(Config.STOCKS)
+    return rng.choice([
+        ('GET', '/api/sentiment/current', None),
+        ('GET', '/api/prices/current', None),
+        ('GET', '/api/predictions/current/with-votes', None),
+        ('GET', '/api/posts/recent?limit=50', None),
+        ('GET', f'/api/sentiment/history/{symbol}?days=90', None),
+        ('GET', f'/api/correlation/{symbol}?days=90', None),
+        ('GET', '/api/analytics/summary', None),
+        ('POST', '/api/compare/stocks', {'symbols': rng.sample(Config.STOCKS, 4), 'days': 90}),
+    ])
+
+def start_server(kind, port, threads):
+    """Start one worker of the sync or async server and wait until it answers"""
+    env = dict(os.environ, **SERVER_ENV)
+    if kind == 'sync':
+        env.update(GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY='1', GUNICORN_THREADS=str(threads))
+        cmd = ['gunicorn', '-c', 'gunicorn.conf.py', 'backend.wsgi:app']
+    else:
+        cmd = ['hypercorn', '--bind', f'127.0.0.1:{port}', '--workers', '1', 'backend.asgi:app']
+
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/health', timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def run_load(base_url, concurrency, total, seed_value):
+    """Send `total` requests from `concurrency` clients; returns (wall seconds, latencies, errors)"""
+    rng = random.Random(seed_value)
+    plan = [workload(rng) for _ in range(total)]
+    sessions = [requests.Session() for _ in range(concurrency)]
+
+    def client(index):
+        session = sessions[index]
+        latencies, errors = [], 0
+        for method, path, body in plan[index::concurrency]:
+            start = time.perf_counter()
+            response = session.request(method, base_url + path, json=body, timeout=120)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([l for client_latencies, _ in results for l in client_latencies])
+    return wall, latencies, sum(errors for _, errors in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--posts-per-day', type=int, default=5)
+    parser.add_argument('--concurrency', default='1,8,32,128',
+                        help='comma-separated numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=400, help='requests per concurrency level')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads in the sync worker')
+    parser.add_argument('--port', type=int, default=8810)
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        seed(args.days, args.posts_per_day)
+
+    levels = [int(c) for c in args.concurrency.split(',')]
+    servers = [('sync', f'gunicorn gthread x{args.threads}', args.port),
+               ('async', 'hypercorn + Quart', args.port + 1)]
+
+    print(f"Sync vs async API ({len(Config.STOCKS)} stocks x {args.days} days, "
+          f"{args.requests} mixed requests per level, one worker each)")
+    print("=" * 86)
+    print(f"{'server':24} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>6}")
+
+    for kind, label, port in servers:
+        process = start_server(kind, port, args.threads)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            run_load(base_url, 4, 40, 0)  # warm up connections and imports
+            for concurrency in levels:
+                wall, latencies, errors = run_load(base_url, concurrency, args.requests, concurrency)
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+                print(f"{label:24} {concurrency:7d} {len(latencies) / wall:8.1f} {p50:8.1f} {p95:8.1f} "
+                      f"{p99:8.1f} {latencies.max() * 1000:8.1f} {errors:6d}")
+        finally:
+            stop_server(process)
+
+if __name__ == "__main__":
+    main()
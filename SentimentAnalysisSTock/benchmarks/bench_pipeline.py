@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline pipeline stages on replayed fixtures
+Reddit, News API and Yahoo Finance responses are built from a fixed seed and fed back to
+the real collectors in place of the network, so every run sees the same input. Stages:
+
+    clean_text              SentimentAnalyzer.clean_text, per 1k texts
+    analyze_post            SentimentAnalyzer.analyze_post, per 1k texts
+    ingest_posts            data_pipeline.collect_and_store_posts, per 10k rows
+    sentiment_summaries[N]  data_pipeline.generate_sentiment_summaries at N symbols
+    price_frames            StockDataCollector.collect_stock_prices, frames to rows
+    predictions             generate_predictions.generate_predictions_for_today
+
+Reports ops/sec (one op is the unit above), RSS growth and peak Python allocations per
+stage, and compares them with a JSON baseline:
+
+    python benchmarks/bench_pipeline.py --save-baseline   # record the baseline
+    python benchmarks/bench_pipeline.py                   # exits 1 if anything regressed
+"""
+
+import os
+import sys
+import math
+import random
+import argparse
+from collections import namedtuple
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from common import BASELINE_DIR, ROOT, load_baseline, measure, save_baseline, use_temp_database
+
+use_temp_database('bench_pipeline_')
+sys.path.append(ROOT)
+
+import pandas as pd
+from backend.app import create_app
+from backend.config.config import Config
+from backend.models.models import db, Post, StockPrice, SentimentSummary, Prediction, PredictionVote, ChangeLog
+from backend.utils import data_collectors
+from backend.utils.data_collectors import StockDataCollector
+from backend.utils.sentiment_analyzer import SentimentAnalyzer
+from backend.utils.synthetic_data import POST_TEMPLATES, generate, load, universe
+import data_pipeline
+import generate_predictions
+
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, 'pipeline.json')
+DEFAULT_SYMBOLS = ['AAPL', 'GOOGL', 'AMZN', 'META', 'NFLX', 'TSLA', 'MSFT', 'NVDA', 'IBM',
+                   'CRM', 'ORCL', 'ADBE', 'INTC', 'AMD', 'UBER', 'PYPL', 'SPOT', 'SQ']
+
+# What collect_and_store_posts asks each source for, per symbol
+REDDIT_LIMIT = 50
+NEWS_PAGE_SIZE = 20
+
+# run() is timed; prepare(), if any, runs untimed before each call; items is what one op
+# covers; warmup=False skips the untimed first call where the fixture is already warm
+Stage = namedtuple('Stage', 'run prepare items unit warmup', defaults=(True,))
+
+def post_texts(count, rng):
+    """(title, content) pairs shaped like social posts: cashtags, links, emoji, shouting"""
+    texts = []
+    for i in range(count):
+        title, content = POST_TEMPLATES[rng.randrange(len(POST_TEMPLATES))]
+        symbol = rng.choice(DEFAULT_SYMBOLS)
+        if rng.random() < 0.5:
+            title = f"${symbol} {title}{rng.choice(['!!!', '?', ' 🚀🚀', ' (DD)', ''])}"
+        if rng.random() < 0.3:
+            content += f" Source: https://example.com/{symbol.lower()}/{i}?ref=feed"
+        if rng.random() < 0.3:
+            content = f"{content} {content.upper()}"
+        texts.append((title, content))
+    return texts
+
+def reddit_fixture(symbols, per_symbol, rng, now):
+    """symbol -> search results as praw returns them"""
+    results = {}
+    for symbol in symbols:
+        results[symbol] = [
+            SimpleNamespace(title=title, selftext=content, permalink=f'/r/stocks/comments/{symbol.lower()}{i}/',
+                            created_utc=(now - timedelta(seconds=rng.randrange(7 * 86400))).timestamp())
+            for i, (title, content) in enumerate(post_texts(per_symbol, rng))
+        ]
+    return results
+
+def news_fixture(symbols, per_symbol, rng, now):
+    """symbol -> News API articles"""
+    results = {}
+    for symbol in symbols:
+        results[symbol] = [
+            {'title': title, 'description': content, 'url': f'https://news.example.com/{symbol.lower()}/{i}',
+             'publishedAt': (now - timedelta(seconds=rng.randrange(7 * 86400))).strftime('%Y-%m-%dT%H:%M:%SZ')}
+            for i, (title, content) in enumerate(post_texts(per_symbol, rng))
+        ]
+    return results
+
+def history_fixture(prices):
+    """symbol -> daily OHLCV frame as yfinance's Ticker.history() returns it"""
+    frames = {}
+    for symbol, rows in prices.groupby('symbol'):
+        index = pd.DatetimeIndex(pd.to_datetime(rows['date']), name='Date').tz_localize('America/New_York')
+        frames[symbol] = pd.DataFrame({
+            'Open': rows['open_price'].to_numpy(), 'High': rows['high_price'].to_numpy(),
+            'Low': rows['low_price'].to_numpy(), 'Close': rows['close_price'].to_numpy(),
+            'Volume': rows['volume'].to_numpy(), 'Dividends': 0.0, 'Stock Splits': 0.0
+        }, index=index)
+    return frames
+
+class ReplayReddit:
+    def __init__(self, results):
+        self.results = results
+
+    def subreddit(self, name):
+        return self
+
+    def search(self, query, sort='new', limit=100):
+        return iter(self.results.get(query, [])[:limit])
+
+class ReplayNews:
+    def __init__(self, results):
+        self.results = results
+
+    def get_everything(self, q, page_size=100, **kwargs):
+        symbol = q.split(' OR ')[0]
+        return {'status': 'ok', 'articles': self.results.get(symbol, [])[:page_size]}
+
+class ReplayTicker:
+    frames = {}
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, period='1mo'):
+        return self.frames.get(self.symbol, pd.DataFrame())
+
+@contextmanager
+def replay(reddit=None, news=None, histories=None):
+    """Serve the collectors from fixtures instead of praw, News API and yfinance"""
+    saved = (data_collectors.praw, data_collectors.NewsApiClient, data_collectors.yf, Config.NEWS_API_KEY)
+    ReplayTicker.frames = histories or {}
+    data_collectors.praw = SimpleNamespace(Reddit=lambda **kwargs: ReplayReddit(reddit or {}))
+    data_collectors.NewsApiClient = lambda api_key: ReplayNews(news or {})
+    data_collectors.yf = SimpleNamespace(Ticker=ReplayTicker)
+    Config.NEWS_API_KEY = 'replay'
+    try:
+        yield
+    finally:
+        data_collectors.praw, data_collectors.NewsApiClient, data_collectors.yf, Config.NEWS_API_KEY = saved
+
+@contextmanager
+def tracking(symbols):
+    """Run with Config.STOCKS set to symbols"""
+    saved = Config.STOCKS
+    Config.STOCKS = list(symbols)
+    try:
+        yield
+    finally:
+        Config.STOCKS = saved
+
+def clear_tables():
+    for model in (PredictionVote, Prediction, SentimentSummary, StockPrice, Post, ChangeLog):
+        db.session.query(model).delete()
+    db.session.commit()
+
+@contextmanager
+def clean_text_stage(args):
+    analyzer = SentimentAnalyzer()
+    texts = [f'{title} {content}' for title, content in post_texts(args.texts, random.Random(args.seed))]
+
+    def run():
+        for text in texts:
+            analyzer.clean_text(text)
+    yield Stage(run, None, len(texts), 'texts')
+
+@contextmanager
+def analyze_post_stage(args):
+    analyzer = SentimentAnalyzer()
+    texts = post_texts(args.texts, random.Random(args.seed))
+
+    def run():
+        for title, content in texts:
+            analyzer.analyze_post(title, content)
+    yield Stage(run, None, len(texts), 'texts')
+
+@contextmanager
+def ingest_stage(args):
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    symbols = universe(math.ceil(args.ingest_rows / (REDDIT_LIMIT + NEWS_PAGE_SIZE)), DEFAULT_SYMBOLS)
+    reddit = reddit_fixture(symbols, REDDIT_LIMIT, rng, now)
+    news = news_fixture(symbols, NEWS_PAGE_SIZE, rng, now)
+    clear_tables()
+
+    def prepare():
+        db.session.query(Post).delete()
+        db.session.query(ChangeLog).delete()
+        db.session.commit()
+
+    with replay(reddit=reddit, news=news), tracking(symbols):
+        yield Stage(data_pipeline.collect_and_store_posts, prepare,
+                    len(symbols) * (REDDIT_LIMIT + NEWS_PAGE_SIZE), 'rows')
+
+def summaries_stage(count):
+    @contextmanager
+    def stage(args):
+        # The pipeline recomputes the last 30 days on every run, so most summaries already exist
+        symbols = universe(count, DEFAULT_SYMBOLS)
+        clear_tables()
+        load(generate(symbols, days=31, posts_per_day=args.posts_per_day, votes_per_prediction=0,
+                      prediction_days=1, seed=args.seed))
+        with tracking(symbols):
+            yield Stage(data_pipeline.generate_sentiment_summaries, None, len(symbols), 'symbols', warmup=False)
+    return stage
+
+@contextmanager
+def price_frames_stage(args):
+    symbols = universe(args.price_symbols, DEFAULT_SYMBOLS)
+    prices = generate(symbols, days=30, posts_per_day=0, votes_per_prediction=0, prediction_days=1,
+                      seed=args.seed)['prices']
+    collector = StockDataCollector()
+    with replay(histories=history_fixture(prices)):
+        yield Stage(lambda: collector.collect_stock_prices(symbols, period='30d'), None, len(prices), 'rows')
+
+@contextmanager
+def predictions_stage(args):
+    symbols = universe(args.prediction_symbols, DEFAULT_SYMBOLS)
+    clear_tables()
+    load(generate(symbols, days=8, posts_per_day=args.posts_per_day, store_posts=False,
+                  votes_per_prediction=0, prediction_days=1, seed=args.seed))
+    with tracking(symbols):
+        yield Stage(generate_predictions.generate_predictions_for_today, None, len(symbols), 'symbols')
+
+def stages(args):
+    """(name, stage factory) in run order"""
+    found = [('clean_text', clean_text_stage), ('analyze_post', analyze_post_stage),
+             ('ingest_posts', ingest_stage)]
+    found += [(f'sentiment_summaries[{count}]', summaries_stage(count))
+              for count in args.summary_symbols]
+    found += [('price_frames', price_frames_stage), ('predictions', predictions_stage)]
+    if args.stages:
+        wanted = set(args.stages)
+        found = [(name, factory) for name, factory in found if name.split('[')[0] in wanted]
+    return found
+
+def compare(current, baseline, tolerance, min_mb):
+    """Regressions of current against baseline, as printable lines"""
+    regressions = []
+    for name, result in current['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']} ops/s, baseline {base['ops_per_sec']}")
+        for key in ('rss_growth_mb', 'alloc_peak_mb'):
+            if result[key] > base[key] * (1 + tolerance) and result[key] - base[key] > min_mb:
+                regressions.append(f"{name}: {key} {result[key]}, baseline {base[key]}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', type=lambda s: s.split(','), default=None,
+                        help='comma-separated stage names (default: all)')
+    parser.add_argument('--texts', type=int, default=1000, help='texts per clean_text/analyze_post op')
+    parser.add_argument('--ingest-rows', type=int, default=10000, help='posts per ingest op')
+    parser.add_argument('--summary-symbols', type=lambda s: [int(n) for n in s.split(',')],
+                        default=[18, 500, 5000], help='comma-separated universe sizes for the summaries')
+    parser.add_argument('--posts-per-day', type=int, default=3, help='average posts per symbol and day')
+    parser.add_argument('--price-symbols', type=int, default=500)
+    parser.add_argument('--prediction-symbols', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42, help='seed of the fixtures')
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds to keep repeating each stage')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed fractional drop in ops/s and growth in memory')
+    parser.add_argument('--min-mb', type=float, default=2.0,
+                        help='memory changes smaller than this never count as regressions')
+    args = parser.parse_args()
+
+    app, _ = create_app()
+
+    print(f"Pipeline benchmark (seed {args.seed}, at least {args.min_time}s per stage)")
+    print("=" * 96)
+    print(f"{'stage':26} {'op':>12} {'ops/s':>9} {'items/s':>10} {'median ms':>10} "
+          f"{'RSS +MB':>8} {'alloc MB':>9} {'retained':>9}")
+
+    results = {}
+    with app.app_context(), open(os.devnull, 'w') as devnull:
+        db.create_all()
+        for name, factory in stages(args):
+            with factory(args) as stage:
+                # The stages print per item; keep that out of the report
+                with redirect_stdout(devnull):
+                    result = measure(stage.run, stage.prepare, min_time=args.min_time, warmup=stage.warmup)
+            result.update(items=stage.items, unit=stage.unit,
+                          items_per_sec=round(stage.items * result['ops_per_sec'], 1))
+            results[name] = result
+            print(f"{name:26} {f'{stage.items} {stage.unit}':>12} {result['ops_per_sec']:9.2f} "
+                  f"{result['items_per_sec']:10.0f} {result['median_ms']:10.1f} {result['rss_growth_mb']:8.1f} "
+                  f"{result['alloc_peak_mb']:9.2f} {result['retained_blocks']:9d}")
+
+    current = {
+        'dataset': {'seed': args.seed, 'texts': args.texts, 'ingest_rows': args.ingest_rows,
+                    'posts_per_day': args.posts_per_day, 'price_symbols': args.price_symbols,
+                    'prediction_symbols': args.prediction_symbols},
+        'stages': results
+    }
+
+    if args.save_baseline:
+        save_baseline(args.baseline, current)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        return 0
+    if baseline['dataset'] != current['dataset']:
+        print(f"\nBaseline was recorded with {baseline['dataset']}; not comparable, rerun with the same options")
+        return 1
+
+    regressions = compare(current, baseline, args.tolerance, args.min_mb)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
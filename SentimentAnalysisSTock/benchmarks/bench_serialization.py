@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ORM + to_dict + jsonify path against the Core rows + fast JSON path
+for the history endpoints, on a synthetic 10k-row history
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from datetime import date, timedelta
+
+# Point the app at a throwaway database before the config is imported
+_db_dir = tempfile.mkdtemp(prefix='bench_serialization_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import jsonify
+from backend.app import create_app
+from backend.models.models import db, StockPrice, SentimentSummary
+from backend.utils.serializers import json_response, rows_to_records
+from backend.utils.timeseries import sentiment_history_rows, price_history_rows
+
+SYMBOL = 'BENCH'
+
+def seed(rows):
+    """Insert `rows` days of sentiment and price history for one symbol"""
+    rng = np.random.default_rng(42)
+    start = date.today() - timedelta(days=rows - 1)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    sentiments = np.clip(rng.normal(0.1, 0.3, rows), -1, 1)
+    post_counts = rng.integers(1, 50, rows)
+
+    db.session.execute(SentimentSummary.__table__.insert(), [
+        {
+            'symbol': SYMBOL,
+            'date': start + timedelta(days=i),
+            'avg_sentiment': float(sentiments[i]),
+            'post_count': int(post_counts[i]),
+            'positive_count': int(post_counts[i] // 2),
+            'negative_count': int(post_counts[i] // 4),
+            'neutral_count': int(post_counts[i] - post_counts[i] // 2 - post_counts[i] // 4)
+        } for i in range(rows)
+    ])
+    db.session.execute(StockPrice.__table__.insert(), [
+        {
+            'symbol': SYMBOL,
+            'date': start + timedelta(days=i),
+            'open_price': float(closes[i] * 0.995),
+            'high_price': float(closes[i] * 1.01),
+            'low_price': float(closes[i] * 0.99),
+            'close_price': float(closes[i]),
+            'volume': int(1000000 + i)
+        } for i in range(rows)
+    ])
+    db.session.commit()
+
+def orm_path(model, start_date):
+    """Today's read path: hydrate ORM objects, call to_dict, jsonify"""
+    history = db.session.query(model)\
+        .filter(model.symbol == SYMBOL)\
+        .filter(model.date >= start_date)\
+        .order_by(model.date)\
+        .all()
+    return jsonify({'symbol': SYMBOL, 'history': [h.to_dict() for h in history]}).get_data()
+
+def fast_path(fetch_rows, start_date):
+    """Core row tuples serialized with the fast encoder"""
+    columns, rows = fetch_rows(SYMBOL, start_date)
+    return json_response({'symbol': SYMBOL, 'history': rows_to_records(columns, rows)}).get_data()
+
+def time_it(fn, repeat):
+    """Return the best and median wall time of `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), float(np.median(timings))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app, _ = create_app()
+
+    with app.app_context(), app.test_request_context():
+        seed(args.rows)
+        start_date = date.today() - timedelta(days=args.rows)
+
+        print(f"History serialization benchmark ({args.rows} rows, best/median of {args.repeat})")
+        print("=" * 70)
+
+        for name, model, fetch_rows in [
+            ('sentiment/history', SentimentSummary, sentiment_history_rows),
+            ('prices/history', StockPrice, price_history_rows)
+        ]:
+            slow = lambda: orm_path(model, start_date)
+            fast = lambda: fast_path(fetch_rows, start_date)
+
+            # Both paths must produce the same document
+            assert json.loads(slow()) == json.loads(fast()), f"{name}: outputs differ"
+
+            orm_best, orm_median = time_it(slow, args.repeat)
+            fast_best, fast_median = time_it(fast, args.repeat)
+
+            print(f"{name:20} ORM  {orm_best * 1000:8.1f} ms / {orm_median * 1000:8.1f} ms")
+            print(f"{'':20} Core {fast_best * 1000:8.1f} ms / {fast_median * 1000:8.1f} ms"
+                  f"   ({orm_median / fast_median:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
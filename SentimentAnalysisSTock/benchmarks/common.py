@@ -0,0 +1,121 @@
+"""
+Helpers shared by the benchmarks: throwaway databases, timing with memory figures, and
+JSON baselines under benchmarks/baselines/ (kept out of git; the numbers only hold for
+the machine that recorded them)
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+def use_temp_database(prefix):
+    """Point the app at a new SQLite file; call before the config is imported"""
+    db_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    return os.environ['DATABASE_URL']
+
+def _status_kb(field):
+    """A kB field of /proc/self/status, or None off Linux"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def rss_mb():
+    """Current resident set size"""
+    kb = _status_kb('VmRSS')
+    return kb / 1024 if kb is not None else peak_rss_mb()
+
+def reset_peak_rss():
+    """Restart the peak RSS high-water mark at the current RSS; False where that isn't possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Peak resident set size since the last reset_peak_rss() (or process start)"""
+    kb = _status_kb('VmHWM')
+    if kb is None:
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            kb /= 1024  # bytes there
+    return kb / 1024
+
+def measure(run, prepare=None, min_time=1.0, max_runs=50, warmup=True):
+    """
+    Time run() after one warm-up call (unless warmup is False), repeating until min_time has passed or max_runs,
+    then repeat it once under tracemalloc. prepare(), if given, runs untimed before every
+    call. Returns ops per second, best and median milliseconds, the RSS growth above the
+    starting point, peak traced Python allocations, and blocks still allocated afterwards.
+    """
+    if warmup:
+        if prepare:
+            prepare()
+        run()
+
+    gc.collect()
+    rss_start = rss_mb()
+    reset_peak_rss()
+    timings = []
+    while len(timings) < max_runs and (not timings or sum(timings) < min_time):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    rss_peak = peak_rss_mb()
+
+    # Traced separately: tracemalloc slows allocation-heavy code down several times
+    if prepare:
+        prepare()
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    run()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return {
+        'runs': len(timings),
+        'ops_per_sec': round(1 / median, 3),
+        'best_ms': round(timings[0] * 1000, 3),
+        'median_ms': round(median * 1000, 3),
+        'rss_growth_mb': round(max(0.0, rss_peak - rss_start), 1),
+        'alloc_peak_mb': round(traced_peak / 2 ** 20, 2),
+        'retained_blocks': retained
+    }
+
+def save_baseline(path, current):
+    """Write current as the baseline at path, stamped with the time"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(dict(current, recorded_at=datetime.now().isoformat(timespec='seconds')), f, indent=2)
+    print(f"\nBaseline written to {path}")
+
+def load_baseline(path):
+    """The baseline at path, or None (after saying so) when there is none"""
+    if not os.path.exists(path):
+        print(f"\nNo baseline at {path}; run with --save-baseline to record one")
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -1,159 +0,0 @@
-#!/usr/bin/env python3
-"""
-Complete missing predictions for stocks without recent sentiment data
-"""
-
-import os
-import sys
-from datetime import datetime, date, timedelta
-import numpy as np
-
-# Add backend to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
-
-from backend.app import create_app
-from backend.models.models import db, SentimentSummary, Prediction
-from backend.config.config import Config
-
-def create_sample_sentiment_data():
-    """Create sample sentiment data for missing stocks"""
-    print("Creating sample sentiment data for missing stocks...")
-
-    today = date.today()
-    missing_stocks = ['TSLA', 'MSFT', 'NVDA']
-
-    for symbol in missing_stocks:
-        print(f"Creating sentiment data for {symbol}...")
-
-        # Create sentiment data for the last 3 days
-        for i in range(3):
-            target_date = today - timedelta(days=i)
-
-            # Check if data already exists
-            existing = db.session.query(SentimentSummary)\
-                .filter_by(symbol=symbol, date=target_date)\
-                .first()
-
-            if not existing:
-                # Generate realistic sentiment data
-                base_sentiment = np.random.normal(0.6, 0.2)  # Slightly positive
-                base_sentiment = max(-0.8, min(0.9, base_sentiment))  # Clamp to realistic range
-
-                post_count = np.random.randint(2, 8)  # Random post count
-
-                # Calculate sentiment distribution
-                positive_count = int(post_count * 0.7) if base_sentiment > 0.1 else int(post_count * 0.3)
-                negative_count = int(post_count * 0.1) if base_sentiment > 0.1 else int(post_count * 0.4)
-                neutral_count = post_count - positive_count - negative_count
-
-                sentiment_summary = SentimentSummary(
-                    symbol=symbol,
-                    date=target_date,
-                    avg_sentiment=base_sentiment,
-                    post_count=post_count,
-                    positive_count=positive_count,
-                    negative_count=negative_count,
-                    neutral_count=neutral_count
-                )
-
-                db.session.add(sentiment_summary)
-                print(f"  ✅ Created sentiment data for {target_date}: {base_sentiment:.3f}")
-
-    db.session.commit()
-
-def create_predictions_for_all_stocks():
-    """Create predictions for all stocks"""
-    print("\nCreating predictions for all stocks...")
-
-    today = date.today()
-
-    for symbol in Config.STOCKS:
-        # Check if prediction already exists
-        existing_prediction = db.session.query(Prediction)\
-            .filter_by(symbol=symbol, prediction_date=today)\
-            .first()
-
-        if existing_prediction:
-            print(f"  ℹ️ {symbol}: Prediction already exists")
-            continue
-
-        print(f"Processing {symbol}...")
-
-        # Get recent sentiment data
-        recent_sentiments = db.session.query(SentimentSummary)\
-            .filter(SentimentSummary.symbol == symbol)\
-            .filter(SentimentSummary.date >= today - timedelta(days=7))\
-            .order_by(SentimentSummary.date)\
-            .all()
-
-        if not recent_sentiments:
-            print(f"  ❌ No sentiment data for {symbol}")
-            continue
-
-        # Calculate metrics
-        sentiment_scores = [s.avg_sentiment for s in recent_sentiments]
-        avg_sentiment = np.mean(sentiment_scores)
-        sentiment_trend = sentiment_scores[-1] - sentiment_scores[0] if len(sentiment_scores) > 1 else 0
-        total_posts = sum(s.post_count for s in recent_sentiments)
-
-        # Calculate confidence
-        base_confidence = 0.55
-        sentiment_factor = min(0.25, abs(avg_sentiment) * 0.4)
-        trend_factor = min(0.15, abs(sentiment_trend) * 0.3)
-        volume_factor = min(0.05, (total_posts - 3) * 0.02) if total_posts > 3 else 0
-
-        confidence = base_confidence + sentiment_factor + trend_factor + volume_factor
-        confidence = min(0.92, max(0.52, confidence))
-
-        # Determine direction
-        if avg_sentiment > 0.1 and sentiment_trend >= -0.1:
-            predicted_direction = 'up'
-        elif avg_sentiment < -0.1 and sentiment_trend <= 0.1:
-            predicted_direction = 'down'
-        else:
-            predicted_direction = 'up' if avg_sentiment >= 0 else 'down'
-
-        # Add some realistic variation
-        confidence += np.random.normal(0, 0.03)
-        confidence = min(0.92, max(0.52, confidence))
-
-        # Create prediction
-        new_prediction = Prediction(
-            symbol=symbol,
-            prediction_date=today,
-            predicted_direction=predicted_direction,
-            confidence=confidence,
-            sentiment_score=avg_sentiment
-        )
-
-        db.session.add(new_prediction)
-
-        print(f"  🎯 {symbol}: {predicted_direction.upper()} ({confidence:.1%})")
-
-    db.session.commit()
-
-def main():
-    """Main function"""
-    print("Complete Stock Predictions Generator")
-    print("==================================")
-
-    app, _ = create_app()
-
-    with app.app_context():
-        try:
-            # Create missing sentiment data
-            create_sample_sentiment_data()
-
-            # Create predictions for all stocks
-            create_predictions_for_all_stocks()
-
-            print("\n🎉 All predictions completed!")
-            print("🌐 Refresh your browser to see all predictions!")
-
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            db.session.rollback()
-            raise
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
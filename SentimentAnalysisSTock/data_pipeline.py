@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 Data pipeline for collecting and processing stock sentiment data
-Run this script to populate your database with initial data
+Run this script to populate your database with initial data; independent stages run
+concurrently and each run's per-stage timings are appended to PIPELINE_TIMINGS_FILE
 """
 
 import os
 import sys
+import argparse
 from datetime import datetime, date, timedelta
 
 # Add backend to path
@@ -16,135 +18,284 @@ from backend.models.models import db, Post, StockPrice, SentimentSummary
 from backend.utils.data_collectors import RedditCollector, NewsCollector, StockDataCollector
 from backend.utils.sentiment_analyzer import SentimentAnalyzer
 from backend.config.config import Config
+from backend.utils.change_log import prune as prune_change_log
+from backend.utils import tracing
+from backend.utils.dag import DAG, Stage
+from backend.utils.scheduler import pipeline_conflicts, run_exclusively
+from backend.utils.journal import Journal, add_rows, prune as prune_journal
+from backend.utils import sharding
+from backend.utils.tracing import start_span, traced
+from generate_predictions import generate_predictions_for_today, prediction_features
+
+# One instance of each collector per process, so a resident scheduler keeps them (and the
+# sentiment model they load) warm between runs
+_collectors = {}
+
+def collector(cls):
+    if cls not in _collectors:
+        _collectors[cls] = cls()
+    return _collectors[cls]
+
+@traced('pipeline.collect_posts')
+def collect_and_store_posts(symbols=None, journal=None):
+    """
+    Collect posts from Reddit and News APIs and store in database, committing every chunk
+    of symbols; with a journal, symbols it has already done are skipped
+    """
+    symbols = symbols or Config.STOCKS
+    journal = journal or Journal.untracked(symbols, Config.PIPELINE_CHUNK_SYMBOLS)
+    reddit_collector = collector(RedditCollector)
+    news_collector = collector(NewsCollector)
+
+    def collect(chunk):
+        print(f"Collecting Reddit posts for {len(chunk)} stocks...")
+        reddit_posts = reddit_collector.collect_posts(chunk, limit=50)
+
+        print("Collecting news articles...")
+        news_posts = news_collector.collect_news(chunk, days_back=7)
+
+        all_posts = reddit_posts + news_posts
+
+        # Store posts in database
+        with start_span('pipeline.store_posts', posts=len(all_posts)):
+            new_posts, seen = [], set()
+            for post_data in all_posts:
+                key = (post_data['title'], post_data['source'], post_data['posted_at'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                existing_post = Post.query.filter_by(
+                    title=post_data['title'],
+                    source=post_data['source'],
+                    posted_at=post_data['posted_at']
+                ).first()
 
-def collect_and_store_posts():
-    """Collect posts from Reddit and News APIs and store in database"""
-    print("Collecting Reddit posts...")
-    reddit_collector = RedditCollector()
-    reddit_posts = reddit_collector.collect_posts(Config.STOCKS, limit=50)
-
-    print("Collecting news articles...")
-    news_collector = NewsCollector()
-    news_posts = news_collector.collect_news(Config.STOCKS, days_back=7)
-
-    all_posts = reddit_posts + news_posts
-    print(f"Collected {len(all_posts)} posts total")
-
-    # Store posts in database
-    for post_data in all_posts:
-        existing_post = Post.query.filter_by(
-            title=post_data['title'],
-            source=post_data['source'],
-            posted_at=post_data['posted_at']
-        ).first()
+                if not existing_post:
+                    new_posts.append(Post(**post_data))
 
-        if not existing_post:
-            post = Post(**post_data)
-            db.session.add(post)
+            add_rows(new_posts)
+        return len(all_posts)
 
-    db.session.commit()
+    collected = sum(journal.each_chunk('collect_posts', collect, symbols))
+    print(f"Collected {collected} posts total")
     print("Posts stored in database")
 
-def collect_and_store_stock_prices():
-    """Collect stock price data and store in database"""
+@traced('pipeline.collect_prices')
+def collect_and_store_stock_prices(symbols=None, journal=None):
+    """
+    Collect stock price data and store in database, committing every chunk of symbols;
+    with a journal, symbols it has already done are skipped
+    """
+    symbols = symbols or Config.STOCKS
+    journal = journal or Journal.untracked(symbols, Config.PIPELINE_CHUNK_SYMBOLS)
     print("Collecting stock price data...")
-    stock_collector = StockDataCollector()
-    stock_data = stock_collector.collect_stock_prices(Config.STOCKS, period="30d")
-
-    print(f"Collected price data for {len(stock_data)} data points")
+    stock_collector = collector(StockDataCollector)
+
+    def collect(chunk):
+        stock_data = stock_collector.collect_stock_prices(chunk, period="30d")
+
+        # Store stock prices in database
+        with start_span('pipeline.store_prices', rows=len(stock_data)):
+            new_prices, seen = [], set()
+            for price_data in stock_data:
+                key = (price_data['symbol'], price_data['date'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                existing_price = StockPrice.query.filter_by(
+                    symbol=price_data['symbol'],
+                    date=price_data['date']
+                ).first()
 
-    # Store stock prices in database
-    for price_data in stock_data:
-        existing_price = StockPrice.query.filter_by(
-            symbol=price_data['symbol'],
-            date=price_data['date']
-        ).first()
+                if not existing_price:
+                    new_prices.append(StockPrice(**price_data))
 
-        if not existing_price:
-            price = StockPrice(**price_data)
-            db.session.add(price)
+            add_rows(new_prices)
+        return len(stock_data)
 
-    db.session.commit()
+    collected = sum(journal.each_chunk('collect_prices', collect, symbols))
+    print(f"Collected price data for {collected} data points")
     print("Stock prices stored in database")
 
-def generate_sentiment_summaries():
-    """Generate daily sentiment summaries for each stock"""
+@traced('pipeline.sentiment_summaries')
+def generate_sentiment_summaries(symbols=None, journal=None):
+    """
+    Generate daily sentiment summaries for each stock, or only for symbols, committing
+    every chunk of symbols; with a journal, symbols it has already done are skipped
+    """
     print("Generating sentiment summaries...")
+    symbols = symbols or Config.STOCKS
+    journal = journal or Journal.untracked(symbols, Config.PIPELINE_CHUNK_SYMBOLS)
 
     # Get date range for last 30 days
     end_date = date.today()
     start_date = end_date - timedelta(days=30)
 
-    for symbol in Config.STOCKS:
-        for single_date in [start_date + timedelta(days=x) for x in range((end_date - start_date).days + 1)]:
-            # Get posts for this symbol and date
-            posts = Post.query.filter(
-                Post.symbol == symbol,
-                db.func.date(Post.posted_at) == single_date
-            ).all()
-
-            if posts:
-                # Calculate sentiment metrics
-                sentiment_scores = [p.sentiment_score for p in posts]
-                avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
-                post_count = len(posts)
-
-                positive_count = sum(1 for s in sentiment_scores if s > 0.05)
-                negative_count = sum(1 for s in sentiment_scores if s < -0.05)
-                neutral_count = post_count - positive_count - negative_count
-
-                # Check if summary already exists
-                existing_summary = SentimentSummary.query.filter_by(
-                    symbol=symbol,
-                    date=single_date
-                ).first()
-
-                if existing_summary:
-                    # Update existing summary
-                    existing_summary.avg_sentiment = avg_sentiment
-                    existing_summary.post_count = post_count
-                    existing_summary.positive_count = positive_count
-                    existing_summary.negative_count = negative_count
-                    existing_summary.neutral_count = neutral_count
-                else:
-                    # Create new summary
-                    summary = SentimentSummary(
+    def summarize(chunk):
+        for symbol in chunk:
+            for single_date in [start_date + timedelta(days=x) for x in range((end_date - start_date).days + 1)]:
+                # Get posts for this symbol and date
+                posts = Post.query.filter(
+                    Post.symbol == symbol,
+                    db.func.date(Post.posted_at) == single_date
+                ).all()
+
+                if posts:
+                    # Calculate sentiment metrics
+                    sentiment_scores = [p.sentiment_score for p in posts]
+                    avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
+                    post_count = len(posts)
+
+                    positive_count = sum(1 for s in sentiment_scores if s > 0.05)
+                    negative_count = sum(1 for s in sentiment_scores if s < -0.05)
+                    neutral_count = post_count - positive_count - negative_count
+
+                    # Check if summary already exists
+                    existing_summary = SentimentSummary.query.filter_by(
                         symbol=symbol,
-                        date=single_date,
-                        avg_sentiment=avg_sentiment,
-                        post_count=post_count,
-                        positive_count=positive_count,
-                        negative_count=negative_count,
-                        neutral_count=neutral_count
-                    )
-                    db.session.add(summary)
-
-    db.session.commit()
+                        date=single_date
+                    ).first()
+
+                    if existing_summary:
+                        # Update existing summary
+                        existing_summary.avg_sentiment = avg_sentiment
+                        existing_summary.post_count = post_count
+                        existing_summary.positive_count = positive_count
+                        existing_summary.negative_count = negative_count
+                        existing_summary.neutral_count = neutral_count
+                    else:
+                        # Create new summary
+                        summary = SentimentSummary(
+                            symbol=symbol,
+                            date=single_date,
+                            avg_sentiment=avg_sentiment,
+                            post_count=post_count,
+                            positive_count=positive_count,
+                            negative_count=negative_count,
+                            neutral_count=neutral_count
+                        )
+                        db.session.add(summary)
+
+    journal.each_chunk('summaries', summarize, symbols)
     print("Sentiment summaries generated")
 
+def build_pipeline(broadcaster=None, symbols=None, journal=None):
+    """
+    The pipeline's stages and what each needs: posts and prices are collected side by
+    side, then summaries -> prediction features -> predictions, and changes are published
+    once everything else has finished. With symbols, only those stocks are refreshed; with
+    a journal, what it records as done is skipped
+    """
+    symbols = list(symbols or Config.STOCKS)
+    features = {}
+
+    @traced('pipeline.features')
+    def compute_features():
+        features.update(prediction_features(symbols))
+        return len(features)
+
+    @traced('pipeline.predictions')
+    def predictions():
+        return len(generate_predictions_for_today(features, symbols, journal))
+
+    def publish_changes():
+        # Dashboards, and through them the web workers' caches, learn what this run changed
+        if broadcaster:
+            with start_span('pipeline.publish') as publish_span:
+                published = broadcaster.publish()
+                publish_span.set_attribute('events', sum(published.values()))
+            print(f"Published updates: {published}")
+
+        # Keep the change log bounded
+        with start_span('pipeline.prune_change_log') as prune_span:
+            pruned = prune_change_log(Config.CHANGE_LOG_RETENTION_DAYS)
+            db.session.commit()
+            prune_span.set_attribute('pruned', pruned)
+        print(f"Pruned {pruned} change log entries")
+
+        # And the run journal
+        pruned = prune_journal(Config.JOURNAL_RETENTION_DAYS)
+        db.session.commit()
+        if pruned:
+            print(f"Pruned {pruned} journaled runs")
+
+    return DAG([
+        Stage('collect_posts', lambda: collect_and_store_posts(symbols, journal)),
+        Stage('collect_prices', lambda: collect_and_store_stock_prices(symbols, journal)),
+        Stage('summaries', lambda: generate_sentiment_summaries(symbols, journal), needs=('collect_posts',)),
+        Stage('features', compute_features, needs=('summaries',)),
+        Stage('predictions', predictions, needs=('features',)),
+        Stage('publish_changes', publish_changes, needs=('collect_prices', 'predictions'), always=True)
+    ])
+
+def run_pipeline(app, broadcaster=None, symbols=None, on_stage=None, resume=False):
+    """
+    Run every stage once, each in its own app context (so its own session); returns the Run.
+    on_stage, if given, is called with each stage's result as it finishes. The run is
+    journaled: with resume, an unfinished run over the same symbols earlier today is picked
+    up where it stopped
+    """
+    symbols = list(symbols or Config.STOCKS)
+    with app.app_context():
+        journal = Journal.open('pipeline', symbols, resume, Config.JOURNAL_RESUME_WINDOW,
+                               Config.PIPELINE_CHUNK_SYMBOLS)
+    try:
+        with start_span('pipeline.run', stocks=len(symbols), resumed=journal.resumed):
+            run = build_pipeline(broadcaster, symbols, journal).run(
+                max_workers=Config.PIPELINE_WORKERS,
+                retries=Config.PIPELINE_STAGE_RETRIES,
+                retry_delay=Config.PIPELINE_RETRY_DELAY,
+                context=app.app_context,
+                on_stage=on_stage
+            )
+    finally:
+        tracing.flush()
+
+    run.print_summary()
+    run.save(Config.PIPELINE_TIMINGS_FILE)
+    with app.app_context():
+        journal.finish(None if run.ok else f"Stages failed: {', '.join(run.failed())}")
+    if not run.ok:
+        raise RuntimeError(f"Pipeline stages failed: {', '.join(run.failed())}")
+    print("Data pipeline completed successfully!")
+    return run
+
 def main():
     """Main function to run the data pipeline"""
+    parser = argparse.ArgumentParser(description='Collect and process stock sentiment data')
+    sharding.add_arguments(parser)
+    parser.add_argument('--resume', action='store_true', help="pick up today's unfinished run where it stopped")
+    args = parser.parse_args()
+    symbols, shard = sharding.from_arguments(parser, args, Config.STOCKS, Config.SHARD_STRATEGY)
+
     print("Starting data pipeline...")
-    print(f"Tracking stocks: {', '.join(Config.STOCKS)}")
+    if shard:
+        print(f"Shard {args.shard}: {len(symbols)} of {len(Config.STOCKS)} stocks")
+    print(f"Tracking stocks: {', '.join(symbols)}")
 
     # Create Flask app context
     app, _ = create_app()
 
-    with app.app_context():
+    with app.app_context(), sharding.reporting(Config.SHARD_STATUS_DIR, 'pipeline', shard, symbols) as status:
         # Ensure database tables exist
         db.create_all()
 
-        try:
-            # Step 1: Collect and store posts
-            collect_and_store_posts()
-
-            # Step 2: Collect and store stock prices
-            collect_and_store_stock_prices()
+        # With a Socket.IO message queue, connected dashboards get pushed what this run changed
+        broadcaster = app.extensions['broadcaster'] if Config.SOCKETIO_MESSAGE_QUEUE else None
+        if broadcaster:
+            broadcaster.snapshot()
 
-            # Step 3: Generate sentiment summaries
-            generate_sentiment_summaries()
+        try:
+            def pipeline():
+                run = run_pipeline(app, broadcaster, symbols, resume=args.resume)
+                status['critical_path'] = run.critical_path()
 
-            print("Data pipeline completed successfully!")
+            # Not alongside a scheduler's run of the same job (or of the same shard), nor a run
+            # over every stock while this is a shard, or any shard while it isn't
+            lease = f'pipeline:{args.shard}' if shard else 'pipeline'
+            if not run_exclusively(lease, pipeline, conflicts=pipeline_conflicts(lease)):
+                status['skipped'] = True
+                return
 
             # Print summary statistics
             total_posts = Post.query.count()
@@ -162,4 +313,4 @@ def main():
             raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -16,6 +16,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 from backend.app import create_app
 from backend.models.models import db, StockPrice, SentimentSummary, Prediction
 from backend.config.config import Config
+from backend.utils.synthetic_data import generate, bulk_insert
 
 def collect_stock_prices_alternative():
     """Alternative method to collect stock prices using different approach"""
@@ -145,45 +146,14 @@ def create_sample_data():
     """Create some sample stock price data if real data fails"""
     print("Creating sample stock price data...")
 
-    base_prices = {
-        'AAPL': 180.0,
-        'GOOGL': 140.0,
-        'AMZN': 145.0,
-        'META': 320.0,
-        'NFLX': 450.0
-    }
+    # Prices only: sentiment and predictions come from the real data
+    prices = generate(Config.STOCKS, days=14, store_posts=False, votes_per_prediction=0)['prices']
 
-    today = date.today()
-
-    for symbol in Config.STOCKS:
-        base_price = base_prices[symbol]
-
-        # Create price data for last 14 days
-        for i in range(14):
-            price_date = today - timedelta(days=i)
-
-            # Check if already exists
-            existing = StockPrice.query.filter_by(
-                symbol=symbol,
-                date=price_date
-            ).first()
-
-            if not existing:
-                # Generate somewhat realistic price movements
-                daily_change = np.random.normal(0, 0.02)  # 2% daily volatility
-                price = base_price * (1 + daily_change)
-
-                price_record = StockPrice(
-                    symbol=symbol,
-                    date=price_date,
-                    open_price=price * 0.995,
-                    high_price=price * 1.01,
-                    low_price=price * 0.99,
-                    close_price=price,
-                    volume=1000000 + np.random.randint(0, 5000000)
-                )
-                db.session.add(price_record)
-                base_price = price  # Use for next day
+    # Keep any prices that already exist
+    existing = set(db.session.query(StockPrice.symbol, StockPrice.date).filter(
+        StockPrice.date >= prices['date'].min()).all())
+    keep = [key not in existing for key in zip(prices['symbol'], prices['date'])]
+    bulk_insert(StockPrice.__table__, prices[keep])
 
     db.session.commit()
     print("Sample data created")
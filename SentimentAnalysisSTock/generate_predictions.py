@@ -5,6 +5,7 @@ Generate stock price predictions for today based on recent sentiment data
 
 import os
 import sys
+import argparse
 from datetime import datetime, date, timedelta
 import numpy as np
 
@@ -14,120 +15,169 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 from backend.app import create_app
 from backend.models.models import db, SentimentSummary, Prediction
 from backend.config.config import Config
-
-def generate_predictions_for_today():
-    """Generate ML-based predictions for today"""
+from backend.utils import sharding
+from backend.utils.journal import Journal
+
+def prediction_features(symbols, today=None):
+    """
+    {symbol: (avg_sentiment, sentiment_trend, total_posts)} over the last 7 days of
+    sentiment summaries, loaded for all symbols at once; symbols without any are left out
+    """
+    today = today or date.today()
+    rows = db.session.query(SentimentSummary.symbol, SentimentSummary.avg_sentiment,
+                            SentimentSummary.post_count)\
+        .filter(SentimentSummary.symbol.in_(symbols))\
+        .filter(SentimentSummary.date >= today - timedelta(days=7))\
+        .order_by(SentimentSummary.symbol, SentimentSummary.date)\
+        .all()
+
+    history = {}
+    for symbol, avg_sentiment, post_count in rows:
+        history.setdefault(symbol, []).append((avg_sentiment, post_count))
+
+    features = {}
+    for symbol, days in history.items():
+        sentiment_scores = [score for score, _ in days]
+        avg_sentiment = float(np.mean(sentiment_scores))
+        sentiment_trend = sentiment_scores[-1] - sentiment_scores[0] if len(sentiment_scores) > 1 else 0
+        total_posts = sum(count for _, count in days)
+        features[symbol] = (avg_sentiment, sentiment_trend, total_posts)
+    return features
+
+def predict(avg_sentiment, sentiment_trend, total_posts):
+    """(predicted_direction, confidence) from a symbol's sentiment features"""
+    # Simple ML-like prediction logic
+    # Factors: average sentiment, trend, volume of posts
+    base_confidence = 0.5
+
+    # Sentiment strength factor
+    sentiment_strength = abs(avg_sentiment)
+    sentiment_factor = min(0.3, sentiment_strength * 0.5)
+
+    # Trend factor
+    trend_factor = min(0.15, abs(sentiment_trend) * 0.3)
+
+    # Volume factor (more posts = higher confidence)
+    volume_factor = min(0.05, (total_posts - 5) * 0.01) if total_posts > 5 else 0
+
+    # Calculate final confidence
+    confidence = base_confidence + sentiment_factor + trend_factor + volume_factor
+    confidence = min(0.95, max(0.51, confidence))  # Keep between 51% and 95%
+
+    # Determine direction
+    if avg_sentiment > 0.05 and sentiment_trend >= 0:
+        predicted_direction = 'up'
+    elif avg_sentiment < -0.05 and sentiment_trend < 0:
+        predicted_direction = 'down'
+    elif avg_sentiment > 0:
+        predicted_direction = 'up'
+    else:
+        predicted_direction = 'down'
+
+    # Add some randomness for realism (small adjustment)
+    confidence += np.random.normal(0, 0.02)
+    confidence = min(0.95, max(0.51, confidence))
+
+    return predicted_direction, confidence
+
+def generate_predictions_for_today(features=None, symbols=None, journal=None):
+    """
+    Generate ML-based predictions for today, from prediction_features() if given, for every
+    tracked stock or only for symbols. Commits every chunk of symbols; with a journal,
+    symbols it has already done are skipped
+    """
     print("Generating stock predictions for today...")
 
     today = date.today()
+    symbols = symbols or Config.STOCKS
+    journal = journal or Journal.untracked(symbols, Config.PIPELINE_CHUNK_SYMBOLS)
     predictions_created = []
-
-    for symbol in Config.STOCKS:
-        print(f"\nProcessing {symbol}...")
-
-        # Get recent sentiment data (last 7 days)
-        recent_sentiments = db.session.query(SentimentSummary)\
-            .filter(SentimentSummary.symbol == symbol)\
-            .filter(SentimentSummary.date >= today - timedelta(days=7))\
-            .order_by(SentimentSummary.date)\
-            .all()
-
-        if not recent_sentiments:
-            print(f"  ❌ No recent sentiment data for {symbol}")
-            continue
-
-        # Calculate sentiment metrics
-        sentiment_scores = [s.avg_sentiment for s in recent_sentiments]
-        avg_sentiment = np.mean(sentiment_scores)
-        sentiment_trend = sentiment_scores[-1] - sentiment_scores[0] if len(sentiment_scores) > 1 else 0
-        total_posts = sum(s.post_count for s in recent_sentiments)
-
-        print(f"  📊 Avg sentiment: {avg_sentiment:.3f}")
-        print(f"  📈 Trend: {sentiment_trend:.3f}")
-        print(f"  📝 Total posts: {total_posts}")
-
-        # Simple ML-like prediction logic
-        # Factors: average sentiment, trend, volume of posts
-        base_confidence = 0.5
-
-        # Sentiment strength factor
-        sentiment_strength = abs(avg_sentiment)
-        sentiment_factor = min(0.3, sentiment_strength * 0.5)
-
-        # Trend factor
-        trend_factor = min(0.15, abs(sentiment_trend) * 0.3)
-
-        # Volume factor (more posts = higher confidence)
-        volume_factor = min(0.05, (total_posts - 5) * 0.01) if total_posts > 5 else 0
-
-        # Calculate final confidence
-        confidence = base_confidence + sentiment_factor + trend_factor + volume_factor
-        confidence = min(0.95, max(0.51, confidence))  # Keep between 51% and 95%
-
-        # Determine direction
-        if avg_sentiment > 0.05 and sentiment_trend >= 0:
-            predicted_direction = 'up'
-        elif avg_sentiment < -0.05 and sentiment_trend < 0:
-            predicted_direction = 'down'
-        elif avg_sentiment > 0:
-            predicted_direction = 'up'
-        else:
-            predicted_direction = 'down'
-
-        # Add some randomness for realism (small adjustment)
-        confidence += np.random.normal(0, 0.02)
-        confidence = min(0.95, max(0.51, confidence))
-
-        print(f"  🎯 Prediction: {predicted_direction.upper()}")
-        print(f"  🎲 Confidence: {confidence:.1%}")
-
-        # Check if prediction already exists for today
-        existing_prediction = db.session.query(Prediction)\
-            .filter_by(symbol=symbol, prediction_date=today)\
-            .first()
-
-        if existing_prediction:
-            # Update existing prediction
-            existing_prediction.predicted_direction = predicted_direction
-            existing_prediction.confidence = confidence
-            existing_prediction.sentiment_score = avg_sentiment
-            print(f"  ✅ Updated existing prediction")
-        else:
-            # Create new prediction
-            new_prediction = Prediction(
-                symbol=symbol,
-                prediction_date=today,
-                predicted_direction=predicted_direction,
-                confidence=confidence,
-                sentiment_score=avg_sentiment
-            )
-            db.session.add(new_prediction)
-            print(f"  ✅ Created new prediction")
-
-        predictions_created.append({
-            'symbol': symbol,
-            'direction': predicted_direction,
-            'confidence': confidence,
-            'sentiment': avg_sentiment
-        })
-
-    # Commit all predictions to database
-    db.session.commit()
+    if features is None:
+        features = prediction_features(journal.pending('predictions', symbols), today)
+
+    def predict_chunk(chunk):
+        existing_predictions = {
+            prediction.symbol: prediction for prediction in db.session.query(Prediction)
+                .filter(Prediction.symbol.in_(chunk), Prediction.prediction_date == today)
+        }
+        created = []
+
+        for symbol in chunk:
+            print(f"\nProcessing {symbol}...")
+
+            if symbol not in features:
+                print(f"  ❌ No recent sentiment data for {symbol}")
+                continue
+
+            avg_sentiment, sentiment_trend, total_posts = features[symbol]
+
+            print(f"  📊 Avg sentiment: {avg_sentiment:.3f}")
+            print(f"  📈 Trend: {sentiment_trend:.3f}")
+            print(f"  📝 Total posts: {total_posts}")
+
+            predicted_direction, confidence = predict(avg_sentiment, sentiment_trend, total_posts)
+
+            print(f"  🎯 Prediction: {predicted_direction.upper()}")
+            print(f"  🎲 Confidence: {confidence:.1%}")
+
+            # Check if prediction already exists for today
+            existing_prediction = existing_predictions.get(symbol)
+
+            if existing_prediction:
+                # Update existing prediction
+                existing_prediction.predicted_direction = predicted_direction
+                existing_prediction.confidence = confidence
+                existing_prediction.sentiment_score = avg_sentiment
+                print(f"  ✅ Updated existing prediction")
+            else:
+                # Create new prediction
+                new_prediction = Prediction(
+                    symbol=symbol,
+                    prediction_date=today,
+                    predicted_direction=predicted_direction,
+                    confidence=confidence,
+                    sentiment_score=avg_sentiment
+                )
+                db.session.add(new_prediction)
+                print(f"  ✅ Created new prediction")
+
+            created.append({
+                'symbol': symbol,
+                'direction': predicted_direction,
+                'confidence': confidence,
+                'sentiment': avg_sentiment
+            })
+        return created
+
+    # Each chunk's predictions are committed together with its journal entries
+    for created in journal.each_chunk('predictions', predict_chunk, symbols):
+        predictions_created.extend(created)
 
     return predictions_created
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Generate today's stock predictions")
+    sharding.add_arguments(parser)
+    parser.add_argument('--resume', action='store_true', help="pick up today's unfinished run where it stopped")
+    args = parser.parse_args()
+    symbols, shard = sharding.from_arguments(parser, args, Config.STOCKS, Config.SHARD_STRATEGY)
+
     print("Stock Price Prediction Generator")
     print("==============================")
     print(f"Target date: {date.today()}")
+    if shard:
+        print(f"Shard {args.shard}: {len(symbols)} of {len(Config.STOCKS)} stocks")
 
     # Create Flask app context
     app, _ = create_app()
 
-    with app.app_context():
+    with app.app_context(), sharding.reporting(Config.SHARD_STATUS_DIR, 'predictions', shard, symbols):
+        journal = Journal.open('predictions', symbols, args.resume, Config.JOURNAL_RESUME_WINDOW,
+                               Config.PIPELINE_CHUNK_SYMBOLS)
         try:
-            predictions = generate_predictions_for_today()
+            predictions = generate_predictions_for_today(symbols=symbols, journal=journal)
+            journal.finish()
 
             print(f"\n🎉 Successfully generated {len(predictions)} predictions:")
             print("=" * 50)
@@ -143,6 +193,7 @@ def main():
         except Exception as e:
             print(f"❌ Error generating predictions: {e}")
             db.session.rollback()
+            journal.finish(f'{type(e).__name__}: {e}')
             raise
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""
+Gunicorn settings for serving backend.wsgi:app in production
+
+    gunicorn -c gunicorn.conf.py backend.wsgi:app
+
+Every setting can be overridden with the environment variable next to it.
+
+Worker classes:
+  gthread   threads per worker, WebSocket via simple-websocket (default, no extra packages)
+  gevent    greenlets, needs gevent and gevent-websocket
+  eventlet  greenlets, needs eventlet
+SOCKETIO_ASYNC_MODE is set to match, so Flask-SocketIO picks the same concurrency model.
+
+With more than one worker, set SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) so
+events emitted in one worker reach clients connected to the others, and
+RATE_LIMIT_BACKEND=redis so the workers share rate-limit buckets. Caches stay per worker.
+The dashboard connects over WebSocket only, so no sticky sessions are needed.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Load the app once in the master so workers fork with it already imported
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+# WebSocket connections are long-lived; the timeout only catches stuck workers
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Flask-SocketIO must use the same concurrency model as the worker
+ASYNC_MODES = {
+    'gthread': 'threading',
+    'sync': 'threading',
+    'gevent': 'gevent',
+    'geventwebsocket.gunicorn.workers.GeventWebSocketWorker': 'gevent',
+    'eventlet': 'eventlet'
+}
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', ASYNC_MODES.get(worker_class, 'threading'))
+
+if worker_class == 'gevent':
+    # Plain gevent workers don't speak WebSocket; this one does
+    worker_class = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+
+def when_ready(server):
+    """Warn when several workers would each keep their own rate-limit buckets"""
+    from backend.config.config import Config
+    if workers > 1 and Config.RATE_LIMIT_ENABLED and Config.RATE_LIMIT_BACKEND == 'memory':
+        server.log.warning(f"Rate-limit buckets are kept per worker, so clients get up to {workers}x "
+                           f"the configured limits; set RATE_LIMIT_BACKEND=redis to share them")
+
+def post_fork(server, worker):
+    """Give each worker its own database connections instead of ones inherited from the master"""
+    if preload_app:
+        from backend.models.models import db
+        from backend.wsgi import app
+        with app.app_context():
+            db.engine.dispose(close=False)
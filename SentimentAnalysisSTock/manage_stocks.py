@@ -6,15 +6,14 @@ Stock Management System - Add/Remove stocks throughout the application
 import os
 import sys
 import json
-from datetime import date, timedelta
 import numpy as np
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from backend.app import create_app
-from backend.models.models import db, SentimentSummary, Prediction, StockPrice
 from backend.config.config import Config
+from backend.utils.synthetic_data import generate, load
 
 # Company name mappings for display
 COMPANY_NAMES = {
@@ -56,145 +55,23 @@ COMPANY_NAMES = {
     'SNOW': 'Snowflake Inc.'
 }
 
-def add_stocks(symbols):
+def add_stocks(symbols, days=30, seed=None):
     """Add new stocks to the application with sample data"""
+    symbols = [symbol.upper().strip() for symbol in symbols]
     print(f"Adding {len(symbols)} new stocks: {', '.join(symbols)}")
 
     app, _ = create_app()
 
     with app.app_context():
-        today = date.today()
-        added_count = 0
-
-        for symbol in symbols:
-            symbol = symbol.upper().strip()
-            print(f"\n📈 Processing {symbol}...")
-
-            # Create sentiment data for the last 7 days
-            sentiment_created = 0
-            for i in range(7):
-                target_date = today - timedelta(days=i)
-
-                existing = db.session.query(SentimentSummary)\
-                    .filter_by(symbol=symbol, date=target_date)\
-                    .first()
-
-                if not existing:
-                    # Generate realistic sentiment data
-                    base_sentiment = np.random.normal(0.4, 0.3)
-                    base_sentiment = max(-0.9, min(0.9, base_sentiment))
-
-                    post_count = np.random.randint(2, 12)
-
-                    if base_sentiment > 0.1:
-                        positive_count = int(post_count * 0.6)
-                        negative_count = int(post_count * 0.2)
-                    elif base_sentiment < -0.1:
-                        positive_count = int(post_count * 0.2)
-                        negative_count = int(post_count * 0.6)
-                    else:
-                        positive_count = int(post_count * 0.4)
-                        negative_count = int(post_count * 0.3)
-
-                    neutral_count = post_count - positive_count - negative_count
-
-                    sentiment_summary = SentimentSummary(
-                        symbol=symbol,
-                        date=target_date,
-                        avg_sentiment=base_sentiment,
-                        post_count=post_count,
-                        positive_count=positive_count,
-                        negative_count=negative_count,
-                        neutral_count=neutral_count
-                    )
-
-                    db.session.add(sentiment_summary)
-                    sentiment_created += 1
-
-            print(f"  ✅ Created {sentiment_created} sentiment records")
-
-            # Create sample stock price data
-            price_created = 0
-            base_price = np.random.uniform(50, 500)  # Random base price
-
-            for i in range(7):
-                target_date = today - timedelta(days=i)
-
-                existing_price = db.session.query(StockPrice)\
-                    .filter_by(symbol=symbol, date=target_date)\
-                    .first()
-
-                if not existing_price:
-                    # Generate realistic price data
-                    daily_change = np.random.normal(0, 0.02)  # 2% daily volatility
-                    current_price = base_price * (1 + daily_change * i * 0.1)
-
-                    stock_price = StockPrice(
-                        symbol=symbol,
-                        date=target_date,
-                        open_price=current_price * 0.995,
-                        close_price=current_price,
-                        high_price=current_price * 1.02,
-                        low_price=current_price * 0.98,
-                        volume=np.random.randint(1000000, 10000000)
-                    )
-
-                    db.session.add(stock_price)
-                    price_created += 1
-
-            print(f"  💰 Created {price_created} price records")
-
-            # Create prediction for today
-            existing_prediction = db.session.query(Prediction)\
-                .filter_by(symbol=symbol, prediction_date=today)\
-                .first()
-
-            if not existing_prediction:
-                # Get recent sentiment data
-                recent_sentiments = db.session.query(SentimentSummary)\
-                    .filter(SentimentSummary.symbol == symbol)\
-                    .filter(SentimentSummary.date >= today - timedelta(days=7))\
-                    .order_by(SentimentSummary.date)\
-                    .all()
-
-                if recent_sentiments:
-                    sentiment_scores = [s.avg_sentiment for s in recent_sentiments]
-                    avg_sentiment = np.mean(sentiment_scores)
-                    sentiment_trend = sentiment_scores[-1] - sentiment_scores[0] if len(sentiment_scores) > 1 else 0
-                    total_posts = sum(s.post_count for s in recent_sentiments)
-
-                    # Calculate confidence
-                    base_confidence = 0.55
-                    sentiment_factor = min(0.25, abs(avg_sentiment) * 0.4)
-                    trend_factor = min(0.15, abs(sentiment_trend) * 0.3)
-                    volume_factor = min(0.05, (total_posts - 3) * 0.02) if total_posts > 3 else 0
-
-                    confidence = base_confidence + sentiment_factor + trend_factor + volume_factor
-                    confidence = min(0.95, max(0.52, confidence))
-
-                    # Determine direction
-                    if avg_sentiment > 0.1 and sentiment_trend >= -0.1:
-                        predicted_direction = 'up'
-                    elif avg_sentiment < -0.1 and sentiment_trend <= 0.1:
-                        predicted_direction = 'down'
-                    else:
-                        predicted_direction = 'up' if avg_sentiment >= 0 else 'down'
-
-                    new_prediction = Prediction(
-                        symbol=symbol,
-                        prediction_date=today,
-                        predicted_direction=predicted_direction,
-                        confidence=confidence,
-                        sentiment_score=avg_sentiment
-                    )
-
-                    db.session.add(new_prediction)
-                    print(f"  🎯 Created prediction: {predicted_direction.upper()} ({confidence:.1%})")
-
-            added_count += 1
-
-        db.session.commit()
-        print(f"\n🎉 Successfully added {added_count} stocks to the database!")
+        # One bulk load for all of them; a fresh seed each time unless one is given. Days a
+        # stock already has data for (e.g. one that is already tracked) are kept, not replaced
+        seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2 ** 32)
+        counts = load(generate(symbols, days=days, store_posts=False, votes_per_prediction=0,
+                               prediction_days=1, seed=seed), replace=False)
+        for table, count in counts.items():
+            print(f"  ✅ {table}: {count} rows")
+
+        print(f"\n🎉 Successfully added {len(symbols)} stocks to the database!")
         return True
 
 def update_config_file(new_symbols):
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Run a data job as N symbol-sharded worker processes and merge their status
+Each worker is the job's own script started with --shard i/N, so it handles only its share
+of STOCKS (see backend/utils/sharding.py). Spread the shards over several hosts sharing the
+database with --nodes/--node; every host runs its own slice of the shards.
+
+    python run_shards.py --workers 4                          # data_pipeline.py, shards 1/4..4/4
+    python run_shards.py --job prices --workers 8             # update_prices.py
+    python run_shards.py --workers 4 --nodes 3 --node 2       # this host: shards 5/12..8/12
+    python run_shards.py --workers 4 --nodes 3 --status       # merged status, and who is running
+
+Worker output goes to SHARD_STATUS_DIR/<job>-<i>-of-<N>.log, and the merged status to
+SHARD_STATUS_DIR/<job>.json. Exits 1 if any shard run here failed.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.config.config import Config
+from backend.utils import sharding
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPTS = {
+    'pipeline': 'data_pipeline.py',
+    'prices': 'update_prices.py',
+    'predictions': 'generate_predictions.py'
+}
+
+def node_shards(workers, nodes, node):
+    """The shard indexes (1-based) run by node (1-based) out of nodes, each running workers"""
+    first = (node - 1) * workers + 1
+    return list(range(first, first + workers))
+
+def start_worker(job, index, count, strategy, directory):
+    log_path = os.path.join(directory, f'{job}-{index}-of-{count}.log')
+    command = [sys.executable, os.path.join(ROOT, SCRIPTS[job]), '--shard', sharding.shard_name(index, count)]
+    if strategy:
+        command += ['--shard-strategy', strategy]
+    log = open(log_path, 'w')
+    # Unbuffered, so the log can be followed while the worker runs
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    return subprocess.Popen(command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, env=env), log
+
+def running_shards(job, count):
+    """{shard: owner} of this job's shards currently holding their lease, on any host"""
+    from backend.app import create_app
+    from backend.models.models import JobLease
+
+    app, _ = create_app()
+    with app.app_context():
+        prefix = f'{job}:'
+        leases = JobLease.query.filter(JobLease.name.startswith(prefix),
+                                       JobLease.expires_at >= datetime.utcnow()).all()
+        suffix = f'/{count}'
+        return {lease.name[len(prefix):]: lease.owner for lease in leases if lease.name.endswith(suffix)}
+
+def print_merged(merged, exit_codes=None):
+    print(f"\n{'shard':8} {'status':9} {'symbols':>7} {'seconds':>8}  host")
+    for shard, status in merged['workers'].items():
+        state = 'ok' if status.get('ok') else 'skipped' if status.get('skipped') else 'failed'
+        print(f"{shard:8} {state:9} {status.get('symbols', 0):7d} {status.get('seconds') or 0:8.2f}  "
+              f"{status.get('host')}:{status.get('pid')}")
+        if status.get('error'):
+            print(f"         {status['error']}")
+    for shard in merged['missing']:
+        code = (exit_codes or {}).get(shard)
+        print(f"{shard:8} {'missing':9}" + (f"  (exit code {code})" if code is not None else ''))
+    print(f"{merged['symbols']} symbols over {merged['shards']} shards; slowest shard took "
+          f"{merged['slowest_seconds'] or 0:.2f}s for {merged['total_seconds']:.2f}s of worker time")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--job', choices=sorted(SCRIPTS), default='pipeline')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='shard workers on this host')
+    parser.add_argument('--nodes', type=int, default=1, help='hosts sharing the work (N = workers x nodes)')
+    parser.add_argument('--node', type=int, default=1, help='which of the hosts this is, 1..nodes')
+    parser.add_argument('--shard-strategy', choices=sharding.STRATEGIES, help='default: SHARD_STRATEGY')
+    parser.add_argument('--status', action='store_true', help="don't run anything, show the merged status")
+    args = parser.parse_args()
+    if args.workers < 1 or args.nodes < 1 or not 1 <= args.node <= args.nodes:
+        parser.error('need --workers >= 1 and 1 <= --node <= --nodes')
+
+    count = args.workers * args.nodes
+    directory = Config.SHARD_STATUS_DIR
+    merged_path = os.path.join(directory, f'{args.job}.json')
+
+    if args.status:
+        shards = [sharding.shard_name(index, count) for index in range(1, count + 1)]
+        merged = sharding.merge_status(sharding.read_status(directory, args.job, count), shards)
+        print_merged(merged)
+        running = running_shards(args.job, count)
+        for shard, owner in sorted(running.items()):
+            print(f"Shard {shard} is running on {owner}")
+        return
+
+    indexes = node_shards(args.workers, args.nodes, args.node)
+    os.makedirs(directory, exist_ok=True)
+    # Statuses left over from an earlier run would hide a worker that dies before writing one
+    for index in indexes:
+        try:
+            os.remove(sharding.status_path(directory, args.job, index, count))
+        except FileNotFoundError:
+            pass
+
+    print(f"Running {args.job} as shards {indexes[0]}..{indexes[-1]} of {count} "
+          f"({len(Config.STOCKS)} stocks)")
+    started = time.perf_counter()
+    workers = {sharding.shard_name(index, count): start_worker(args.job, index, count,
+                                                               args.shard_strategy, directory)
+               for index in indexes}
+
+    exit_codes = {}
+    for shard, (process, log) in workers.items():
+        exit_codes[shard] = process.wait()
+        log.close()
+    elapsed = time.perf_counter() - started
+
+    # Only this host's shards are expected here; the others report to their own coordinator
+    merged = sharding.merge_status(sharding.read_status(directory, args.job, count), list(workers))
+    merged.update(node=args.node, nodes=args.nodes, seconds=round(elapsed, 3), exit_codes=exit_codes)
+    with open(merged_path, 'w') as f:
+        json.dump(merged, f, indent=2)
+
+    print_merged(merged, exit_codes)
+    print(f"Finished in {elapsed:.2f}s; merged status written to {merged_path}")
+    if not merged['ok']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
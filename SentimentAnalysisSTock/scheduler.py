@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Resident scheduler for the data jobs
+Runs the data pipeline every UPDATE_INTERVAL seconds and the price updater every
+PRICE_UPDATE_INTERVAL seconds from one long-lived process, instead of cron starting a cold
+Python (imports, app, Socket.IO, create_all) for every run. The 'adaptive' job replaces the
+fixed pipeline cadence with one per symbol, by activity and within an API call budget (see
+backend/utils/refresh_policy.py). Status and lag of each job are written to SCHEDULER_STATUS_FILE.
+
+    python scheduler.py                  # both jobs
+    python scheduler.py --jobs prices    # only the price updater
+    python scheduler.py --jobs adaptive,prices   # pipeline runs per symbol, hot symbols more often
+    python scheduler.py --shard 2/4      # both jobs for one shard of STOCKS, e.g. one per host
+"""
+
+import os
+import sys
+import signal
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.app import create_app
+from backend.models.models import db
+from backend.config.config import Config
+from backend.utils.scheduler import Job, Scheduler, pipeline_conflicts
+from backend.utils.refresh_policy import AdaptiveRefresh
+from backend.utils import sharding
+from data_pipeline import run_pipeline
+from update_prices import update_current_prices
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', default='pipeline,prices', help='comma-separated jobs to run')
+    parser.add_argument('--wait', action='store_true',
+                        help='spread the first runs over one interval instead of starting them at once')
+    sharding.add_arguments(parser)
+    args = parser.parse_args()
+    symbols, shard = sharding.from_arguments(parser, args, Config.STOCKS, Config.SHARD_STRATEGY)
+    # Jobs (and so their leases) and the status file are per shard
+    suffix = f':{args.shard}' if shard else ''
+    status_file = Config.SCHEDULER_STATUS_FILE
+    if shard:
+        base, extension = os.path.splitext(status_file)
+        status_file = f'{base}-{shard[0]}-of-{shard[1]}{extension}'
+
+    # Everything a run needs is set up once here and stays warm
+    app, _ = create_app()
+    with app.app_context():
+        db.create_all()
+
+        # With a Socket.IO message queue, connected dashboards get pushed what each run changed
+        broadcaster = app.extensions['broadcaster'] if Config.SOCKETIO_MESSAGE_QUEUE else None
+        if broadcaster:
+            broadcaster.snapshot()
+
+    def update_prices():
+        update_current_prices(symbols)
+        if broadcaster:
+            broadcaster.publish()
+
+    adaptive = AdaptiveRefresh.from_config(Config, symbols, lambda due: run_pipeline(app, broadcaster, due))
+
+    available = {
+        'pipeline': Job(f'pipeline{suffix}', lambda: run_pipeline(app, broadcaster, symbols),
+                        Config.UPDATE_INTERVAL, jitter=Config.SCHEDULER_JITTER,
+                        conflicts=pipeline_conflicts(f'pipeline{suffix}')),
+        'prices': Job(f'prices{suffix}', update_prices, Config.PRICE_UPDATE_INTERVAL, jitter=Config.SCHEDULER_JITTER),
+        'adaptive': Job(f'adaptive{suffix}', adaptive, Config.ADAPTIVE_REFRESH_TICK, jitter=0,
+                        details=adaptive.status, conflicts=pipeline_conflicts(f'adaptive{suffix}'))
+    }
+    names = [name.strip() for name in args.jobs.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f"unknown jobs: {', '.join(unknown)} (available: {', '.join(available)})")
+    if 'pipeline' in names and 'adaptive' in names:
+        parser.error("run either the pipeline job or the adaptive one, not both")
+
+    scheduler = Scheduler(app, [available[name] for name in names], status_file)
+
+    # Finish the runs in progress, then exit
+    def shutdown(signum, frame):
+        print(f"Received signal {signum}, stopping after the running jobs")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    scheduler.run(run_now=not args.wait)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Seed the database with synthetic prices, sentiment, posts, predictions and votes
+The same --seed always produces the same data. Days a symbol already has rows for are left
+alone and skipped; with --replace, all rows of the seeded symbols in the seeded date range
+are deleted first, real posts, prices, predictions and votes included.
+
+    python seed_data.py                                   # the configured stocks, one year
+    python seed_data.py --symbols IBM,CRM --days 30       # just these stocks
+    python seed_data.py --symbols 2000 --days 730 --seed 7 --replace  # a universe for benchmarks
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backend.app import create_app
+from backend.config.config import Config
+from backend.utils.synthetic_data import generate, load, universe
+
+def parse_symbols(value):
+    """A count (configured stocks first, then made-up tickers) or a comma-separated list"""
+    if value is None:
+        return list(Config.STOCKS)
+    if value.isdigit():
+        return universe(int(value), Config.STOCKS)
+    return [s.strip().upper() for s in value.split(',') if s.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', help='number of symbols, or a comma-separated list (default: STOCKS)')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--posts-per-day', type=float, default=5, help='average posts per symbol and day')
+    parser.add_argument('--votes', type=float, default=10, help='average votes per prediction')
+    parser.add_argument('--prediction-days', type=int, default=30, help='days with predictions, up to today')
+    parser.add_argument('--no-posts', action='store_true', help='write daily summaries but not the posts')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--replace', action='store_true',
+                        help='delete existing rows of these symbols and days first, real data included')
+    args = parser.parse_args()
+
+    symbols = parse_symbols(args.symbols)
+    print(f"Generating {args.days} days for {len(symbols)} symbols (seed {args.seed})...")
+    started = time.perf_counter()
+    dataset = generate(symbols, days=args.days, posts_per_day=args.posts_per_day,
+                       votes_per_prediction=args.votes, prediction_days=args.prediction_days,
+                       store_posts=not args.no_posts, seed=args.seed)
+    generated = time.perf_counter()
+
+    app, _ = create_app()
+    with app.app_context():
+        counts = load(dataset, chunk_size=args.chunk_size, replace=args.replace)
+    loaded = time.perf_counter()
+
+    for table, count in counts.items():
+        print(f"- {table}: {count} rows")
+    print(f"Generated in {generated - started:.1f}s, loaded in {loaded - generated:.1f}s")
+
+if __name__ == "__main__":
+    main()
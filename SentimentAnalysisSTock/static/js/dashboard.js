@@ -2,8 +2,15 @@
 class SentimentDashboard {
     constructor() {
         this.apiBase = 'http://localhost:8000/api';
-        this.socket = io();
+        // WebSocket only: works across multiple server workers without sticky sessions
+        this.socket = io({ transports: ['websocket'] });
         this.selectedStock = 'AAPL';
+        this.postsLimit = 20;
+        this.recentPosts = [];
+        this.latestPostId = null;
+        this.sentimentData = [];
+        this.pricesData = [];
+        this.renderTimers = {};
 
         this.init();
     }
@@ -18,8 +25,13 @@ class SentimentDashboard {
         // Set up real-time updates
         this.setupRealTimeUpdates();
 
-        // Refresh data every 5 minutes
-        setInterval(() => this.refreshData(), 5 * 60 * 1000);
+        // Fall back to refreshing every 5 minutes only while the socket is down;
+        // when connected the server pushes changes as they happen
+        setInterval(() => {
+            if (!this.socket.connected) {
+                this.refreshData();
+            }
+        }, 5 * 60 * 1000);
     }
 
     setupEventListeners() {
@@ -56,7 +68,9 @@ class SentimentDashboard {
             const sentimentData = await sentimentResponse.json();
             const pricesData = await pricesResponse.json();
 
-            this.renderMetrics(sentimentData.sentiment_data, pricesData.prices);
+            this.sentimentData = sentimentData.sentiment_data;
+            this.pricesData = pricesData.prices;
+            this.renderMetrics(this.sentimentData, this.pricesData);
         } catch (error) {
             console.error('Error loading metrics:', error);
         }
@@ -132,14 +146,22 @@ class SentimentDashboard {
             const response = await fetch(`${this.apiBase}/sentiment/current`);
             const data = await response.json();
 
+            this.renderSentimentChart(data.sentiment_data);
+        } catch (error) {
+            console.error('Error loading sentiment chart:', error);
+        }
+    }
+
+    renderSentimentChart(sentimentData) {
+        try {
             const trace = {
-                x: data.sentiment_data.map(d => d.symbol),
-                y: data.sentiment_data.map(d => d.avg_sentiment),
+                x: sentimentData.map(d => d.symbol),
+                y: sentimentData.map(d => d.avg_sentiment),
                 type: 'bar',
                 marker: {
-                    color: data.sentiment_data.map(d => this.getBarColor(d.avg_sentiment))
+                    color: sentimentData.map(d => this.getBarColor(d.avg_sentiment))
                 },
-                text: data.sentiment_data.map(d => d.avg_sentiment.toFixed(3)),
+                text: sentimentData.map(d => d.avg_sentiment.toFixed(3)),
                 textposition: 'auto'
             };
 
@@ -152,13 +174,13 @@ class SentimentDashboard {
 
             Plotly.newPlot('sentiment-chart', [trace], layout);
         } catch (error) {
-            console.error('Error loading sentiment chart:', error);
+            console.error('Error rendering sentiment chart:', error);
         }
     }
 
     async loadCorrelationChart() {
         try {
-            const response = await fetch(`${this.apiBase}/correlation/${this.selectedStock}?days=30`);
+            const response = await fetch(`${this.apiBase}/correlation/${this.selectedStock}?days=30&max_points=500`);
             const data = await response.json();
 
             if (!data.correlation_data || data.correlation_data.length === 0) {
@@ -216,18 +238,53 @@ class SentimentDashboard {
 
     async loadRecentPosts() {
         try {
-            const response = await fetch(`${this.apiBase}/posts/recent?limit=20`);
-            const data = await response.json();
+            // Only request the fields the feed renders, and after the first
+            // load only the posts we haven't seen yet
+            const fields = 'id,symbol,title,preview,sentiment_score,source,source_url,posted_at';
+            const polling = this.latestPostId !== null;
+            let newPosts = [];
+            let data;
+            // A burst of new posts larger than the page comes over several requests
+            for (let page = 0; page < 10; page++) {
+                let url = `${this.apiBase}/posts/recent?limit=${this.postsLimit}&fields=${fields}`;
+                if (this.latestPostId !== null) {
+                    url += `&since_id=${this.latestPostId}`;
+                }
+
+                const response = await fetch(url);
+                data = await response.json();
+
+                if (!data.posts) {
+                    return;
+                }
+
+                newPosts = newPosts.concat(data.posts);
+                if (data.latest_id !== null && data.latest_id !== undefined) {
+                    this.latestPostId = data.latest_id;
+                }
+                if (!polling || !data.has_more) {
+                    break;
+                }
+            }
+
+            if (polling && newPosts.length === 0) {
+                return;
+            }
+
+            // New ids can carry older timestamps (e.g. backfilled news), so re-sort
+            this.recentPosts = newPosts.concat(this.recentPosts)
+                .sort((a, b) => new Date(b.posted_at) - new Date(a.posted_at))
+                .slice(0, this.postsLimit);
 
             const container = document.getElementById('news-container');
             container.innerHTML = '';
 
-            if (!data.posts || data.posts.length === 0) {
+            if (this.recentPosts.length === 0) {
                 container.innerHTML = '<div class="text-center p-4">No recent posts available</div>';
                 return;
             }
 
-            data.posts.forEach(post => {
+            this.recentPosts.forEach(post => {
                 const postElement = document.createElement('div');
                 postElement.className = 'news-item';
 
@@ -240,8 +297,8 @@ class SentimentDashboard {
                                      post.sentiment_score < -0.05 ? 'Negative' : 'Neutral';
 
                 // Prepare content preview
-                const contentPreview = post.content && post.content.trim()
-                    ? this.truncateText(post.content, 150)
+                const contentPreview = post.preview && post.preview.trim()
+                    ? this.truncateText(post.preview, 150)
                     : 'No content available';
 
                 postElement.innerHTML = `
@@ -494,25 +551,61 @@ class SentimentDashboard {
     }
 
     setupRealTimeUpdates() {
+        // Updates are compact deltas for one symbol; patch the cached data and re-render
         this.socket.on('sentiment_update', (data) => {
-            console.log('Received sentiment update:', data);
-            this.loadSentimentChart();
-            this.loadMetrics();
+            this.applyDelta(this.sentimentData, data);
+            this.scheduleRender('metrics', () => this.renderMetrics(this.sentimentData, this.pricesData));
+            this.scheduleRender('sentimentChart', () => this.renderSentimentChart(this.sentimentData));
         });
 
         this.socket.on('price_update', (data) => {
-            console.log('Received price update:', data);
-            this.loadCorrelationChart();
-            this.loadMetrics();
+            this.applyDelta(this.pricesData, data);
+            this.scheduleRender('metrics', () => this.renderMetrics(this.sentimentData, this.pricesData));
+            this.scheduleRender('ticker', () => this.renderPriceTicker(this.pricesData));
+            if (data.symbol === this.selectedStock) {
+                this.scheduleRender('correlationChart', () => this.loadCorrelationChart());
+            }
         });
 
         this.socket.on('new_post', (data) => {
-            console.log('Received new post:', data);
-            this.loadRecentPosts();
+            // Fetches only posts newer than the latest one shown
+            this.scheduleRender('posts', () => this.loadRecentPosts());
         });
 
-        // Subscribe to updates
-        this.socket.emit('subscribe_updates', { stocks: ['AAPL', 'GOOGL', 'AMZN', 'META', 'NFLX'] });
+        // Rooms don't survive a reconnect, so subscribe on every connect and catch up
+        // on anything missed while disconnected
+        let connectedBefore = this.socket.connected;
+        const subscribe = () => {
+            const stocks = this.sentimentData.map(d => d.symbol);
+            this.socket.emit('subscribe_updates', { stocks });
+        };
+
+        this.socket.on('connect', () => {
+            subscribe();
+            if (connectedBefore) {
+                this.refreshData();
+            }
+            connectedBefore = true;
+        });
+
+        if (this.socket.connected) {
+            subscribe();
+        }
+    }
+
+    applyDelta(items, delta) {
+        const index = items.findIndex(item => item.symbol === delta.symbol);
+        if (index >= 0) {
+            items[index] = { ...items[index], ...delta };
+        } else {
+            items.push(delta);
+        }
+    }
+
+    scheduleRender(key, render) {
+        // Coalesce bursts (e.g. every symbol changing after a pipeline run) into one render
+        clearTimeout(this.renderTimers[key]);
+        this.renderTimers[key] = setTimeout(render, 500);
     }
 
     async loadPriceTicker() {
@@ -5,6 +5,7 @@ Script to update stock prices with current market data
 
 import os
 import sys
+import argparse
 from datetime import datetime, date
 import yfinance as yf
 import requests
@@ -15,13 +16,19 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 from backend.app import create_app
 from backend.models.models import db, StockPrice
 from backend.config.config import Config
+from backend.utils.scheduler import run_exclusively
+from backend.utils import sharding
+from backend.utils.journal import Journal, add_rows
+
+# Reused across calls (and, in the scheduler, across runs) so connections stay open
+http = requests.Session()
 
 def get_price_alternative_api(symbol):
     """Alternative API to get stock prices (Alpha Vantage free tier)"""
     try:
         # Using Alpha Vantage free API (no key required for basic quotes)
         url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={symbol}&apikey=demo"
-        response = requests.get(url, timeout=10)
+        response = http.get(url, timeout=10)
         data = response.json()
 
         if 'Global Quote' in data:
@@ -40,7 +47,7 @@ def get_price_yahoo_simple(symbol):
         url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http.get(url, headers=headers, timeout=10)
         data = response.json()
 
         if 'chart' in data and data['chart']['result']:
@@ -53,77 +60,119 @@ def get_price_yahoo_simple(symbol):
 
     return None
 
-def update_current_prices():
-    """Update stock prices using multiple fallback methods"""
+def update_current_prices(symbols=None, journal=None):
+    """
+    Update stock prices using multiple fallback methods, for every tracked stock or only
+    symbols. Commits every chunk of symbols; with a journal, symbols it has already done
+    are skipped
+    """
     print("Updating current stock prices...")
 
+    symbols = symbols or Config.STOCKS
+    journal = journal or Journal.untracked(symbols, Config.PIPELINE_CHUNK_SYMBOLS)
     updated_prices = {}
+    today = date.today()
 
-    for symbol in Config.STOCKS:
-        print(f"Fetching price for {symbol}...")
-        current_price = None
-
-        # Method 1: Try Yahoo Finance simple API
-        current_price = get_price_yahoo_simple(symbol)
-        if current_price:
-            print(f"  ✓ Yahoo API: ${current_price:.2f}")
+    def update_chunk(chunk):
+        new_prices = []
+        for symbol in chunk:
+            print(f"Fetching price for {symbol}...")
+            current_price = None
 
-        # Method 2: Try Alpha Vantage as fallback
-        if not current_price:
-            current_price = get_price_alternative_api(symbol)
+            # Method 1: Try Yahoo Finance simple API
+            current_price = get_price_yahoo_simple(symbol)
             if current_price:
-                print(f"  ✓ Alpha Vantage: ${current_price:.2f}")
-
-        # Method 3: Use realistic sample data as last resort
-        if not current_price:
-            sample_prices = {
-                'AAPL': 175.43,
-                'GOOGL': 138.21,
-                'AMZN': 142.65,
-                'META': 325.78,
-                'NFLX': 445.12
-            }
-            current_price = sample_prices.get(symbol, 100.0)
-            print(f"  ✓ Sample data: ${current_price:.2f}")
-
-        updated_prices[symbol] = current_price
-
-        # Update database with today's price
-        today = date.today()
-        existing_price = StockPrice.query.filter_by(
-            symbol=symbol,
-            date=today
-        ).first()
-
-        if existing_price:
-            existing_price.close_price = current_price
-        else:
-            new_price = StockPrice(
+                print(f"  ✓ Yahoo API: ${current_price:.2f}")
+
+            # Method 2: Try Alpha Vantage as fallback
+            if not current_price:
+                current_price = get_price_alternative_api(symbol)
+                if current_price:
+                    print(f"  ✓ Alpha Vantage: ${current_price:.2f}")
+
+            # Method 3: Use realistic sample data as last resort
+            if not current_price:
+                sample_prices = {
+                    'AAPL': 175.43,
+                    'GOOGL': 138.21,
+                    'AMZN': 142.65,
+                    'META': 325.78,
+                    'NFLX': 445.12
+                }
+                current_price = sample_prices.get(symbol, 100.0)
+                print(f"  ✓ Sample data: ${current_price:.2f}")
+
+            updated_prices[symbol] = current_price
+
+            # Update database with today's price
+            existing_price = StockPrice.query.filter_by(
                 symbol=symbol,
-                date=today,
-                open_price=current_price * 0.995,
-                high_price=current_price * 1.01,
-                low_price=current_price * 0.99,
-                close_price=current_price,
-                volume=1000000 + (hash(symbol) % 5000000)
-            )
-            db.session.add(new_price)
-
-    db.session.commit()
+                date=today
+            ).first()
+
+            if existing_price:
+                existing_price.close_price = current_price
+            else:
+                new_prices.append(StockPrice(
+                    symbol=symbol,
+                    date=today,
+                    open_price=current_price * 0.995,
+                    high_price=current_price * 1.01,
+                    low_price=current_price * 0.99,
+                    close_price=current_price,
+                    volume=1000000 + (hash(symbol) % 5000000)
+                ))
+
+        add_rows(new_prices)
+
+    # Each chunk's prices are committed together with its journal entries
+    journal.each_chunk('prices', update_chunk, symbols)
 
     return updated_prices
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Update stock prices with current market data')
+    sharding.add_arguments(parser)
+    parser.add_argument('--resume', action='store_true', help="pick up today's unfinished run where it stopped")
+    args = parser.parse_args()
+    symbols, shard = sharding.from_arguments(parser, args, Config.STOCKS, Config.SHARD_STRATEGY)
+
     print("Stock Price Updater")
     print("==================")
+    if shard:
+        print(f"Shard {args.shard}: {len(symbols)} of {len(Config.STOCKS)} stocks")
 
     # Create Flask app context
     app, _ = create_app()
 
-    with app.app_context():
+    with app.app_context(), sharding.reporting(Config.SHARD_STATUS_DIR, 'prices', shard, symbols) as status:
+        # With a Socket.IO message queue, connected dashboards get pushed the new prices
+        broadcaster = app.extensions['broadcaster'] if Config.SOCKETIO_MESSAGE_QUEUE else None
+        if broadcaster:
+            broadcaster.snapshot()
+
         try:
-            updated_prices = update_current_prices()
+            updated_prices = {}
+
+            def update():
+                # With --resume, picks up today's unfinished run over the same stocks where it stopped
+                journal = Journal.open('prices', symbols, args.resume, Config.JOURNAL_RESUME_WINDOW,
+                                       Config.PIPELINE_CHUNK_SYMBOLS)
+                try:
+                    updated_prices.update(update_current_prices(symbols, journal))
+                except Exception as e:
+                    db.session.rollback()
+                    journal.finish(f'{type(e).__name__}: {e}')
+                    raise
+                journal.finish()
+                if broadcaster:
+                    broadcaster.publish()
+
+            # Not alongside a scheduler's run of the same job (or of the same shard)
+            if not run_exclusively(f'prices:{args.shard}' if shard else 'prices', update):
+                status['skipped'] = True
+                return
 
             print(f"\n✅ Successfully updated prices:")
             for symbol, price in updated_prices.items():